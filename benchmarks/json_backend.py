@@ -0,0 +1,215 @@
+"""
+JSON backend microbenchmark
+
+Compares the available JsonResponse serialization backends on response payloads with 10 and 1000 DTO records, as well
+as camelCase payload translation (humps.camelize() vs CamelCaseTranslator) and compiled row serialization (Record
+objects vs RecordSerializer).
+
+Usage:
+    python benchmarks/json_backend.py [-n ROUNDS]
+"""
+
+import argparse
+import datetime
+import decimal
+import os
+import sys
+import timeit
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import humps  # noqa: E402
+from rick_db import fieldmapper  # noqa: E402
+from rick.serializer.json import ExtendedJsonEncoder, CamelCaseJsonEncoder  # noqa: E402
+
+from pokie.http.json_backend import JSON_BACKENDS, get_json_backend  # noqa: E402
+from pokie.http.camelcase import (  # noqa: E402
+    CamelCaseTranslator,
+    camel_case_translator,
+)
+from pokie.http.serializer import RecordSerializer  # noqa: E402
+
+
+@fieldmapper(tablename="orders", pk="id_order")
+class OrderRecord:
+    id = "id_order"
+    reference = "order_reference"
+    customer_id = "customer_id"
+    customer_name = "customer_name"
+    created_at = "created_at"
+    shipped_date = "shipped_date"
+    amount = "amount"
+    quantity = "quantity"
+    active = "active"
+    notes = "notes"
+
+
+def build_payload(size: int) -> dict:
+    created = datetime.datetime(2024, 1, 1, 12, 30, 0, 123456)
+    rows = []
+    for i in range(size):
+        rows.append(
+            OrderRecord(
+                id=i,
+                reference=uuid.UUID(int=i),
+                customer_id="CUST{:05d}".format(i),
+                customer_name="Customer name {}".format(i),
+                created_at=created + datetime.timedelta(minutes=i),
+                shipped_date=datetime.date(2024, 2, 1),
+                amount=decimal.Decimal("1234.56") + i,
+                quantity=i % 17,
+                active=i % 2 == 0,
+                notes=None if i % 3 else "fragile, handle with care",
+            )
+        )
+    return {"success": True, "data": {"total": size, "rows": rows}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON backend microbenchmark")
+    parser.add_argument("-n", dest="rounds", type=int, default=0, help="rounds")
+    args = parser.parse_args()
+
+    backends = [
+        get_json_backend(name) for name, cls in JSON_BACKENDS.items() if cls.available()
+    ]
+    encoders = [ExtendedJsonEncoder, CamelCaseJsonEncoder]
+
+    print(
+        "{:<8} {:<22} {:<7} {:<8} {:>12} {:>9}".format(
+            "records", "encoder", "pretty", "backend", "usec/op", "speedup"
+        )
+    )
+    for size in [10, 1000]:
+        payload = build_payload(size)
+        rounds = args.rounds if args.rounds > 0 else (20000 // size) or 1
+        for encoder in encoders:
+            for pretty in [False, True]:
+                baseline = None
+                expected = None
+                for backend in backends:
+                    result = backend.dumps_str(payload, encoder, pretty)
+                    if expected is None:
+                        expected = result
+                    elif result != expected:
+                        raise RuntimeError(
+                            "backend '{}' output differs".format(backend.name)
+                        )
+
+                    elapsed = min(
+                        timeit.repeat(
+                            lambda: backend.dumps(payload, encoder, pretty),
+                            number=rounds,
+                            repeat=3,
+                        )
+                    )
+                    usec = elapsed / rounds * 1e6
+                    if baseline is None:
+                        baseline = usec
+                    print(
+                        "{:<8} {:<22} {:<7} {:<8} {:>12.1f} {:>8.2f}x".format(
+                            size,
+                            encoder.__name__,
+                            str(pretty),
+                            backend.name,
+                            usec,
+                            baseline / usec,
+                        )
+                    )
+
+    print()
+    print(
+        "{:<8} {:<22} {:<8} {:>12} {:>9}".format(
+            "records", "camelCase", "backend", "usec/op", "speedup"
+        )
+    )
+    for size in [10, 1000]:
+        payload = build_payload(size)
+        rounds = args.rounds if args.rounds > 0 else (20000 // size) or 1
+        for backend in backends:
+            translator = CamelCaseTranslator()
+            modes = [
+                ("humps.camelize", lambda: humps.camelize(payload)),
+                ("CamelCaseTranslator", lambda: translator.translate(payload)),
+            ]
+            baseline = None
+            expected = None
+            for label, fn in modes:
+                result = backend.dumps_str(fn(), CamelCaseJsonEncoder)
+                if expected is None:
+                    expected = result
+                elif result != expected:
+                    raise RuntimeError("camelCase translation output differs")
+
+                elapsed = min(
+                    timeit.repeat(
+                        lambda: backend.dumps(fn(), CamelCaseJsonEncoder),
+                        number=rounds,
+                        repeat=3,
+                    )
+                )
+                usec = elapsed / rounds * 1e6
+                if baseline is None:
+                    baseline = usec
+                print(
+                    "{:<8} {:<22} {:<8} {:>12.1f} {:>8.2f}x".format(
+                        size, label, backend.name, usec, baseline / usec
+                    )
+                )
+
+    print()
+    print(
+        "{:<8} {:<22} {:<7} {:<8} {:>12} {:>9}".format(
+            "records", "rows", "camel", "backend", "usec/op", "speedup"
+        )
+    )
+    for size in [10, 1000]:
+        payload = build_payload(size)
+        records = payload["data"]["rows"]
+        rounds = args.rounds if args.rounds > 0 else (20000 // size) or 1
+        for camel_case in [False, True]:
+            encoder = CamelCaseJsonEncoder if camel_case else ExtendedJsonEncoder
+            translate = camel_case_translator.translate if camel_case else lambda v: v
+            serializer = RecordSerializer(OrderRecord, camel_case)
+            for backend in backends:
+                modes = [
+                    ("Record", lambda: translate({"rows": records})),
+                    (
+                        "RecordSerializer",
+                        lambda: translate({"rows": serializer.rows(records)}),
+                    ),
+                ]
+                baseline = None
+                expected = None
+                for label, fn in modes:
+                    result = backend.dumps_str(fn(), encoder)
+                    if expected is None:
+                        expected = result
+                    elif result != expected:
+                        raise RuntimeError("row serializer output differs")
+
+                    elapsed = min(
+                        timeit.repeat(
+                            lambda: backend.dumps(fn(), encoder),
+                            number=rounds,
+                            repeat=3,
+                        )
+                    )
+                    usec = elapsed / rounds * 1e6
+                    if baseline is None:
+                        baseline = usec
+                    print(
+                        "{:<8} {:<22} {:<7} {:<8} {:>12.1f} {:>8.2f}x".format(
+                            size,
+                            label,
+                            str(camel_case),
+                            backend.name,
+                            usec,
+                            baseline / usec,
+                        )
+                    )
+
+
+if __name__ == "__main__":
+    main()
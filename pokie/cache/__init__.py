@@ -1,3 +1,6 @@
 from .dummy import DummyCache
 from .memory import MemoryCache
 from .redis import RedisCache
+from .file import FileCache
+from .local import LocalCache
+from .tiered import TieredCache
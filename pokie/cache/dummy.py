@@ -2,8 +2,10 @@ from rick.base import Di
 from rick.mixin import Injectable
 from rick.resource import CacheInterface, CacheNull
 
+from .mixin import CacheMixin
 
-class DummyCache(CacheNull, Injectable):
+
+class DummyCache(CacheMixin, CacheNull, Injectable):
     """
     Dummy Cache Wrapper
     """
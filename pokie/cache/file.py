@@ -0,0 +1,119 @@
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+import time
+
+from rick.base import Di
+from rick.mixin import Injectable
+from rick.resource import CacheInterface
+
+from .mixin import CacheMixin
+
+
+class FileCache(CacheMixin, CacheInterface, Injectable):
+    """
+    File-based cache
+
+    Each entry is stored as a pickle file in a private directory, and replaced atomically on write; entries are
+    shared between processes on the same host (e.g. WSGI workers) and survive restarts. TTLs use wall-clock time.
+
+    Note: values are unpickled on get(); the cache directory must only be writable by the current user, and
+    a RuntimeError is raised if it is not
+    """
+
+    file_ext = ".cache"
+
+    def __init__(self, di: Di, path: str = None):
+        super().__init__(di)
+        if not path:
+            uid = os.getuid() if hasattr(os, "getuid") else 0
+            path = os.path.join(tempfile.gettempdir(), "pokie-cache-{}".format(uid))
+        self.path = path
+        self.prefix = ""
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+        self._check_path()
+
+    def _check_path(self):
+        if not hasattr(os, "getuid"):
+            return
+        st = os.stat(self.path)
+        if st.st_uid != os.getuid() or st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise RuntimeError(
+                "FileCache: directory '{}' must be owned and writable only by the current user".format(
+                    self.path
+                )
+            )
+
+    def set_prefix(self, prefix):
+        self.prefix = prefix if prefix else ""
+
+    def _file(self, key) -> str:
+        key = self.prefix + key if self.prefix else key
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, name + self.file_ext)
+
+    def _read(self, key):
+        """
+        Read an entry
+        :param key:
+        :return: tuple(found, value)
+        """
+        fname = self._file(key)
+        try:
+            with open(fname, "rb") as f:
+                expiry, value = pickle.load(f)
+        except FileNotFoundError:
+            return False, None
+        except (
+            OSError,
+            EOFError,
+            pickle.UnpicklingError,
+            ValueError,
+            TypeError,
+            AttributeError,
+            ImportError,
+        ):
+            # unreadable, corrupted or stale entry (e.g. a pickled class was removed)
+            self._unlink(fname)
+            return False, None
+
+        if expiry is not None and time.time() >= expiry:
+            self._unlink(fname)
+            return False, None
+        return True, value
+
+    @staticmethod
+    def _unlink(fname):
+        try:
+            os.remove(fname)
+        except FileNotFoundError:
+            pass
+
+    def get(self, key):
+        _, value = self._read(key)
+        return value
+
+    def set(self, key, value, ttl=None):
+        expiry = time.time() + ttl if ttl and ttl > 0 else None
+        fd, tmp_name = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((expiry, value), f)
+            os.replace(tmp_name, self._file(key))
+        except BaseException:
+            self._unlink(tmp_name)
+            raise
+
+    def has(self, key):
+        found, _ = self._read(key)
+        return found
+
+    def remove(self, key):
+        self._unlink(self._file(key))
+
+    def purge(self):
+        for name in os.listdir(self.path):
+            if name.endswith(self.file_ext):
+                self._unlink(os.path.join(self.path, name))
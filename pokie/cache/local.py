@@ -0,0 +1,261 @@
+import heapq
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from rick.base import Di
+from rick.mixin import Injectable
+from rick.resource import CacheInterface
+
+from pokie.constants import CACHE_POLICY_LRU, CACHE_POLICY_TINYLFU, CACHE_POLICIES
+from .mixin import CacheMixin
+from .serializer import CacheSerializer, PickleSerializer
+
+
+class FrequencySketch:
+    """
+    Count-min sketch with 4-bit saturating counters, used by the TinyLFU admission policy
+
+    Counters are halved after a number of increments proportional to the capacity, so the estimated frequencies favor
+    recent accesses
+    """
+
+    max_count = 15
+    depth = 4
+    seeds = (0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F)
+
+    def __init__(self, capacity: int):
+        width = 64
+        while width < 4 * capacity:
+            width <<= 1
+        self.width = width
+        self.mask = width - 1
+        self.table = bytearray(width * self.depth)
+        self.sample_size = 10 * max(capacity, 1)
+        self.additions = 0
+
+    def _indexes(self, key):
+        h = hash(key)
+        width = self.width
+        mask = self.mask
+        return [
+            i * width + (((h ^ seed) * 0x9E3779B1) >> 8 & mask)
+            for i, seed in enumerate(self.seeds)
+        ]
+
+    def increment(self, key):
+        table = self.table
+        added = False
+        for idx in self._indexes(key):
+            if table[idx] < self.max_count:
+                table[idx] += 1
+                added = True
+        if added:
+            self.additions += 1
+            if self.additions >= self.sample_size:
+                self._reset()
+
+    def frequency(self, key) -> int:
+        table = self.table
+        return min(table[idx] for idx in self._indexes(key))
+
+    def _reset(self):
+        self.table = bytearray(c >> 1 for c in self.table)
+        self.additions //= 2
+
+
+class LocalCache(CacheMixin, CacheInterface, Injectable):
+    """
+    Bounded in-process cache
+
+    Entries are evicted when max_entries or max_bytes is exceeded, either in least-recently-used order (LRU) or, with
+    the TinyLFU policy, only if a new entry is estimated to be accessed more frequently than the entry it would evict.
+    Expired entries are removed as other operations are performed, in expiry order, at a small amortized cost.
+
+    Values are serialized (pickled, by default) on set() and deserialized on get(), so callers can't modify cached
+    values; with by_reference=True, values are stored as-is and returned by reference, and must not be modified. In this mode, max_bytes uses the
+    (shallow) size of each object as reported by sys.getsizeof().
+
+    LocalCache is thread-safe; entries are private to each process.
+    """
+
+    def __init__(
+        self,
+        di: Di,
+        max_entries: int = 10000,
+        max_bytes: int = 0,
+        policy: str = CACHE_POLICY_LRU,
+        by_reference: bool = False,
+        serializer: CacheSerializer = None,
+    ):
+        """
+        Constructor
+        :param di:
+        :param max_entries: maximum amount of entries; 0 for unbounded
+        :param max_bytes: maximum size of stored values, in bytes; 0 for unbounded
+        :param policy: eviction policy; one of CACHE_POLICY_LRU, CACHE_POLICY_TINYLFU
+        :param by_reference: if True, values are not serialized
+        :param serializer: optional value serializer; if omitted, values are pickled
+        """
+        super().__init__(di)
+        if policy not in CACHE_POLICIES:
+            raise ValueError("LocalCache: invalid eviction policy '{}'".format(policy))
+        self.max_entries = max_entries if max_entries and max_entries > 0 else 0
+        self.max_bytes = max_bytes if max_bytes and max_bytes > 0 else 0
+        self.policy = policy
+        self.by_reference = by_reference
+        self.serializer = serializer if serializer is not None else PickleSerializer()
+        self.prefix = ""
+
+        # key: (value, expiry, size)
+        self._entries = OrderedDict()
+        # (expiry, key) heap
+        self._expiry = []
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._sketch = None
+        if policy == CACHE_POLICY_TINYLFU:
+            self._sketch = FrequencySketch(self.max_entries or 1024)
+
+        # statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def set_prefix(self, prefix):
+        self.prefix = prefix if prefix else ""
+
+    def _key(self, key):
+        return self.prefix + key if self.prefix else key
+
+    def get(self, key):
+        key = self._key(key)
+        with self._lock:
+            self._expire()
+            if self._sketch is not None:
+                self._sketch.increment(key)
+            entry = self._entries.get(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[0]
+
+        if self.by_reference:
+            return value
+        return self.serializer.loads(value)
+
+    def set(self, key, value, ttl=None):
+        key = self._key(key)
+        if self.by_reference:
+            size = sys.getsizeof(value)
+        else:
+            value = self.serializer.dumps(value)
+            size = len(value)
+        expiry = time.monotonic() + ttl if ttl and ttl > 0 else None
+
+        with self._lock:
+            self._expire()
+            if self._sketch is not None:
+                self._sketch.increment(key)
+            exists = key in self._entries
+            self._remove(key)
+            if self.max_bytes and size > self.max_bytes:
+                # entry is larger than the cache
+                return
+            if not exists and not self._admit(key, size):
+                return
+
+            self._entries[key] = (value, expiry, size)
+            self._bytes += size
+            if expiry is not None:
+                heapq.heappush(self._expiry, (expiry, key))
+                if len(self._expiry) > 2 * len(self._entries) + 64:
+                    self._compact()
+            self._evict()
+
+    def has(self, key):
+        key = self._key(key)
+        with self._lock:
+            self._expire()
+            return key in self._entries
+
+    def remove(self, key):
+        key = self._key(key)
+        with self._lock:
+            self._remove(key)
+
+    def purge(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._expiry = []
+            self._bytes = 0
+
+    def __len__(self):
+        with self._lock:
+            self._expire()
+            return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """
+        Size of stored values, in bytes
+        :return: int
+        """
+        return self._bytes
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _full(self, size: int) -> bool:
+        if self.max_entries and len(self._entries) >= self.max_entries:
+            return True
+        return bool(self.max_bytes) and self._bytes + size > self.max_bytes
+
+    def _admit(self, key, size: int) -> bool:
+        """
+        TinyLFU admission: when the cache is full, a new entry is only stored if it is estimated to be more frequently
+        accessed than the LRU entry
+        """
+        if self._sketch is None or not self._entries or not self._full(size):
+            return True
+        victim = next(iter(self._entries))
+        return self._sketch.frequency(key) > self._sketch.frequency(victim)
+
+    def _evict(self):
+        entries = self._entries
+        while entries and (
+            (self.max_entries and len(entries) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            _, entry = entries.popitem(last=False)
+            self._bytes -= entry[2]
+            self.evictions += 1
+
+    def _expire(self):
+        heap = self._expiry
+        if not heap:
+            return
+        now = time.monotonic()
+        entries = self._entries
+        while heap and heap[0][0] <= now:
+            expiry, key = heapq.heappop(heap)
+            entry = entries.get(key, None)
+            # skip heap items of removed or replaced entries
+            if entry is not None and entry[1] == expiry:
+                del entries[key]
+                self._bytes -= entry[2]
+
+    def _compact(self):
+        # drop heap items of removed or replaced entries
+        entries = self._entries
+        self._expiry = [
+            item
+            for item in self._expiry
+            if item[1] in entries and entries[item[1]][1] == item[0]
+        ]
+        heapq.heapify(self._expiry)
@@ -5,8 +5,10 @@ from rick.base import Di
 from rick.mixin import Injectable
 from rick.resource import CacheInterface
 
+from .mixin import CacheMixin
 
-class MemoryCache(CacheInterface, Injectable):
+
+class MemoryCache(CacheMixin, CacheInterface, Injectable):
     """
     In-memory cache
 
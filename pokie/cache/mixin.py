@@ -0,0 +1,208 @@
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional, Iterable
+
+# marker key of get_or_set() entries
+ENTRY_MARKER = "__pokie_entry__"
+
+
+class _FlightLocks:
+    """
+    Per-key locks, used to compute each missing key only once per process
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    @contextmanager
+    def hold(self, name, blocking: bool = True):
+        with self._lock:
+            item = self._locks.get(name, None)
+            if item is None:
+                item = [threading.Lock(), 0]
+                self._locks[name] = item
+            item[1] += 1
+
+        acquired = item[0].acquire(blocking)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                item[0].release()
+            with self._lock:
+                item[1] -= 1
+                if item[1] == 0:
+                    del self._locks[name]
+
+
+_flight_locks = _FlightLocks()
+
+
+class CacheMixin:
+    """
+    Common cache operations, implemented on top of the CacheInterface methods
+
+    get_or_set() protects expensive values against cache stampedes:
+        - concurrent misses of the same key in a process are computed once (single-flight);
+        - backends shared between processes (such as RedisCache) also hold a distributed lock while computing, so other
+        processes wait for the value instead of computing it;
+        - values may be recomputed before they expire, with a probability that increases as the expiry approaches and
+        with the time the value took to compute (probabilistic early expiration, or XFetch), and may be served after
+        they expire while one caller recomputes them (stale-while-revalidate)
+    """
+
+    # maximum time a distributed lock is held, and other processes wait for the value, in seconds
+    lock_timeout = 10
+    # interval between checks while waiting for another process to compute a value, in seconds
+    lock_poll_interval = 0.05
+
+    def get_or_set(
+        self,
+        key,
+        fn: Callable,
+        ttl=None,
+        stale_ttl: int = 0,
+        beta: float = 1.0,
+    ):
+        """
+        Get a value, computing and storing it if missing or expired
+
+        Entries are stored with the compute time and expiry, and must only be read with get_or_set()
+        :param key:
+        :param fn: callable without arguments that computes the value
+        :param ttl: optional ttl, in seconds
+        :param stale_ttl: time after expiry during which the current value is served while being recomputed
+        :param beta: early expiration factor; higher values recompute earlier, 0 disables early expiration
+        :return: value
+        """
+        entry = self._get_entry(key)
+        if entry is not None:
+            value, delta, expiry = entry
+            if expiry is None:
+                return value
+            now = time.time()
+            if now >= expiry + stale_ttl:
+                # expired, but not yet removed by the backend
+                entry = None
+            elif now < expiry and (
+                beta <= 0
+                or now - delta * beta * math.log(1.0 - random.random()) < expiry
+            ):
+                return value
+            else:
+                # recompute early or while stale; callers that don't get the lock use the current value
+                with _flight_locks.hold(self._flight_name(key), False) as acquired:
+                    if acquired:
+                        token = self.lock_acquire(key)
+                        if token is not None:
+                            try:
+                                return self._compute(key, fn, ttl, stale_ttl)
+                            finally:
+                                self.lock_release(key, token)
+                return value
+
+        with _flight_locks.hold(self._flight_name(key)):
+            # another thread may have computed the value meanwhile
+            entry = self._get_entry(key)
+            if entry is not None and (entry[2] is None or time.time() < entry[2]):
+                return entry[0]
+
+            token = self.lock_acquire(key)
+            if token is None:
+                # another process is computing the value
+                limit = time.monotonic() + self.lock_timeout
+                while token is None and time.monotonic() < limit:
+                    time.sleep(self.lock_poll_interval)
+                    entry = self._get_entry(key)
+                    # an expired entry may still be stored, until replaced by the new value
+                    if entry is not None and (
+                        entry[2] is None or time.time() < entry[2]
+                    ):
+                        return entry[0]
+                    token = self.lock_acquire(key)
+            try:
+                return self._compute(key, fn, ttl, stale_ttl)
+            finally:
+                if token is not None:
+                    self.lock_release(key, token)
+
+    def get_many(self, keys: Iterable) -> dict:
+        """
+        Get multiple values
+        :param keys:
+        :return: dict of {key: value}, with the keys found
+        """
+        result = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                result[key] = value
+        return result
+
+    def set_many(self, values: dict, ttl=None):
+        """
+        Store multiple values
+        :param values: dict of {key: value}
+        :param ttl: optional ttl, in seconds
+        :return:
+        """
+        for key, value in values.items():
+            self.set(key, value, ttl)
+
+    def delete_many(self, keys: Iterable):
+        """
+        Remove multiple keys
+        :param keys:
+        :return:
+        """
+        for key in keys:
+            self.remove(key)
+
+    def lock_acquire(self, key):
+        """
+        Try to acquire the distributed compute lock for a key, without blocking
+        Backends that are not shared between processes don't need a distributed lock
+        :param key:
+        :return: lock token, or None if the lock is held by someone else
+        """
+        return True
+
+    def lock_release(self, key, token):
+        """
+        Release a distributed compute lock
+        :param key:
+        :param token: token returned by lock_acquire()
+        :return:
+        """
+        pass
+
+    def _flight_name(self, key) -> tuple:
+        return id(self), key
+
+    def _get_entry(self, key) -> Optional[tuple]:
+        """
+        Read a get_or_set() entry
+        :param key:
+        :return: tuple(value, delta, expiry), or None
+        """
+        entry = self.get(key)
+        if isinstance(entry, dict) and entry.get(ENTRY_MARKER, None) == 1:
+            return entry["v"], entry["d"], entry["e"]
+        return None
+
+    def _compute(self, key, fn: Callable, ttl, stale_ttl: int):
+        start = time.monotonic()
+        value = fn()
+        delta = time.monotonic() - start
+
+        expiry = None
+        store_ttl = None
+        if ttl and ttl > 0:
+            expiry = time.time() + ttl
+            store_ttl = int(math.ceil(ttl + max(stale_ttl, 0)))
+        self.set(key, {ENTRY_MARKER: 1, "v": value, "d": delta, "e": expiry}, store_ttl)
+        return value
@@ -1,13 +1,116 @@
+import math
+import uuid
+from typing import Iterable
+
 from rick.base import Di
 from rick.mixin import Injectable
 from rick.resource.redis import RedisCache as BaseRedisCache
 
 from pokie.constants import DI_REDIS
+from .mixin import CacheMixin
+from .serializer import CacheSerializer
+
 
+class RedisCache(CacheMixin, BaseRedisCache, Injectable):
+    # compare-and-delete, so a lock is only released by its owner
+    lua_release = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
 
-class RedisCache(BaseRedisCache, Injectable):
-    def __init__(self, di: Di):
+    def __init__(self, di: Di, serializer: CacheSerializer = None):
+        """
+        Constructor
+        :param di:
+        :param serializer: optional value serializer; if omitted, values are pickled
+        """
         if not di.has(DI_REDIS):
             raise RuntimeError("DI_REDIS not found; maybe RedisFactory is missing?")
         self.set_di(di)
-        super().__init__(backend=di.get(DI_REDIS))
+        kwargs = {}
+        if serializer is not None:
+            kwargs = {"serializer": serializer.dumps, "deserializer": serializer.loads}
+        super().__init__(backend=di.get(DI_REDIS), **kwargs)
+
+    def get_with_ttl(self, key) -> tuple:
+        """
+        Get a value and its remaining TTL, in a single round trip
+        :param key:
+        :return: tuple(value, ttl); ttl is None if the key does not expire
+        """
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.get(self._prefix + key)
+        pipe.pttl(self._prefix + key)
+        v, pttl = pipe.execute()
+        if v is None:
+            self.misses += 1
+            return None, None
+
+        self.hits += 1
+        return self._deserialize(v), pttl / 1000 if pttl > 0 else None
+
+    def get_many(self, keys: Iterable) -> dict:
+        """
+        Get multiple values with a single MGET
+        :param keys:
+        :return: dict of {key: value}, with the keys found
+        """
+        keys = list(keys)
+        if len(keys) == 0:
+            return {}
+        result = {}
+        for key, v in zip(keys, self._redis.mget([self._prefix + k for k in keys])):
+            if v is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                result[key] = self._deserialize(v)
+        return result
+
+    def set_many(self, values: dict, ttl=None):
+        """
+        Store multiple values with a single pipelined round trip
+        :param values: dict of {key: value}
+        :param ttl: optional ttl, in seconds
+        :return:
+        """
+        if len(values) == 0:
+            return
+        # SET EX only accepts integers; PX keeps fractional ttls
+        px = int(math.ceil(ttl * 1000)) if ttl and ttl > 0 else None
+        pipe = self._redis.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.set(self._prefix + key, self._serialize(value), px=px)
+        pipe.execute()
+
+    def delete_many(self, keys: Iterable):
+        """
+        Remove multiple keys with a single UNLINK
+        :param keys:
+        :return:
+        """
+        keys = [self._prefix + key for key in keys]
+        if len(keys) > 0:
+            self._redis.unlink(*keys)
+
+    def lock_acquire(self, key):
+        """
+        Try to acquire the distributed compute lock for a key, without blocking
+        The lock expires after lock_timeout seconds
+        :param key:
+        :return: lock token, or None if the lock is held by someone else
+        """
+        token = uuid.uuid4().hex
+        if self._redis.set(
+            self._lock_key(key), token, nx=True, px=int(self.lock_timeout * 1000)
+        ):
+            return token
+        return None
+
+    def lock_release(self, key, token):
+        self._redis.eval(self.lua_release, 1, self._lock_key(key), token)
+
+    def _lock_key(self, key) -> str:
+        return "lock:" + self._prefix + key
@@ -0,0 +1,228 @@
+import json
+import pickle
+import zlib
+from typing import Optional
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover
+    lz4_frame = None
+
+from rick.serializer import msgpack as rick_msgpack
+from rick.serializer.json import ExtendedJsonEncoder
+
+from pokie.constants import (
+    CACHE_SERIALIZER_PICKLE,
+    CACHE_SERIALIZER_MSGPACK,
+    CACHE_SERIALIZER_JSON,
+    CACHE_SERIALIZER_RAW,
+    CACHE_COMPRESSION_ZLIB,
+    CACHE_COMPRESSION_LZ4,
+)
+
+
+class CacheSerializer:
+    """
+    Cache value serializer
+
+    Converts values to bytes to be stored in a cache backend, and back
+    """
+
+    name = None
+
+    def dumps(self, value) -> bytes:
+        """
+        Serialize a value
+        :param value:
+        :return: bytes
+        """
+        raise NotImplementedError
+
+    def loads(self, data: bytes):
+        """
+        Deserialize a value
+        :param data:
+        :return: value
+        """
+        raise NotImplementedError
+
+
+class PickleSerializer(CacheSerializer):
+    """
+    pickle serializer; supports most Python objects
+
+    Note: only use with trusted cache backends, as deserializing untrusted data with pickle allows arbitrary code
+    execution
+    """
+
+    name = CACHE_SERIALIZER_PICKLE
+
+    def dumps(self, value) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data: bytes):
+        return pickle.loads(data)
+
+
+class MsgpackSerializer(CacheSerializer):
+    """
+    MessagePack serializer; supports native types, as well as date, datetime, Decimal and UUID values
+
+    Note: dataclasses and other objects are also supported, but deserializing them imports and instantiates the
+    classes named in the data; only use with trusted cache backends
+    """
+
+    name = CACHE_SERIALIZER_MSGPACK
+
+    def dumps(self, value) -> bytes:
+        return rick_msgpack.packb(value)
+
+    def loads(self, data: bytes):
+        return rick_msgpack.unpackb(data)
+
+
+class JsonSerializer(CacheSerializer):
+    """
+    JSON serializer
+
+    Values are serialized with ExtendedJsonEncoder; dates, Decimal and UUID values, as well as Records and
+    dataclasses, are deserialized as strings and dicts
+    """
+
+    name = CACHE_SERIALIZER_JSON
+
+    def dumps(self, value) -> bytes:
+        return json.dumps(value, separators=(",", ":"), cls=ExtendedJsonEncoder).encode(
+            "utf-8"
+        )
+
+    def loads(self, data: bytes):
+        return json.loads(data)
+
+
+class RawSerializer(CacheSerializer):
+    """
+    Raw serializer; values must be bytes-like objects or str, and are returned as bytes
+    """
+
+    name = CACHE_SERIALIZER_RAW
+
+    def dumps(self, value) -> bytes:
+        if isinstance(value, str):
+            return value.encode("utf-8")
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return bytes(value)
+        raise TypeError(
+            "RawSerializer: cannot serialize type '{}'".format(type(value).__name__)
+        )
+
+    def loads(self, data: bytes):
+        return bytes(data)
+
+
+class CompressedSerializer(CacheSerializer):
+    """
+    Compression wrapper for a serializer
+
+    Serialized values larger than threshold bytes are compressed. Each value is prefixed with a one-byte header
+    identifying the compression method, so values stored with a different threshold can still be read; values
+    stored without compression, or with another serializer, can't.
+    """
+
+    HEADER_NONE = b"\x00"
+    HEADER_ZLIB = b"\x01"
+    HEADER_LZ4 = b"\x02"
+
+    def __init__(
+        self,
+        serializer: CacheSerializer,
+        compression: str = CACHE_COMPRESSION_ZLIB,
+        threshold: int = 1024,
+        level: int = -1,
+    ):
+        """
+        Constructor
+        :param serializer: wrapped serializer
+        :param compression: compression method; one of CACHE_COMPRESSION_ZLIB, CACHE_COMPRESSION_LZ4
+        :param threshold: minimum size of serialized values to compress, in bytes
+        :param level: compression level; -1 for the default level
+        """
+        if compression == CACHE_COMPRESSION_ZLIB:
+            self.header = self.HEADER_ZLIB
+        elif compression == CACHE_COMPRESSION_LZ4:
+            if lz4_frame is None:
+                raise RuntimeError(
+                    "CompressedSerializer: lz4 compression is not available; is the lz4 package installed?"
+                )
+            self.header = self.HEADER_LZ4
+        else:
+            raise ValueError(
+                "CompressedSerializer: invalid compression method '{}'".format(
+                    compression
+                )
+            )
+        self.serializer = serializer
+        self.name = serializer.name
+        self.compression = compression
+        self.threshold = threshold
+        self.level = level
+
+    def dumps(self, value) -> bytes:
+        data = self.serializer.dumps(value)
+        if len(data) < self.threshold:
+            return self.HEADER_NONE + data
+
+        if self.header == self.HEADER_ZLIB:
+            compressed = zlib.compress(data, self.level)
+        elif self.level < 0:
+            compressed = lz4_frame.compress(data)
+        else:
+            compressed = lz4_frame.compress(data, compression_level=self.level)
+        if len(compressed) >= len(data):
+            # not compressible
+            return self.HEADER_NONE + data
+        return self.header + compressed
+
+    def loads(self, data: bytes):
+        header = data[:1]
+        data = data[1:]
+        if header == self.HEADER_ZLIB:
+            data = zlib.decompress(data)
+        elif header == self.HEADER_LZ4:
+            if lz4_frame is None:
+                raise RuntimeError(
+                    "CompressedSerializer: cannot decompress lz4 value; is the lz4 package installed?"
+                )
+            data = lz4_frame.decompress(data)
+        elif header != self.HEADER_NONE:
+            raise ValueError("CompressedSerializer: invalid value header")
+        return self.serializer.loads(data)
+
+
+CACHE_SERIALIZERS = {
+    CACHE_SERIALIZER_PICKLE: PickleSerializer,
+    CACHE_SERIALIZER_MSGPACK: MsgpackSerializer,
+    CACHE_SERIALIZER_JSON: JsonSerializer,
+    CACHE_SERIALIZER_RAW: RawSerializer,
+}
+
+
+def get_cache_serializer(
+    name: str = CACHE_SERIALIZER_PICKLE,
+    compression: Optional[str] = None,
+    threshold: int = 1024,
+) -> CacheSerializer:
+    """
+    Build a cache serializer
+    :param name: serializer name
+    :param compression: optional compression method (CACHE_COMPRESSION_ZLIB or CACHE_COMPRESSION_LZ4)
+    :param threshold: minimum size of serialized values to compress, in bytes
+    :return: CacheSerializer
+    """
+    cls = CACHE_SERIALIZERS.get(name or CACHE_SERIALIZER_PICKLE, None)
+    if cls is None:
+        raise ValueError("get_cache_serializer(): invalid serializer '{}'".format(name))
+    serializer = cls()
+    if compression:
+        serializer = CompressedSerializer(serializer, compression, threshold)
+    return serializer
@@ -0,0 +1,226 @@
+import logging
+import os
+import threading
+import uuid
+
+from rick.base import Di
+from rick.mixin import Injectable
+from rick.resource import CacheInterface
+
+from pokie.constants import CACHE_INVALIDATION_CHANNEL
+from .local import LocalCache
+from .mixin import CacheMixin
+from .redis import RedisCache
+
+logger = logging.getLogger(__name__)
+
+
+class TieredCache(CacheMixin, CacheInterface, Injectable):
+    """
+    Two-tier cache: a bounded in-process LocalCache (L1) in front of a shared RedisCache (L2)
+
+    Reads are served from L1 when possible; L1 misses are read from L2 and kept in L1 for at most the L1 TTL (and never
+    longer than the remaining L2 TTL). Writes go to both tiers, and are announced on a Redis pub/sub channel, so other
+    processes drop their L1 copy of the changed keys.
+
+    Invalidation messages are delivered asynchronously, so other processes may read a stale value for a brief
+    moment after a change; if the pub/sub connection is lost, messages may be missed, and L1 is purged when
+    reconnecting. The L1 TTL is an upper bound on staleness. L1 TTLs can be configured per key prefix; a TTL of 0
+    disables L1 for matching keys.
+    """
+
+    # seconds to wait before reconnecting the invalidation listener
+    reconnect_interval = 1.0
+
+    def __init__(
+        self,
+        di: Di,
+        l1: CacheInterface = None,
+        l2: CacheInterface = None,
+        ttl: int = 60,
+        prefix_ttl: dict = None,
+        channel: str = CACHE_INVALIDATION_CHANNEL,
+    ):
+        """
+        Constructor
+        :param di:
+        :param l1: optional L1 cache; if omitted, a LocalCache is used
+        :param l2: optional L2 cache; if omitted, a RedisCache is used
+        :param ttl: default L1 TTL, in seconds
+        :param prefix_ttl: optional L1 TTLs by key prefix, as {prefix: ttl}
+        :param channel: Redis pub/sub invalidation channel
+        """
+        super().__init__(di)
+        self.l1 = l1 if l1 is not None else LocalCache(di)
+        self.l2 = l2 if l2 is not None else RedisCache(di)
+        self.ttl = ttl
+        # longest prefixes first
+        self.prefix_ttl = sorted(
+            (prefix_ttl or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+        self.channel = channel
+        self.prefix = ""
+
+        # invalidation listener; messages from this instance are ignored
+        self._id = uuid.uuid4().hex
+        self._client = self.l2.client() if hasattr(self.l2, "client") else None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        # incremented on each received invalidation
+        self._generation = 0
+
+    def set_prefix(self, prefix):
+        self.prefix = prefix if prefix else ""
+
+    def _key(self, key):
+        return self.prefix + key if self.prefix else key
+
+    def l1_ttl(self, key) -> int:
+        """
+        Get the L1 TTL for a key
+        :param key: key, including prefix
+        :return: ttl; 0 if the key is not cached in L1
+        """
+        for prefix, ttl in self.prefix_ttl:
+            if key.startswith(prefix):
+                return ttl
+        return self.ttl
+
+    def get(self, key):
+        key = self._key(key)
+        self._listen()
+        value = self.l1.get(key)
+        if value is not None:
+            return value
+
+        l1_ttl = self.l1_ttl(key)
+        if not l1_ttl:
+            return self.l2.get(key)
+
+        generation = self._generation
+        if hasattr(self.l2, "get_with_ttl"):
+            value, remaining = self.l2.get_with_ttl(key)
+        else:
+            value, remaining = self.l2.get(key), None
+        # skip L1 if an invalidation was received meanwhile, as the value may already be stale
+        if value is not None and generation == self._generation:
+            if remaining is not None:
+                l1_ttl = min(l1_ttl, remaining)
+            self.l1.set(key, value, l1_ttl)
+        return value
+
+    def set(self, key, value, ttl=None):
+        key = self._key(key)
+        self._listen()
+        self.l2.set(key, value, ttl)
+        l1_ttl = self.l1_ttl(key)
+        if l1_ttl:
+            if ttl and ttl > 0:
+                l1_ttl = min(l1_ttl, ttl)
+            self.l1.set(key, value, l1_ttl)
+        else:
+            self.l1.remove(key)
+        self._publish("del", key)
+
+    def has(self, key):
+        key = self._key(key)
+        self._listen()
+        return self.l1.has(key) or self.l2.has(key)
+
+    def remove(self, key):
+        key = self._key(key)
+        self.l2.remove(key)
+        self.l1.remove(key)
+        self._publish("del", key)
+
+    def purge(self):
+        self.l2.purge()
+        self.l1.purge()
+        self._publish("purge")
+
+    def lock_acquire(self, key):
+        if hasattr(self.l2, "lock_acquire"):
+            return self.l2.lock_acquire(self._key(key))
+        return True
+
+    def lock_release(self, key, token):
+        if hasattr(self.l2, "lock_release"):
+            self.l2.lock_release(self._key(key), token)
+
+    def close(self):
+        """
+        Stop the invalidation listener
+        """
+        self._stop.set()
+
+    def _publish(self, op: str, key: str = ""):
+        if self._client is None:
+            return
+        try:
+            self._client.publish(
+                self.channel, "{} {} {}".format(self._id, op, key).rstrip()
+            )
+        except Exception as e:
+            # other processes will pick up the change when their L1 entry expires
+            logger.warning("TieredCache: cannot publish invalidation: %s", e)
+
+    def _listen(self):
+        """
+        Start the invalidation listener in the current process, if not started yet
+        The listener is started on first use instead of on creation, so it runs in forked WSGI workers
+        """
+        if self._client is None or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # forked process; L1 entries were not kept up to date while the listener was not running
+                self.l1.purge()
+            self._pid = os.getpid()
+            self._ready.clear()
+            threading.Thread(
+                target=self._run, name="pokie-cache-invalidation", daemon=True
+            ).start()
+        # wait for the subscription, so changes made by other processes from now on are received
+        self._ready.wait(self.reconnect_interval)
+
+    def _run(self):
+        pid = self._pid
+        while not self._stop.is_set() and pid == os.getpid():
+            pubsub = None
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self._ready.set()
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=self.reconnect_interval)
+                    if message is not None:
+                        self._invalidate(message["data"])
+            except Exception as e:
+                logger.warning("TieredCache: invalidation listener error: %s", e)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+            # invalidation messages may have been lost
+            self._generation += 1
+            self.l1.purge()
+            self._stop.wait(self.reconnect_interval)
+
+    def _invalidate(self, data):
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        parts = str(data).split(" ", 2)
+        if len(parts) < 2 or parts[0] == self._id:
+            return
+        self._generation += 1
+        if parts[1] == "del" and len(parts) == 3:
+            self.l1.remove(parts[2])
+        elif parts[1] == "purge":
+            self.l1.purge()
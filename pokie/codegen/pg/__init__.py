@@ -1 +1,2 @@
 from .spec import PgTableSpec
+from .cache import PgTableSpecCache
@@ -0,0 +1,123 @@
+from contextlib import contextmanager
+from typing import Optional, Union
+
+from rick.resource import CacheInterface
+from rick_db.backend.pg import PgConnection, PgConnectionPool
+
+from pokie import __version__
+from pokie.codegen.spec import TableSpec
+
+
+class PgTableSpecCache:
+    """
+    Persistent TableSpec cache
+
+    Entries are keyed by a schema fingerprint computed from the system catalogs (pg_class, pg_attribute, pg_attrdef
+    and pg_constraint row versions); any DDL change on the schema generates a new fingerprint, and previously cached
+    specs are ignored. The fingerprint is computed once per schema and cache object; the pokie version and an optional
+    version string (e.g. a migration hash) are also part of the key, so upgrades do not read specs stored by older
+    releases.
+
+    Entries are stored in a CacheInterface backend, such as FileCache or RedisCache.
+    """
+
+    key_prefix = "pokie:tablespec"
+
+    fingerprint_sql = """
+        SELECT md5(coalesce(string_agg(f.item, ',' ORDER BY f.item), '')) AS fingerprint FROM (
+            SELECT 'c' || c.oid::text || ':' || c.xmin::text AS item
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %(schema)s
+            UNION ALL
+            SELECT 'a' || a.attrelid::text || ':' || a.attnum::text || ':' || a.xmin::text
+            FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %(schema)s AND a.attnum > 0
+            UNION ALL
+            SELECT 'd' || d.oid::text || ':' || d.xmin::text
+            FROM pg_attrdef d JOIN pg_class c ON c.oid = d.adrelid JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %(schema)s
+            UNION ALL
+            SELECT 'k' || o.oid::text || ':' || o.xmin::text
+            FROM pg_constraint o JOIN pg_namespace n ON n.oid = o.connamespace
+            WHERE n.nspname = %(schema)s
+        ) f
+    """
+
+    def __init__(
+        self,
+        conn: Union[PgConnection, PgConnectionPool],
+        backend: CacheInterface,
+        version: str = "",
+        ttl: int = None,
+    ):
+        """
+        :param conn: database connection or pool
+        :param backend: cache backend used to store the specs
+        :param version: optional string to include in the cache key
+        :param ttl: optional TTL for cached entries
+        """
+        self.db = conn
+        self.backend = backend
+        self.version = version if version else ""
+        self.ttl = ttl
+        self._fingerprints = {}
+
+    @contextmanager
+    def conn(self):
+        if isinstance(self.db, PgConnectionPool):
+            try:
+                conn = self.db.getconn()
+                yield conn
+            finally:
+                self.db.putconn(conn)
+        else:
+            yield self.db
+
+    def fingerprint(self, schema: str) -> str:
+        """
+        Compute (or retrieve the memoized) schema fingerprint
+        :param schema:
+        :return: str
+        """
+        if schema not in self._fingerprints.keys():
+            with self.conn() as conn:
+                with conn.cursor() as c:
+                    record = c.fetchone(self.fingerprint_sql, {"schema": schema})
+                    self._fingerprints[schema] = record["fingerprint"]
+        return self._fingerprints[schema]
+
+    def reset(self):
+        """
+        Discard memoized fingerprints; they are recomputed on the next lookup
+        """
+        self._fingerprints = {}
+
+    def key(self, table: str, schema: str) -> str:
+        return "{}:{}:{}:{}:{}.{}".format(
+            self.key_prefix,
+            __version__,
+            self.version,
+            self.fingerprint(schema),
+            schema,
+            table,
+        )
+
+    def get(self, table: str, schema: str) -> Optional[TableSpec]:
+        """
+        Retrieve a cached spec
+        :param table:
+        :param schema:
+        :return: TableSpec or None
+        """
+        spec = self.backend.get(self.key(table, schema))
+        if isinstance(spec, TableSpec):
+            return spec
+        return None
+
+    def set(self, spec: TableSpec):
+        """
+        Store a spec
+        :param spec:
+        :return:
+        """
+        self.backend.set(self.key(spec.table, spec.schema), spec, self.ttl)
@@ -1,15 +1,80 @@
 from contextlib import contextmanager
-from typing import Optional, Union
+from typing import Optional, Union, List, Dict
 
-from rick_db.backend.pg import PgConnection, PgConnectionPool, ColumnRecord
+from rick_db.backend.pg import (
+    PgConnection,
+    PgConnectionPool,
+    ColumnRecord,
+    ForeignKeyRecord,
+)
 from rick_db.backend.pg.pginfo import PgInfo
 
 from pokie.codegen.spec import TableSpec, FieldSpec
+from .cache import PgTableSpecCache
 
 
 class PgTableSpec:
-    def __init__(self, conn: Union[PgConnection, PgConnectionPool]):
+    # bulk introspection queries used by generate_many(); %(tables)s is either NULL (all tables) or a list of names
+    bulk_columns_sql = """
+        SELECT * FROM information_schema.columns
+        WHERE table_schema = %(schema)s AND (%(tables)s::text[] IS NULL OR table_name = ANY(%(tables)s::text[]))
+        ORDER BY table_name, ordinal_position
+    """
+
+    bulk_pk_sql = """
+        SELECT pg_class.relname AS table_name, pg_attribute.attname AS field
+        FROM pg_index, pg_class, pg_attribute, pg_namespace
+        WHERE
+          indisprimary AND
+          indrelid = pg_class.oid AND
+          nspname = %(schema)s AND
+          pg_class.relnamespace = pg_namespace.oid AND
+          pg_attribute.attrelid = pg_class.oid AND
+          pg_attribute.attnum = any(pg_index.indkey) AND
+          (%(tables)s::text[] IS NULL OR pg_class.relname = ANY(%(tables)s::text[]))
+        ORDER BY pg_class.relname, pg_attribute.attnum
+    """
+
+    bulk_fk_sql = """
+        SELECT sh.nspname AS table_schema,
+          tbl.relname AS table_name,
+          col.attname AS column_name,
+          referenced_sh.nspname AS foreign_table_schema,
+          referenced_tbl.relname AS foreign_table_name,
+          referenced_field.attname AS foreign_column_name
+        FROM pg_constraint c
+            INNER JOIN pg_namespace AS sh ON sh.oid = c.connamespace
+            INNER JOIN (SELECT oid, unnest(conkey) as conkey FROM pg_constraint) con ON c.oid = con.oid
+            INNER JOIN pg_class tbl ON tbl.oid = c.conrelid
+            INNER JOIN pg_attribute col ON (col.attrelid = tbl.oid AND col.attnum = con.conkey)
+            INNER JOIN pg_class referenced_tbl ON c.confrelid = referenced_tbl.oid
+            INNER JOIN pg_namespace AS referenced_sh ON referenced_sh.oid = referenced_tbl.relnamespace
+            INNER JOIN (SELECT oid, unnest(confkey) as confkey FROM pg_constraint) conf ON c.oid = conf.oid
+            INNER JOIN pg_attribute referenced_field ON
+                (referenced_field.attrelid = c.confrelid AND referenced_field.attnum = conf.confkey)
+        WHERE c.contype = 'f' AND sh.nspname = %(schema)s
+            AND (%(tables)s::text[] IS NULL OR tbl.relname = ANY(%(tables)s::text[]))
+    """
+
+    # sequences owned by table columns; deptype 'a' is a serial column, 'i' is an identity column
+    bulk_sequences_sql = """
+        SELECT t.relname AS table_name, a.attname AS column_name, t.relkind AS relkind, d.deptype AS deptype
+        FROM pg_depend d
+            JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S'
+            JOIN pg_class t ON t.oid = d.refobjid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+        WHERE d.deptype IN ('a', 'i') AND n.nspname = %(schema)s
+            AND (%(tables)s::text[] IS NULL OR t.relname = ANY(%(tables)s::text[]))
+    """
+
+    def __init__(
+        self,
+        conn: Union[PgConnection, PgConnectionPool],
+        cache: PgTableSpecCache = None,
+    ):
         self.db = conn
+        self.cache = cache
         self.mgr = PgInfo(conn)
         self._tables = {}
         self._indexes = {}
@@ -70,9 +135,23 @@ class PgTableSpec:
             "cardinal": f.numeric_precision_cardinal,
         }
 
+    def cached(self, table, schema: str = None) -> Optional[TableSpec]:
+        """
+        Fetch a table spec from the cache, if available
+        :param table:
+        :param schema:
+        :return: TableSpec object or None
+        """
+        if self.cache is None:
+            return None
+        if schema is None:
+            schema = PgInfo.SCHEMA_DEFAULT
+        return self.cache.get(table, schema)
+
     def generate(self, table, schema: str = None) -> TableSpec:
         """
         Generate a table spec for the given table
+        If a cache is available, the cached spec is used, and newly generated specs are stored
         :param table:
         :param schema:
         :return: TableSpec object
@@ -80,12 +159,131 @@ class PgTableSpec:
         if schema is None:
             schema = PgInfo.SCHEMA_DEFAULT
 
+        spec = self.cached(table, schema)
+        if spec is not None:
+            return spec
+
         pk = self.get_pk(table, schema)
         fks = self.get_fk(table, schema)
         fields = self.get_fields(table, schema)
         serials = []
         for record in self.mgr.list_table_sequences(table, schema):
             serials.append(record.column)
+
+        spec = self._build_spec(
+            table,
+            schema,
+            pk,
+            fields,
+            fks,
+            serials,
+            lambda column: self.is_serial(table, column, schema),
+        )
+        if self.cache is not None:
+            self.cache.set(spec)
+        return spec
+
+    def generate_many(
+        self, tables: List[str] = None, schema: str = None
+    ) -> Dict[str, TableSpec]:
+        """
+        Generate table specs for a list of tables, using a fixed number of catalog queries
+        If tables is None, specs are generated for all tables and views in the schema
+        If a cache is available, the cached specs are used, and newly generated specs are stored
+        :param tables: optional list of table names; a ValueError is raised if any of them does not exist
+        :param schema:
+        :return: dict of {table_name: TableSpec}, in the order of the tables list
+        """
+        if schema is None:
+            schema = PgInfo.SCHEMA_DEFAULT
+
+        result = {}
+        missing = None
+        if tables is not None:
+            missing = []
+            for table in tables:
+                spec = self.cached(table, schema)
+                result[table] = spec
+                if spec is None:
+                    missing.append(table)
+            if len(missing) == 0:
+                return result
+
+        params = {"schema": schema, "tables": missing}
+        columns = {}
+        pks = {}
+        fks = {}
+        serials = {}
+        owned = {}
+        with self.conn() as conn:
+            with conn.cursor() as c:
+                for r in c.fetchall(self.bulk_columns_sql, params, cls=ColumnRecord):
+                    columns.setdefault(r.table_name, {})[r.column] = r
+                for r in c.fetchall(self.bulk_pk_sql, params):
+                    # first primary key column, as in get_pk()
+                    pks.setdefault(r["table_name"], r["field"])
+                for r in c.fetchall(self.bulk_fk_sql, params, cls=ForeignKeyRecord):
+                    fks.setdefault(r.table, {})[r.column] = r
+                for r in c.fetchall(self.bulk_sequences_sql, params):
+                    owned.setdefault(r["table_name"], set()).add(r["column_name"])
+                    if r["deptype"] == "a" and r["relkind"] == "r":
+                        serials.setdefault(r["table_name"], []).append(r["column_name"])
+
+        if missing is None:
+            missing = sorted(columns.keys())
+        else:
+            for table in missing:
+                # tables without columns are not in the column list
+                if table not in columns.keys() and not self._exists(table, schema):
+                    raise ValueError(
+                        "generate_many(): table name '{}' not found in schema '{}'".format(
+                            table, schema
+                        )
+                    )
+
+        for table in missing:
+            table_owned = owned.get(table, set())
+            spec = self._build_spec(
+                table,
+                schema,
+                pks.get(table, None),
+                columns.get(table, {}),
+                fks.get(table, {}),
+                serials.get(table, []),
+                lambda column: column in table_owned,
+            )
+            if self.cache is not None:
+                self.cache.set(spec)
+            result[table] = spec
+
+        return result
+
+    def _exists(self, table: str, schema: str) -> bool:
+        return self.mgr.table_exists(table, schema=schema) or self.mgr.table_exists(
+            table, PgInfo.TYPE_VIEW, schema
+        )
+
+    def _build_spec(
+        self,
+        table: str,
+        schema: str,
+        pk: Optional[str],
+        fields: dict,
+        fks: dict,
+        serials: list,
+        is_serial: callable,
+    ) -> TableSpec:
+        """
+        Assemble a TableSpec from introspection results
+        :param table:
+        :param schema:
+        :param pk: primary key column name, if any
+        :param fields: dict of {column_name: ColumnRecord}, in column order
+        :param fks: dict of {column_name: ForeignKeyRecord}
+        :param serials: list of columns with an owned serial sequence
+        :param is_serial: callable that checks if a column has an owned sequence (serial or identity)
+        :return: TableSpec object
+        """
         identity = None
         pk_auto = False
 
@@ -110,7 +308,7 @@ class PgTableSpec:
 
             if not pk_auto:
                 # pk_auto is true if pk is serial or if pk is an identity column
-                pk_auto = self.is_serial(table, pk, schema) or str(pk) == str(identity)
+                pk_auto = is_serial(pk) or str(pk) == str(identity)
 
         spec = TableSpec(table=table, schema=schema, pk=pk, fields=[])
         for name, f in fields.items():
@@ -5,6 +5,42 @@ class PokieConfig:
     # default HTTP Exception Handler - 404 and 500 exceptions
     HTTP_ERROR_HANDLER = "pokie.http.HttpErrorHandler"
 
+    # JSON serialization backend for responses: "json", "orjson" or "auto" (orjson if installed); orjson output
+    # differs from json for some float, NaN and Enum values
+    JSON_BACKEND = "json"
+
+    # Response compression: comma-separated encodings, in order of preference ("gzip", "br", "zstd"); empty = disabled
+    RESPONSE_COMPRESSION = ""
+    RESPONSE_COMPRESSION_THRESHOLD = 1024  # minimum response size to compress, in bytes
+
+    # Job runner: worker pool size (0 = run jobs sequentially) and pool type, "thread" or "process"
+    JOB_WORKERS = 0
+    JOB_EXECUTOR = "thread"
+    # Job timeout mode: "thread" (cancellation token, thread is abandoned) or "process" (subprocess, killed)
+    JOB_TIMEOUT_MODE = "thread"
+    # Job coordination between job:run nodes (see JobCoordinatorFactory): "" (disabled), "pgsql" or "redis"
+    JOB_COORDINATOR = ""
+    JOB_NODE_ID = ""  # node identifier for leases; empty = hostname:pid
+    JOB_SHARDS = 1  # number of job shards; each node runs the jobs of its shard
+    JOB_SHARD_INDEX = 0  # shard of this node, from 0 to JOB_SHARDS - 1
+    # Job metrics dumps, written by job:run: JSON (read by job:stats) and Prometheus text; empty = disabled
+    JOB_STATS_FILE = ""
+    JOB_METRICS_FILE = ""
+    JOB_STATS_INTERVAL = 15  # seconds between dumps
+
+    # Task queue (see TaskQueueFactory and job:worker)
+    TASK_QUEUE_BACKEND = "pgsql"  # "pgsql" or "redis"
+    TASK_WORKERS = 4  # tasks processed concurrently by each job:worker
+    TASK_BATCH_SIZE = 10  # max tasks claimed per query
+    TASK_VISIBILITY_TIMEOUT = 300  # seconds before an unfinished task is redelivered
+    TASK_MAX_ATTEMPTS = 5  # default attempts before a task is marked as failed
+    TASK_POLL_INTERVAL = 1  # seconds between queue polls when idle
+
+    # Event dispatch: default mode of event handlers, "sync", "async" (thread pool) or "task" (task queue)
+    EVENT_DISPATCH = "sync"
+    EVENT_WORKERS = 2  # async dispatch thread pool size
+    EVENT_MAX_PENDING = 10000  # max queued async dispatches; then handlers run inline
+
     # Secret key for flask-login hashing
     AUTH_SECRET = ""
 
@@ -22,6 +58,10 @@ class PokieConfig:
     DB_MINPROCS = 5
     DB_MAXPROCS = 15
 
+    # persistent TableSpec cache used by Auto.view()/Auto.rest() (see TableSpecCacheFactory)
+    DB_SPEC_CACHE_PATH = ""  # empty = per-user directory in the system temp dir
+    DB_SPEC_CACHE_VERSION = ""  # optional extra cache key, e.g. a migration hash
+
     # Redis Configuration
     REDIS_HOST = "localhost"
     REDIS_PORT = 6379
@@ -29,6 +69,21 @@ class PokieConfig:
     REDIS_DB = 0
     REDIS_SSL = True
 
+    # Cache Configuration (see CacheFactory)
+    # "redis", "local", "tiered" (in-process L1 in front of Redis) or "null"
+    CACHE_BACKEND = "redis"
+    CACHE_SERIALIZER = "pickle"  # "pickle", "msgpack", "json" or "raw"
+    CACHE_COMPRESSION = ""  # empty = disabled, "zlib" or "lz4"
+    CACHE_COMPRESSION_THRESHOLD = 1024  # minimum serialized size to compress, in bytes
+    CACHE_LOCAL_MAX_ENTRIES = 10000  # local/tiered: max in-process entries
+    CACHE_LOCAL_MAX_BYTES = 0  # local/tiered: max in-process bytes; 0 = unbounded
+    CACHE_LOCAL_POLICY = "lru"  # local/tiered: eviction policy, "lru" or "tinylfu"
+    CACHE_L1_TTL = 60  # tiered: default L1 TTL, in seconds
+    # tiered: L1 TTL by key prefix, e.g. {"settings:": 300, "session:": 0}
+    CACHE_L1_PREFIX_TTL = {}
+    # tiered: pub/sub invalidation channel
+    CACHE_INVALIDATION_CHANNEL = "pokie:cache:invalidate"
+
     # Pytest Configuration
     TEST_DB_NAME = "pokie_test"  # test database parameters
     TEST_DB_HOST = "localhost"
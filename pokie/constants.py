@@ -8,6 +8,7 @@ def get_version():
 
 # Http Codes
 HTTP_OK = 200
+HTTP_NOT_MODIFIED = 304
 HTTP_BADREQ = 400
 HTTP_NOAUTH = 401
 HTTP_FORBIDDEN = 403
@@ -28,10 +29,45 @@ DI_EVENTS = "event_manager"  # event manager
 DI_TTY = "tty"  # console writer
 DI_SIGNAL = "signal"  # signal manager
 DI_HTTP_ERROR_HANDLER = "http_error_handler"  # http exception manager
+DI_TABLESPEC_CACHE = "tablespec_cache"  # persistent TableSpec cache
+DI_JOB_COORDINATOR = "job_coordinator"  # job runner coordinator
+DI_TASK_QUEUE = "task_queue"  # persistent task queue (see TaskQueueFactory)
 
 # Flask error Handler configuration
 CFG_HTTP_ERROR_HANDLER = "http_error_handler"
 
+# JSON serialization backend for responses
+CFG_JSON_BACKEND = "json_backend"
+
+# Response compression
+CFG_RESPONSE_COMPRESSION = "response_compression"
+CFG_RESPONSE_COMPRESSION_THRESHOLD = "response_compression_threshold"
+
+# Job runner configuration
+CFG_JOB_WORKERS = "job_workers"
+CFG_JOB_EXECUTOR = "job_executor"
+CFG_JOB_TIMEOUT_MODE = "job_timeout_mode"
+CFG_JOB_COORDINATOR = "job_coordinator"
+CFG_JOB_NODE_ID = "job_node_id"
+CFG_JOB_SHARDS = "job_shards"
+CFG_JOB_SHARD_INDEX = "job_shard_index"
+CFG_JOB_STATS_FILE = "job_stats_file"
+CFG_JOB_METRICS_FILE = "job_metrics_file"
+CFG_JOB_STATS_INTERVAL = "job_stats_interval"
+
+# Task queue configuration
+CFG_TASK_QUEUE_BACKEND = "task_queue_backend"
+CFG_TASK_WORKERS = "task_workers"
+CFG_TASK_BATCH_SIZE = "task_batch_size"
+CFG_TASK_VISIBILITY_TIMEOUT = "task_visibility_timeout"
+CFG_TASK_MAX_ATTEMPTS = "task_max_attempts"
+CFG_TASK_POLL_INTERVAL = "task_poll_interval"
+
+# Event dispatch configuration
+CFG_EVENT_DISPATCH = "event_dispatch"
+CFG_EVENT_WORKERS = "event_workers"
+CFG_EVENT_MAX_PENDING = "event_max_pending"
+
 # DB Configuration
 CFG_DB_NAME = "db_name"
 CFG_DB_HOST = "db_host"
@@ -41,6 +77,8 @@ CFG_DB_PASSWORD = "db_password"
 CFG_DB_SSL = "db_ssl"
 CFG_DB_MINPROCS = "db_minprocs"
 CFG_DB_MAXPROCS = "db_maxprocs"
+CFG_DB_SPEC_CACHE_PATH = "db_spec_cache_path"
+CFG_DB_SPEC_CACHE_VERSION = "db_spec_cache_version"
 
 # Redis Configuration
 CFG_REDIS_HOST = "redis_host"
@@ -49,6 +87,18 @@ CFG_REDIS_PASSWORD = "redis_password"
 CFG_REDIS_DB = "redis_db"
 CFG_REDIS_SSL = "redis_ssl"
 
+# Cache Configuration
+CFG_CACHE_BACKEND = "cache_backend"
+CFG_CACHE_SERIALIZER = "cache_serializer"
+CFG_CACHE_COMPRESSION = "cache_compression"
+CFG_CACHE_COMPRESSION_THRESHOLD = "cache_compression_threshold"
+CFG_CACHE_LOCAL_MAX_ENTRIES = "cache_local_max_entries"
+CFG_CACHE_LOCAL_MAX_BYTES = "cache_local_max_bytes"
+CFG_CACHE_LOCAL_POLICY = "cache_local_policy"
+CFG_CACHE_L1_TTL = "cache_l1_ttl"
+CFG_CACHE_L1_PREFIX_TTL = "cache_l1_prefix_ttl"
+CFG_CACHE_INVALIDATION_CHANNEL = "cache_invalidation_channel"
+
 # Auth Configuration
 CFG_AUTH_SECRET = "auth_secret"
 
@@ -59,6 +109,83 @@ DEFAULT_LIST_SIZE = 100
 # maximum list size for DBGrid Operations (upper bound for client-supplied limit)
 MAX_LIST_SIZE = 1000
 
+# total count modes for DBGrid Operations
+LIST_COUNT_EXACT = "exact"  # COUNT(*) over the filtered query
+LIST_COUNT_ESTIMATE = "estimate"  # planner row estimate
+LIST_COUNT_NONE = "none"  # no total count
+LIST_COUNT_MODES = [LIST_COUNT_EXACT, LIST_COUNT_ESTIMATE, LIST_COUNT_NONE]
+
+# export (streaming listing) formats and default server-side cursor batch size
+EXPORT_FORMAT_NDJSON = "ndjson"
+EXPORT_FORMAT_JSON = "json"
+EXPORT_FORMATS = [EXPORT_FORMAT_NDJSON, EXPORT_FORMAT_JSON]
+EXPORT_BATCH_SIZE = 1000
+
+# JSON serialization backends
+JSON_BACKEND_AUTO = "auto"  # fastest available backend
+JSON_BACKEND_STDLIB = "json"  # python json module
+JSON_BACKEND_ORJSON = "orjson"  # orjson, if installed
+
+# response compression encodings
+RESPONSE_ENCODING_GZIP = "gzip"
+RESPONSE_ENCODING_BROTLI = "br"  # requires the brotli package
+RESPONSE_ENCODING_ZSTD = "zstd"  # requires the zstandard package
+
+# job runner worker pool types
+JOB_EXECUTOR_THREAD = "thread"
+JOB_EXECUTOR_PROCESS = "process"  # forked worker processes; requires fork
+
+# job timeout modes
+JOB_TIMEOUT_THREAD = "thread"  # timed out runs are cancelled and abandoned
+JOB_TIMEOUT_PROCESS = "process"  # each run is a forked subprocess, killed on timeout
+
+# job coordinator backends
+JOB_COORDINATOR_PGSQL = "pgsql"  # advisory locks; requires PgSqlFactory
+JOB_COORDINATOR_REDIS = "redis"  # expiring keys; requires RedisFactory
+JOB_LEASE_PREFIX = "pokie:job:"
+
+# task queue backends
+# task_queue table, claimed with FOR UPDATE SKIP LOCKED; requires PgSqlFactory
+TASK_QUEUE_PGSQL = "pgsql"
+TASK_QUEUE_REDIS = "redis"  # Redis streams; requires RedisFactory
+TASK_QUEUE_DEFAULT = "default"  # default queue name
+TASK_QUEUE_PREFIX = "pokie:task:"  # Redis key prefix
+
+# event dispatch modes
+EVENT_DISPATCH_SYNC = "sync"  # handlers run in the dispatching thread
+EVENT_DISPATCH_ASYNC = "async"  # handlers run on a background thread pool
+EVENT_DISPATCH_TASK = "task"  # handlers are enqueued as tasks, run by job:worker
+EVENT_TASK_NAME = "pokie.event"  # task name of task-dispatched event handlers
+
+# cache backends
+CACHE_BACKEND_REDIS = "redis"  # RedisCache
+CACHE_BACKEND_LOCAL = "local"  # LocalCache
+CACHE_BACKEND_TIERED = "tiered"  # LocalCache in front of RedisCache
+CACHE_BACKEND_NULL = "null"  # DummyCache
+CACHE_INVALIDATION_CHANNEL = "pokie:cache:invalidate"  # TieredCache pub/sub channel
+
+# cache value serializers
+CACHE_SERIALIZER_PICKLE = "pickle"
+CACHE_SERIALIZER_MSGPACK = "msgpack"
+CACHE_SERIALIZER_JSON = "json"
+CACHE_SERIALIZER_RAW = "raw"
+
+# cache value compression methods
+CACHE_COMPRESSION_ZLIB = "zlib"
+CACHE_COMPRESSION_LZ4 = "lz4"  # requires the lz4 package
+
+# LocalCache eviction policies
+CACHE_POLICY_LRU = "lru"  # least recently used
+CACHE_POLICY_TINYLFU = "tinylfu"  # LRU with frequency-based admission
+CACHE_POLICIES = [CACHE_POLICY_LRU, CACHE_POLICY_TINYLFU]
+
+# response cache
+RESPONSE_CACHE_PREFIX = "pokie:response:"  # cached response key prefix
+RESPONSE_CACHE_TAG_PREFIX = "pokie:response:tag:"  # tag version key prefix
+RESPONSE_CACHE_SCOPE_USER = "user"  # responses are cached per user
+RESPONSE_CACHE_SCOPE_ACL = "acl"  # responses are shared by users allowed in the view
+RESPONSE_CACHE_SCOPES = [RESPONSE_CACHE_SCOPE_USER, RESPONSE_CACHE_SCOPE_ACL]
+
 
 # unit testing constants
 POKIE_NAMESPACE = "POKIE_NAMESPACE"
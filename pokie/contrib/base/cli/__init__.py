@@ -1,6 +1,6 @@
 from .base import ListCmd, HelpCmd, RunServerCmd, VersionCmd
 from .db import DbInitCmd, DbCheckCmd, DbUpdateCmd
-from .job import JobRunCmd, JobListCmd
+from .job import JobRunCmd, JobListCmd, JobWorkerCmd, JobStatsCmd
 from .db_codegen import GenDtoCmd, GenRequestRecordCmd
 from .tpl_codegen import ModuleGenCmd, AppGenCmd
 from .fixture import RunFixtureCmd, CheckFixtureCmd
@@ -61,13 +61,14 @@ class DbCodeGenCommand(CliCommand):
         gen = RecordGenerator()
         first = True
         result = []
+        specs = pg.generate_many(table_list, schema)
         for name in table_list:
             self.tty.write(
                 self.tty.colorizer.white(
                     "generating dto for {}.{}...".format(schema, name), attr="bold"
                 )
             )
-            spec = pg.generate(name, schema)
+            spec = specs[name]
             result.append(
                 gen.generate_source(spec, camelcase=camel_case, imports=first)
             )
@@ -94,6 +95,7 @@ class DbCodeGenCommand(CliCommand):
         gen = RequestGenerator()
         first = True
         result = []
+        specs = pg.generate_many(table_list, schema)
         for name in table_list:
             self.tty.write(
                 self.tty.colorizer.white(
@@ -101,7 +103,7 @@ class DbCodeGenCommand(CliCommand):
                     attr="bold",
                 )
             )
-            spec = pg.generate(name, schema)
+            spec = specs[name]
             result.append(
                 gen.generate_source(
                     spec,
@@ -1,5 +1,12 @@
-from pokie.constants import DI_APP
+import os
+import time
+from argparse import ArgumentParser
+
+from tabulate import tabulate
+
+from pokie.constants import DI_APP, DI_CONFIG, CFG_JOB_STATS_FILE, TASK_QUEUE_DEFAULT
 from pokie.contrib.base.cli.base import BaseCommand
+from pokie.core.job_metrics import Histogram, prometheus_text, read_stats
 
 
 class JobListCmd(BaseCommand):
@@ -24,3 +31,131 @@ class JobRunCmd(BaseCommand):
         # run in loop
         app.job_runner()
         return True
+
+
+class JobWorkerCmd(BaseCommand):
+    description = "consume tasks from the task queue"
+
+    def arguments(self, parser: ArgumentParser):
+        parser.add_argument(
+            "--queue",
+            help="Queue to consume (default: {})".format(TASK_QUEUE_DEFAULT),
+            required=False,
+            default=TASK_QUEUE_DEFAULT,
+        )
+        parser.add_argument(
+            "--concurrency",
+            help="Number of tasks processed concurrently (default: TASK_WORKERS)",
+            type=int,
+            required=False,
+            default=None,
+        )
+        parser.add_argument(
+            "--batch",
+            help="Max tasks claimed per round trip (default: TASK_BATCH_SIZE)",
+            type=int,
+            required=False,
+            default=None,
+        )
+
+    def run(self, args) -> bool:
+        app = self.get_di().get(DI_APP)
+        # run until interrupted
+        app.task_worker(
+            queue_name=args.queue, concurrency=args.concurrency, batch_size=args.batch
+        )
+        return True
+
+
+class JobStatsCmd(BaseCommand):
+    description = "show job runner metrics"
+
+    # sort keys; jobs are listed in descending order
+    sort_keys = {
+        "time": lambda item: item["duration"]["sum"],
+        "duration": lambda item: item["duration"]["max"],
+        "lag": lambda item: item["lag"]["max"],
+        "runs": lambda item: item["runs"],
+        "failures": lambda item: item["failures"],
+    }
+
+    def arguments(self, parser: ArgumentParser):
+        parser.add_argument(
+            "--file",
+            help="Metrics file written by job:run (default: JOB_STATS_FILE)",
+            required=False,
+            default=None,
+        )
+        parser.add_argument(
+            "--sort",
+            help="Sort order: time (total run time), duration (max), lag (max), runs or failures (default: time)",
+            choices=list(self.sort_keys.keys()),
+            required=False,
+            default="time",
+        )
+        parser.add_argument(
+            "--prometheus",
+            help="Output metrics in the Prometheus text format",
+            action="store_true",
+            default=False,
+        )
+
+    def run(self, args) -> bool:
+        path = args.file or self.get_di().get(DI_CONFIG).get(CFG_JOB_STATS_FILE, "")
+        if not path:
+            self.tty.error("Error: no metrics file; set JOB_STATS_FILE or use --file")
+            return False
+        if not os.path.exists(path):
+            self.tty.error(
+                "Error: metrics file '{}' not found; is job:run running?".format(path)
+            )
+            return False
+
+        snapshot = read_stats(path)
+        jobs = sorted(snapshot["jobs"], key=self.sort_keys[args.sort], reverse=True)
+        if args.prometheus:
+            self.tty.write(prometheus_text(jobs), eol=False)
+            return True
+
+        rows = []
+        for item in jobs:
+            duration = Histogram.from_dict(item["duration"])
+            lag = Histogram.from_dict(item["lag"])
+            rows.append(
+                [
+                    item["name"],
+                    item["runs"],
+                    item["failures"],
+                    "{:.2f}".format(item["throughput"]),
+                    "{:.3f}".format(duration.mean),
+                    "{:.3f}".format(duration.quantile(0.95)),
+                    "{:.3f}".format(duration.max),
+                    "{:.3f}".format(lag.mean),
+                    "{:.3f}".format(lag.max),
+                    item["last_error"] or "",
+                ]
+            )
+
+        self.tty.write(
+            "Job metrics from {} ({:.0f}s ago):".format(
+                path, time.time() - snapshot["generated_at"]
+            )
+        )
+        self.tty.write(
+            tabulate(
+                rows,
+                headers=[
+                    "Job",
+                    "Runs",
+                    "Failures",
+                    "Runs/min",
+                    "Avg (s)",
+                    "p95 (s)",
+                    "Max (s)",
+                    "Avg lag (s)",
+                    "Max lag (s)",
+                    "Last error",
+                ],
+            )
+        )
+        return True
@@ -1,13 +1,13 @@
-from time import sleep
-
 from rick.base import Di
 from rick.mixin import Injectable, Runnable
 
 from pokie.constants import DI_CONFIG
+from pokie.core.job_runner import current_token
 
 
 class IdleJob(Injectable, Runnable):
     DEFAULT_IDLE_INTERVAL = 15  # 15s between runs
+    job_distributed = False  # paces the local job loop; runs on every node
 
     def __init__(self, di: Di):
         super().__init__(di)
@@ -15,4 +15,5 @@ class IdleJob(Injectable, Runnable):
         self.interval = int(cfg.get("job_idle_interval", self.DEFAULT_IDLE_INTERVAL))
 
     def run(self, di: Di):
-        sleep(self.interval)
+        # returns early if the run is cancelled
+        current_token().wait(self.interval)
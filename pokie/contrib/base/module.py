@@ -1,3 +1,4 @@
+from pokie.constants import EVENT_TASK_NAME
 from pokie.contrib.base.constants import SVC_VALIDATOR, SVC_SETTINGS, SVC_FIXTURE
 from pokie.contrib.base.validators import init_validators
 from pokie.core import BaseModule
@@ -22,6 +23,8 @@ class Module(BaseModule):
         # worker job commands
         "job:list": "pokie.contrib.base.cli.JobListCmd",
         "job:run": "pokie.contrib.base.cli.JobRunCmd",
+        "job:worker": "pokie.contrib.base.cli.JobWorkerCmd",
+        "job:stats": "pokie.contrib.base.cli.JobStatsCmd",
         # code generation
         "codegen:dto": "pokie.contrib.base.cli.GenDtoCmd",
         "codegen:request": "pokie.contrib.base.cli.GenRequestRecordCmd",
@@ -49,6 +52,11 @@ class Module(BaseModule):
         "pokie.contrib.base.job.IdleJob",
     ]
 
+    tasks = {
+        # event handlers dispatched in "task" mode
+        EVENT_TASK_NAME: "pokie.contrib.base.task.EventTask",
+    }
+
     fixtures = []
 
     def build(self, parent=None):
@@ -0,0 +1,14 @@
+CREATE TABLE task_queue (
+    id_task_queue BIGSERIAL   NOT NULL PRIMARY KEY,
+    queue         TEXT        NOT NULL,
+    name          TEXT        NOT NULL,
+    payload       JSONB       NOT NULL DEFAULT '{}',
+    status        TEXT        NOT NULL DEFAULT 'pending',
+    attempts      INT         NOT NULL DEFAULT 0,
+    max_attempts  INT         NOT NULL,
+    available_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    receipt       TEXT,
+    last_error    TEXT,
+    created_at    TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX task_queue_available_idx ON task_queue (queue, available_at) WHERE status = 'pending';
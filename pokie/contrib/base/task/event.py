@@ -0,0 +1,14 @@
+from pokie.constants import DI_EVENTS
+from pokie.queue import TaskHandler
+
+
+class EventTask(TaskHandler):
+    """
+    Runs event handlers dispatched in "task" mode
+    """
+
+    def run(self, payload: dict):
+        di = self.get_di()
+        di.get(DI_EVENTS).run_handler(
+            di, payload["handler"], payload["event"], payload["kwargs"]
+        )
@@ -6,7 +6,6 @@ from typing import List
 
 from flask import Flask
 from rick.base import Di, Container, MapLoader
-from rick.event import EventManager
 from rick.mixin import Injectable, Runnable
 from rick.util.loader import load_class
 from rick.resource.console import ConsoleWriter
@@ -21,13 +20,44 @@ from pokie.constants import (
     DI_SIGNAL,
     CFG_HTTP_ERROR_HANDLER,
     DI_HTTP_ERROR_HANDLER,
+    CFG_JSON_BACKEND,
+    JSON_BACKEND_STDLIB,
+    CFG_RESPONSE_COMPRESSION,
+    CFG_RESPONSE_COMPRESSION_THRESHOLD,
+    CFG_JOB_WORKERS,
+    CFG_JOB_EXECUTOR,
+    JOB_EXECUTOR_THREAD,
+    CFG_JOB_TIMEOUT_MODE,
+    JOB_TIMEOUT_THREAD,
+    CFG_JOB_SHARDS,
+    CFG_JOB_SHARD_INDEX,
+    CFG_JOB_STATS_FILE,
+    CFG_JOB_METRICS_FILE,
+    CFG_JOB_STATS_INTERVAL,
+    DI_JOB_COORDINATOR,
+    DI_TASK_QUEUE,
+    DI_DB,
+    DI_REDIS,
+    DI_CACHE,
+    CFG_TASK_WORKERS,
+    CFG_TASK_BATCH_SIZE,
+    CFG_TASK_VISIBILITY_TIMEOUT,
+    CFG_TASK_POLL_INTERVAL,
+    TASK_QUEUE_DEFAULT,
+    CFG_EVENT_DISPATCH,
+    CFG_EVENT_WORKERS,
+    CFG_EVENT_MAX_PENDING,
+    EVENT_DISPATCH_SYNC,
 )
 import signal
 from .signal_manager import SignalManager
 from .middleware import ModuleRunnerMiddleware
 from .module import BaseModule
+from .event_manager import PokieEventManager
 from .command import CliCommand
 from pokie.util.cli_args import ArgParser
+from pokie.http.json_backend import get_json_backend
+from pokie.http.compression import ResponseCompression
 
 
 class FlaskApplication:
@@ -42,6 +72,9 @@ class FlaskApplication:
         "pokie.contrib.base",
     ]  # system modules to always be included
 
+    # resources holding connections, recreated in forked job processes if registered by a factory; see post_fork()
+    fork_resources = [DI_DB, DI_REDIS, DI_CACHE, DI_TASK_QUEUE]
+
     def __init__(self, cfg: Container):
         self.di = Di()
         self.app = None
@@ -66,6 +99,9 @@ class FlaskApplication:
         self.pre_shutdown_hooks = (
             []
         )  # list of hooks to run during graceful shutdown
+        self.post_fork_hooks = []  # list of hooks to run in forked job processes
+        self.factory_resources = {}  # factory of each Di resource registered by factories, {name: factory}
+        self._fork_inherited = []  # resources replaced by post_fork()
 
     def build(self, module_list: list, factories: List = None) -> Flask:
         """
@@ -90,6 +126,19 @@ class FlaskApplication:
         self.app.di = self.di
         self.di.add(DI_FLASK, self.app)
 
+        # JSON serialization backend for responses
+        self.app.json_backend = get_json_backend(
+            self.cfg.get(CFG_JSON_BACKEND, JSON_BACKEND_STDLIB)
+        )
+
+        # response compression
+        encodings = self.cfg.get(CFG_RESPONSE_COMPRESSION, "")
+        if isinstance(encodings, str):
+            encodings = encodings.split(",")
+        self.app.response_compression = ResponseCompression(
+            encodings, int(self.cfg.get(CFG_RESPONSE_COMPRESSION_THRESHOLD, 1024))
+        )
+
         # initialize signal manager
         self.di.add(DI_SIGNAL, SignalManager(self.di))
 
@@ -104,7 +153,11 @@ class FlaskApplication:
             if not callable(factory):
                 raise RuntimeError("build(): non-callable or non-existing factory")
             else:
+                names = set(self.di.keys())
                 factory(self.di)
+                for name in self.di.keys():
+                    if name not in names:
+                        self.factory_resources[name] = factory
 
         # load modules
         # Note: module load order is significant; system modules are loaded first, followed by
@@ -143,7 +196,11 @@ class FlaskApplication:
         self.di.add(DI_SERVICES, MapLoader(self.di, svc_map))
 
         # parse events from modules
-        evt_mgr = EventManager()
+        evt_mgr = PokieEventManager(
+            default_mode=self.cfg.get(CFG_EVENT_DISPATCH, EVENT_DISPATCH_SYNC),
+            workers=int(self.cfg.get(CFG_EVENT_WORKERS, 2)),
+            max_pending=int(self.cfg.get(CFG_EVENT_MAX_PENDING, 10000)),
+        )
         for name, module in self.modules.items():
             module_events = getattr(module, "events", None)
             if isinstance(module_events, dict):
@@ -161,7 +218,16 @@ class FlaskApplication:
                             )
                         for handler in handlers:
                             evt_mgr.add_handler(evt_name, handler, int(priority))
-
+            module_dispatch = getattr(module, "event_dispatch", None)
+            if isinstance(module_dispatch, dict):
+                for evt_name, mode in module_dispatch.items():
+                    evt_mgr.set_dispatch_mode(evt_name, mode)
+
+        # fail early instead of on the first dispatch
+        if evt_mgr.uses_task_dispatch() and not self.di.has(DI_TASK_QUEUE):
+            raise RuntimeError(
+                "build(): events dispatched in 'task' mode require DI_TASK_QUEUE; maybe TaskQueueFactory is missing?"
+            )
         self.di.add(DI_EVENTS, evt_mgr)
 
         # register exception handler
@@ -220,13 +286,72 @@ class FlaskApplication:
         """
         self.pre_shutdown_hooks.append(f)
 
+    def register_post_fork_hook(self, f):
+        """
+        Register a hook to be executed in forked job processes, after post_fork() recreates the fork resources;
+        use it to recreate other resources holding connections
+
+        the hook must have the following interface:
+
+        callable(app:FlaskApplication)
+
+        :param f:
+        :return:
+        """
+        self.post_fork_hooks.append(f)
+
+    def _fork_resource_names(self) -> list:
+        return [
+            name
+            for name in self.fork_resources
+            if name in self.factory_resources and self.di.has(name)
+        ]
+
+    def prepare_fork(self):
+        """
+        Create the fork resources before forking a job process, so the forked process keeps the parent resources
+        referenced (see post_fork()), instead of creating them
+        """
+        for name in self._fork_resource_names():
+            self.di.get(name)
+
+    def post_fork(self):
+        """
+        Recreate the fork resources in a forked job process, and execute the post-fork hooks
+
+        The factories that registered fork_resources are called again on a scoped container, and the resources
+        they build replace the inherited ones. Inherited resources are kept referenced, but not used: closing them
+        would close the connections of the parent process
+        """
+        names = self._fork_resource_names()
+        scoped = Di(self.di)
+        for factory in dict.fromkeys(self.factory_resources[name] for name in names):
+            factory(scoped)
+        for name in self.fork_resources:
+            if name not in names and self.di.has(name) and not scoped.has(name):
+                # not built by a factory; shared with the recreated resources
+                scoped.add(name, self.di.get(name))
+
+        for name in names:
+            if scoped.has(name):
+                self._fork_inherited.append(self.di.get(name))
+                self.di.add(name, _scoped_resource(scoped, name), True)
+
+        for fn in self.post_fork_hooks:
+            fn(self)
+
     def shutdown(self):
         """
-        Execute registered shutdown hooks for graceful cleanup
+        Execute registered shutdown hooks for graceful cleanup, and flush queued events
         """
         for fn in self.pre_shutdown_hooks:
             fn(self)
 
+        if self.di.has(DI_EVENTS):
+            evt_mgr = self.di.get(DI_EVENTS)
+            if isinstance(evt_mgr, PokieEventManager):
+                evt_mgr.shutdown()
+
     def _build_modules(self):
         """
         Call build() on all registered modules. Idempotent.
@@ -364,12 +489,32 @@ class FlaskApplication:
         # reverse job list so user module jobs run before system module jobs (e.g. IdleJob)
         job_list.reverse()
 
-        runner = JobRunner(job_list, tty=self.tty, silent=silent)
+        cfg = self.di.get(DI_CONFIG)
+        runner = JobRunner(
+            job_list,
+            tty=self.tty,
+            silent=silent,
+            workers=int(cfg.get(CFG_JOB_WORKERS, 0)),
+            executor=cfg.get(CFG_JOB_EXECUTOR, JOB_EXECUTOR_THREAD),
+            timeout_mode=cfg.get(CFG_JOB_TIMEOUT_MODE, JOB_TIMEOUT_THREAD),
+            coordinator=(
+                self.di.get(DI_JOB_COORDINATOR)
+                if self.di.has(DI_JOB_COORDINATOR)
+                else None
+            ),
+            shards=int(cfg.get(CFG_JOB_SHARDS, 1)),
+            shard_index=int(cfg.get(CFG_JOB_SHARD_INDEX, 0)),
+            stats_file=cfg.get(CFG_JOB_STATS_FILE, "") or None,
+            metrics_file=cfg.get(CFG_JOB_METRICS_FILE, "") or None,
+            stats_interval=float(cfg.get(CFG_JOB_STATS_INTERVAL, 15)),
+        )
 
         if single_run:
             runner.run_once(self.di)
         else:
             def abort_jobs(di, signal_no, stack_trace):
+                # running jobs are allowed to finish, and keep their leases until they do; queued runs are cancelled
+                runner.shutdown(wait_running=False)
                 self.shutdown()
                 if not silent:
                     di.get(DI_TTY).write("\nCtrl+C pressed, exiting...")
@@ -380,3 +525,56 @@ class FlaskApplication:
                 signal_manager=self.di.get(DI_SIGNAL),
                 abort_callback=abort_jobs,
             )
+
+    def get_tasks(self) -> dict:
+        result = {}
+        for module_name, module in self.modules.items():
+            result.update(getattr(module, "tasks", {}))
+        return result
+
+    def task_worker(
+        self,
+        queue_name: str = TASK_QUEUE_DEFAULT,
+        concurrency: int = None,
+        batch_size: int = None,
+        silent=False,
+    ):
+        from pokie.queue import TaskWorker
+
+        if not self.di.has(DI_TASK_QUEUE):
+            raise RuntimeError(
+                "task_worker(): DI_TASK_QUEUE not found; maybe TaskQueueFactory is missing?"
+            )
+
+        cfg = self.di.get(DI_CONFIG)
+        if concurrency is None:
+            concurrency = int(cfg.get(CFG_TASK_WORKERS, 4))
+        if batch_size is None:
+            batch_size = int(cfg.get(CFG_TASK_BATCH_SIZE, 10))
+
+        worker = TaskWorker(
+            self.di,
+            self.di.get(DI_TASK_QUEUE),
+            self.get_tasks(),
+            queue_name=queue_name,
+            concurrency=concurrency,
+            batch_size=batch_size,
+            visibility_timeout=float(cfg.get(CFG_TASK_VISIBILITY_TIMEOUT, 300)),
+            poll_interval=float(cfg.get(CFG_TASK_POLL_INTERVAL, 1)),
+            tty=self.tty,
+            silent=silent,
+        )
+
+        def abort_worker(di, signal_no, stack_trace):
+            # running tasks are allowed to finish
+            worker.stop()
+            if not silent:
+                di.get(DI_TTY).write("\nCtrl+C pressed, waiting for running tasks...")
+
+        worker.run(signal_manager=self.di.get(DI_SIGNAL), abort_callback=abort_worker)
+        self.shutdown()
+
+
+def _scoped_resource(di: Di, name: str):
+    # lazy Di entry reading a resource from another container
+    return lambda _di: di.get(name)
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+from typing import Set
+
+# field bounds: minute, hour, day of month, month, day of week (0 = Sunday; 7 is also accepted as Sunday)
+FIELD_BOUNDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+# month and weekday names
+FIELD_NAMES = [
+    None,
+    None,
+    None,
+    "jan feb mar apr may jun jul aug sep oct nov dec".split(),
+    "sun mon tue wed thu fri sat".split(),
+]
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+# stop searching for a matching time after this many years (e.g. "0 0 30 2 *")
+MAX_YEARS = 5
+
+
+class CronExpression:
+    """
+    Standard 5-field cron expression (minute, hour, day of month, month, day of week)
+
+    Supports "*", lists ("1,15"), ranges ("1-5"), steps ("*/15", "10-30/5"), month and weekday names, and the
+    @yearly, @monthly, @weekly, @daily and @hourly macros. As in cron, if both day of month and day of week are
+    restricted, a day matches if either field matches.
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        fields = MACROS.get(expr.strip().lower(), expr).split()
+        if len(fields) != 5:
+            raise ValueError(
+                "CronExpression: expected 5 fields in '{}', got {}".format(
+                    expr, len(fields)
+                )
+            )
+
+        values = []
+        for i, field in enumerate(fields):
+            values.append(self._parse_field(field.lower(), i))
+        self.minutes, self.hours, self.days, self.months, weekdays = values
+        # 7 is Sunday
+        if 7 in weekdays:
+            weekdays = (weekdays - {7}) | {0}
+        self.weekdays = weekdays
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _parse_value(self, value: str, index: int) -> int:
+        names = FIELD_NAMES[index]
+        if names is not None and value in names:
+            return names.index(value) + FIELD_BOUNDS[index][0]
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(
+                "CronExpression: invalid value '{}' in '{}'".format(value, self.expr)
+            )
+
+    def _parse_field(self, field: str, index: int) -> Set[int]:
+        lo, hi = FIELD_BOUNDS[index]
+        result = set()
+        for part in field.split(","):
+            expr, _, step = part.partition("/")
+            step = self._parse_value(step, index) if step else 1
+            if expr == "*":
+                start, end = lo, hi
+            elif "-" in expr:
+                start, _, end = expr.partition("-")
+                start, end = self._parse_value(start, index), self._parse_value(
+                    end, index
+                )
+            else:
+                start = self._parse_value(expr, index)
+                # "a/n" means from a to the upper bound, every n
+                end = hi if part != expr else start
+
+            if step < 1 or start < lo or end > hi or start > end:
+                raise ValueError(
+                    "CronExpression: invalid field '{}' in '{}'".format(
+                        field, self.expr
+                    )
+                )
+            result.update(range(start, end + 1, step))
+        return result
+
+    def _match_day(self, t: datetime) -> bool:
+        in_days = t.day in self.days
+        # cron weekdays start on Sunday
+        in_weekdays = (t.weekday() + 1) % 7 in self.weekdays
+        if self.any_day:
+            return in_weekdays
+        if self.any_weekday:
+            return in_days
+        return in_days or in_weekdays
+
+    def next(self, after: datetime) -> datetime:
+        """
+        Get the first matching time after a given time
+        :param after:
+        :return: datetime, with the same tzinfo as after
+        """
+        t = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after.year + MAX_YEARS
+        while t.year <= limit:
+            if t.month not in self.months:
+                # first day of next month
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(
+                    day=1
+                )
+                continue
+            if not self._match_day(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            if t.minute not in self.minutes:
+                t = t + timedelta(minutes=1)
+                continue
+            return t
+        raise ValueError("CronExpression: '{}' never matches".format(self.expr))
+
+    def __repr__(self) -> str:
+        return "CronExpression('{}')".format(self.expr)
@@ -0,0 +1,395 @@
+import atexit
+import importlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from inspect import isclass
+from typing import Optional
+
+from rick.base import Di
+from rick.event import EventManager, EventHandler
+
+from pokie.constants import (
+    DI_TASK_QUEUE,
+    EVENT_DISPATCH_SYNC,
+    EVENT_DISPATCH_ASYNC,
+    EVENT_DISPATCH_TASK,
+    EVENT_TASK_NAME,
+)
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_MODES = (EVENT_DISPATCH_SYNC, EVENT_DISPATCH_ASYNC, EVENT_DISPATCH_TASK)
+
+
+class BatchEventHandler(EventHandler):
+    """
+    Event handler that receives events in groups
+
+    The event method receives a list of the keyword arguments of each dispatch, instead of the keyword arguments.
+    With async dispatch, events are buffered and delivered when batch_size events are waiting, or batch_interval
+    seconds after the first one; with sync or task dispatch, each event is delivered as a list of one
+    """
+
+    # max events per call
+    batch_size = 100
+
+    # max seconds an event waits in the buffer
+    batch_interval = 1.0
+
+
+class _Batch:
+    def __init__(self, handler: str, event_name: str, cls):
+        self.handler = handler
+        self.event_name = event_name
+        self.cls = cls
+        self.di = None
+        self.events = []
+        self.created = 0.0
+
+
+class PokieEventManager(EventManager):
+    """
+    EventManager with per-event and per-handler dispatch modes
+
+    "sync" handlers run in the dispatching thread, as in EventManager; "async" handlers run on a background thread
+    pool, and BatchEventHandler handlers receive events in groups; "task" handlers are enqueued on the task queue
+    (DI_TASK_QUEUE) and run by job:worker. The mode of a handler is its dispatch_mode attribute, if set; otherwise,
+    the mode of the event (see set_dispatch_mode()), or the default mode.
+
+    Call flush() to wait for queued events, and shutdown() to flush and stop the thread pool
+    """
+
+    def __init__(
+        self,
+        default_mode: str = EVENT_DISPATCH_SYNC,
+        workers: int = 2,
+        max_pending: int = 10000,
+    ):
+        """
+        Constructor
+        :param default_mode: dispatch mode of handlers and events without an explicit mode
+        :param workers: size of the async dispatch thread pool
+        :param max_pending: max queued async dispatches; when full, handlers run in the dispatching thread
+        """
+        super().__init__()
+        self._check_mode(default_mode)
+        self.default_mode = default_mode
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self.errors = 0  # failed async handler runs
+        self._modes = {}
+        self._classes = {}
+        self._pool = None
+        self._pending = set()
+        self._batches = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._exit_hook = False
+
+    @staticmethod
+    def _check_mode(mode: str):
+        if mode not in DISPATCH_MODES:
+            raise RuntimeError("invalid event dispatch mode '{}'".format(mode))
+
+    def set_dispatch_mode(self, event_name: str, mode: str):
+        """
+        Set the dispatch mode of an event; handlers with a dispatch_mode attribute keep their own mode
+        :param event_name:
+        :param mode: "sync", "async" or "task"
+        :return:
+        """
+        self._check_mode(mode)
+        with self._handler_lock:
+            self._modes[event_name] = mode
+
+    def get_dispatch_mode(self, event_name: str) -> str:
+        with self._handler_lock:
+            return self._modes.get(event_name, self.default_mode)
+
+    def uses_task_dispatch(self) -> bool:
+        """
+        Check if any registered handler is dispatched in "task" mode, and requires the task queue (DI_TASK_QUEUE)
+        :return: bool
+        """
+        with self._handler_lock:
+            events = [
+                (event_name, list(evt["handlers"]))
+                for event_name, evt in self._handlers.items()
+            ]
+            modes = dict(self._modes)
+
+        for event_name, handlers in events:
+            event_mode = modes.get(event_name, self.default_mode)
+            for handler in handlers:
+                cls = self._resolve(handler)
+                mode = getattr(cls, "dispatch_mode", None) or event_mode
+                if mode == EVENT_DISPATCH_TASK:
+                    return True
+        return False
+
+    def _register_exit_hook(self):
+        """
+        Flush queued events when the interpreter exits, if shutdown() is not called; must hold _lock
+        """
+        if not self._exit_hook:
+            self._exit_hook = True
+            atexit.register(self.shutdown)
+
+    def _resolve(self, handler: str):
+        cls = self._classes.get(handler, None)
+        if cls is not None:
+            return cls
+
+        module_path, cls_name = handler.rsplit(".", 1)
+        try:
+            module = importlib.import_module(module_path)
+        except ModuleNotFoundError:
+            raise RuntimeError(
+                "dispatch(): mapped module '%s' not found when discovering path '%s'"
+                % (module_path, handler)
+            )
+        cls = getattr(module, cls_name, None)
+        if cls is None:
+            raise RuntimeError(
+                "dispatch(): cannot find class or function '%s' in module '%s'"
+                % (cls_name, module_path)
+            )
+        self._classes[handler] = cls
+        return cls
+
+    def _call(self, di: Di, handler: str, cls, event_name: str, arg):
+        """
+        Call a handler
+        :param arg: keyword arguments of a dispatch, or a list of them for batch handlers
+        """
+        if isclass(cls) and issubclass(cls, EventHandler):
+            obj = cls(di)
+            obj_handler = getattr(obj, event_name, None)
+            if obj_handler is None:
+                raise RuntimeError(
+                    "dispatch(): event handler for '%s' not found in '%s'"
+                    % (event_name, handler)
+                )
+            if issubclass(cls, BatchEventHandler):
+                obj_handler(arg if isinstance(arg, list) else [arg])
+            else:
+                obj_handler(**arg)
+
+        elif callable(cls) and not isclass(cls):
+            cls(**dict(arg, event_name=event_name))
+
+        else:
+            raise RuntimeError(
+                "dispatch(): handler '%s' for event '%s' invalid or incompatible"
+                % (handler, event_name)
+            )
+
+    def run_handler(self, di: Di, handler: str, event_name: str, kwargs: dict):
+        """
+        Run a single handler of an event in the calling thread; used by task dispatch
+        :param di:
+        :param handler: handler path
+        :param event_name:
+        :param kwargs: dispatch keyword arguments
+        :return:
+        """
+        self._call(di, handler, self._resolve(handler), event_name, kwargs)
+
+    def _run_async(self, di: Di, handler: str, cls, event_name: str, arg):
+        try:
+            self._call(di, handler, cls, event_name, arg)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            logger.exception(
+                "dispatch(): async handler '%s' for event '%s' failed",
+                handler,
+                event_name,
+            )
+
+    def _submit(self, di: Di, handler: str, cls, event_name: str, arg):
+        """
+        Run a handler on the thread pool; if the pool is full or stopped, run it in the calling thread
+        """
+        with self._lock:
+            full = self._closed or len(self._pending) >= self.max_pending
+            if not full:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="pokie-event"
+                    )
+                    self._register_exit_hook()
+                try:
+                    future = self._pool.submit(
+                        self._run_async, di, handler, cls, event_name, arg
+                    )
+                    self._pending.add(future)
+                except RuntimeError:
+                    # the interpreter is exiting, and the pool no longer accepts work
+                    full = True
+
+        if full:
+            self._run_async(di, handler, cls, event_name, arg)
+            return
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _add_to_batch(self, di: Di, handler: str, cls, event_name: str, kwargs: dict):
+        key = (handler, event_name)
+        ready = None
+        with self._lock:
+            batch = self._batches.get(key, None)
+            if batch is None:
+                batch = _Batch(handler, event_name, cls)
+                batch.created = time.monotonic()
+                self._batches[key] = batch
+            batch.di = di
+            batch.events.append(kwargs)
+            if len(batch.events) >= max(1, cls.batch_size) or self._closed:
+                ready = self._batches.pop(key)
+            elif self._flusher is None and not self._closed:
+                self._flusher = threading.Thread(
+                    target=self._flush_loop, name="pokie-event-flush", daemon=True
+                )
+                self._flusher.start()
+                self._register_exit_hook()
+
+        if ready is not None:
+            self._submit(ready.di, handler, cls, event_name, ready.events)
+        else:
+            self._wakeup.set()
+
+    def _take_batches(self, now: Optional[float] = None) -> list:
+        """
+        Remove buffered batches from the buffer
+        :param now: if set, only batches older than their batch_interval
+        :return: list of _Batch
+        """
+        result = []
+        with self._lock:
+            for key, batch in list(self._batches.items()):
+                if now is None or now - batch.created >= batch.cls.batch_interval:
+                    result.append(self._batches.pop(key))
+        return result
+
+    def _next_flush(self) -> Optional[float]:
+        with self._lock:
+            deadlines = [
+                batch.created + batch.cls.batch_interval
+                for batch in self._batches.values()
+            ]
+        if len(deadlines) == 0:
+            return None
+        return max(0.0, min(deadlines) - time.monotonic())
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self._next_flush())
+            self._wakeup.clear()
+            for batch in self._take_batches(time.monotonic()):
+                self._submit(
+                    batch.di, batch.handler, batch.cls, batch.event_name, batch.events
+                )
+
+    def dispatch(self, di: Di, event_name: str, **kwargs):
+        """
+        Dispatches an Event by name
+        Returns True if dispatched, False if not
+        :param di: Di instance
+        :param event_name: event name to dispatch
+        :param kwargs:
+        :return: bool
+        """
+        if event_name not in self._handlers.keys():
+            return False
+
+        with self._stack_lock:
+            if event_name in self._stack:
+                raise RuntimeError(
+                    "dispatch(): circular event dependency when performing '{}'".format(
+                        event_name
+                    )
+                )
+            self._stack.append(event_name)
+
+        try:
+            with self._handler_lock:
+                evt = self._handlers[event_name]
+                priorities = list(evt.keys())
+                priorities.remove("handlers")
+                priorities.sort()
+                runqueue = []
+                for p in priorities:
+                    runqueue.extend(evt[p])
+                event_mode = self._modes.get(event_name, self.default_mode)
+
+            for handler in runqueue:
+                cls = self._resolve(handler)
+                mode = getattr(cls, "dispatch_mode", None) or event_mode
+                if mode == EVENT_DISPATCH_SYNC:
+                    self._call(di, handler, cls, event_name, kwargs)
+                elif mode == EVENT_DISPATCH_ASYNC:
+                    if isclass(cls) and issubclass(cls, BatchEventHandler):
+                        self._add_to_batch(di, handler, cls, event_name, dict(kwargs))
+                    else:
+                        self._submit(di, handler, cls, event_name, dict(kwargs))
+                elif mode == EVENT_DISPATCH_TASK:
+                    di.get(DI_TASK_QUEUE).enqueue(
+                        EVENT_TASK_NAME,
+                        {"event": event_name, "handler": handler, "kwargs": kwargs},
+                    )
+                else:
+                    raise RuntimeError(
+                        "dispatch(): invalid dispatch mode '%s' for handler '%s'"
+                        % (mode, handler)
+                    )
+        finally:
+            self._stack_remove(event_name)
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Deliver buffered batches, and wait for queued async dispatches to finish
+        :param timeout: optional max seconds to wait
+        :return: True if all dispatches finished
+        """
+        for batch in self._take_batches():
+            self._submit(
+                batch.di, batch.handler, batch.cls, batch.event_name, batch.events
+            )
+
+        with self._lock:
+            pending = list(self._pending)
+        _, not_done = wait(pending, timeout=timeout)
+        return len(not_done) == 0
+
+    def shutdown(self, timeout: float = None) -> bool:
+        """
+        Flush queued events and stop the thread pool; later async dispatches run in the dispatching thread
+        :param timeout: optional max seconds to wait for queued events
+        :return: True if all dispatches finished
+        """
+        done = self.flush(timeout)
+        with self._lock:
+            self._closed = True
+            pool = self._pool
+            self._pool = None
+            if self._exit_hook:
+                self._exit_hook = False
+                atexit.unregister(self.shutdown)
+        self._wakeup.set()
+        if pool is not None:
+            pool.shutdown(wait=done)
+        # events buffered while stopping
+        for batch in self._take_batches():
+            self._run_async(
+                batch.di, batch.handler, batch.cls, batch.event_name, batch.events
+            )
+        return done
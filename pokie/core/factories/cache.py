@@ -1,15 +1,87 @@
 from rick.base import Di
-from pokie.cache.redis import RedisCache
 
-from pokie.constants import DI_CACHE
+from pokie.cache import RedisCache, TieredCache, LocalCache, DummyCache
+from pokie.cache.serializer import get_cache_serializer
+from pokie.constants import (
+    DI_CACHE,
+    DI_CONFIG,
+    CFG_CACHE_BACKEND,
+    CFG_CACHE_SERIALIZER,
+    CFG_CACHE_COMPRESSION,
+    CFG_CACHE_COMPRESSION_THRESHOLD,
+    CFG_CACHE_LOCAL_MAX_ENTRIES,
+    CFG_CACHE_LOCAL_MAX_BYTES,
+    CFG_CACHE_LOCAL_POLICY,
+    CFG_CACHE_L1_TTL,
+    CFG_CACHE_L1_PREFIX_TTL,
+    CFG_CACHE_INVALIDATION_CHANNEL,
+    CACHE_BACKEND_REDIS,
+    CACHE_BACKEND_LOCAL,
+    CACHE_BACKEND_TIERED,
+    CACHE_BACKEND_NULL,
+    CACHE_SERIALIZER_PICKLE,
+    CACHE_POLICY_LRU,
+    CACHE_INVALIDATION_CHANNEL,
+)
 
 
 def CacheFactory(_di: Di):
     """
     Cache factory
-    Builds a CacheInterface object
-    Currently only supports REDIS
+    Builds a CacheInterface object, according to the CACHE_BACKEND configuration:
+        "redis": RedisCache (default); requires RedisFactory
+        "local": per-process LocalCache
+        "tiered": TieredCache, with a per-process LocalCache in front of RedisCache; requires RedisFactory
+        "null": DummyCache
     :param _di:
     :return:
     """
-    _di.add(DI_CACHE, RedisCache)
+
+    @_di.register(DI_CACHE)
+    def _factory(_di: Di):
+        cfg = _di.get(DI_CONFIG)
+        backend = cfg.get(CFG_CACHE_BACKEND, CACHE_BACKEND_REDIS)
+        if backend == CACHE_BACKEND_NULL:
+            return DummyCache(_di)
+
+        name = cfg.get(CFG_CACHE_SERIALIZER, CACHE_SERIALIZER_PICKLE)
+        serializer = get_cache_serializer(
+            name,
+            cfg.get(CFG_CACHE_COMPRESSION, None),
+            int(cfg.get(CFG_CACHE_COMPRESSION_THRESHOLD, 1024)),
+        )
+
+        if backend == CACHE_BACKEND_REDIS:
+            return RedisCache(_di, serializer)
+
+        if backend == CACHE_BACKEND_LOCAL:
+            return _local_cache(_di, cfg, serializer)
+
+        if backend == CACHE_BACKEND_TIERED:
+            prefix_ttl = cfg.get(CFG_CACHE_L1_PREFIX_TTL, None) or {}
+            if hasattr(prefix_ttl, "asdict"):
+                prefix_ttl = prefix_ttl.asdict()
+            prefix_ttl = {prefix: int(ttl) for prefix, ttl in prefix_ttl.items()}
+            return TieredCache(
+                _di,
+                # L1 values use the same serializer, without compression, so both tiers return the same values
+                l1=_local_cache(_di, cfg, get_cache_serializer(name)),
+                l2=RedisCache(_di, serializer),
+                ttl=int(cfg.get(CFG_CACHE_L1_TTL, 60)),
+                prefix_ttl=prefix_ttl,
+                channel=cfg.get(
+                    CFG_CACHE_INVALIDATION_CHANNEL, CACHE_INVALIDATION_CHANNEL
+                ),
+            )
+
+        raise RuntimeError("CacheFactory: invalid cache backend '{}'".format(backend))
+
+
+def _local_cache(_di: Di, cfg, serializer) -> LocalCache:
+    return LocalCache(
+        _di,
+        max_entries=int(cfg.get(CFG_CACHE_LOCAL_MAX_ENTRIES, 10000)),
+        max_bytes=int(cfg.get(CFG_CACHE_LOCAL_MAX_BYTES, 0)),
+        policy=cfg.get(CFG_CACHE_LOCAL_POLICY, CACHE_POLICY_LRU),
+        serializer=serializer,
+    )
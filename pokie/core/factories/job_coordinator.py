@@ -0,0 +1,42 @@
+from rick.base import Di
+
+from pokie.constants import (
+    DI_CONFIG,
+    DI_DB,
+    DI_REDIS,
+    DI_JOB_COORDINATOR,
+    CFG_JOB_COORDINATOR,
+    CFG_JOB_NODE_ID,
+    JOB_COORDINATOR_PGSQL,
+    JOB_COORDINATOR_REDIS,
+)
+from pokie.core.job_coordinator import PgJobCoordinator, RedisJobCoordinator
+
+
+def JobCoordinatorFactory(_di: Di):
+    """
+    Job coordinator factory
+    Builds a JobCoordinator, used by the job runner to share jobs between job:run nodes, according to the
+    JOB_COORDINATOR configuration:
+        "pgsql": PgJobCoordinator; requires PgSqlFactory
+        "redis": RedisJobCoordinator; requires RedisFactory
+    If JOB_COORDINATOR is empty, nothing is registered and every node runs every job
+    Note: The coordinator is only created when the resource is accessed on Di
+    :param _di:
+    :return:
+    """
+    backend = _di.get(DI_CONFIG).get(CFG_JOB_COORDINATOR, "")
+    if not backend:
+        return
+
+    if backend not in (JOB_COORDINATOR_PGSQL, JOB_COORDINATOR_REDIS):
+        raise RuntimeError(
+            "JobCoordinatorFactory: invalid job coordinator '{}'".format(backend)
+        )
+
+    @_di.register(DI_JOB_COORDINATOR)
+    def _factory(_di: Di):
+        node_id = _di.get(DI_CONFIG).get(CFG_JOB_NODE_ID, None) or None
+        if backend == JOB_COORDINATOR_PGSQL:
+            return PgJobCoordinator(_di.get(DI_DB), node_id)
+        return RedisJobCoordinator(_di.get(DI_REDIS), node_id)
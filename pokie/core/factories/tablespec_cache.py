@@ -0,0 +1,32 @@
+from rick.base import Di
+
+from pokie.cache.file import FileCache
+from pokie.codegen.pg import PgTableSpecCache
+from pokie.constants import (
+    DI_CONFIG,
+    DI_DB,
+    DI_TABLESPEC_CACHE,
+    CFG_DB_SPEC_CACHE_PATH,
+    CFG_DB_SPEC_CACHE_VERSION,
+)
+
+
+def TableSpecCacheFactory(_di: Di):
+    """
+    Persistent TableSpec cache factory
+    Registers a file-based PgTableSpecCache, used by Auto.view() and Auto.rest() to skip database introspection
+    on warm starts; requires PgSqlFactory
+    Note: The cache is only created when the resource is accessed on Di
+    :param _di:
+    :return:
+    """
+
+    @_di.register(DI_TABLESPEC_CACHE)
+    def _factory(_di: Di):
+        cfg = _di.get(DI_CONFIG)
+        backend = FileCache(_di, cfg.get(CFG_DB_SPEC_CACHE_PATH, None))
+        return PgTableSpecCache(
+            _di.get(DI_DB),
+            backend,
+            version=cfg.get(CFG_DB_SPEC_CACHE_VERSION, ""),
+        )
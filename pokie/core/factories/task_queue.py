@@ -0,0 +1,40 @@
+from rick.base import Di
+
+from pokie.constants import (
+    DI_CONFIG,
+    DI_TASK_QUEUE,
+    CFG_TASK_QUEUE_BACKEND,
+    CFG_TASK_MAX_ATTEMPTS,
+    TASK_QUEUE_PGSQL,
+    TASK_QUEUE_REDIS,
+)
+from pokie.queue import PgTaskQueue, RedisTaskQueue
+
+
+def TaskQueueFactory(_di: Di):
+    """
+    Task queue factory
+    Builds the persistent TaskQueue used to enqueue tasks and consumed by job:worker, according to the
+    TASK_QUEUE_BACKEND configuration:
+        "pgsql": PgTaskQueue; requires PgSqlFactory
+        "redis": RedisTaskQueue; requires RedisFactory
+    Note: The queue is only created when the resource is accessed on Di
+    :param _di:
+    :return:
+    """
+    backend = _di.get(DI_CONFIG).get(CFG_TASK_QUEUE_BACKEND, TASK_QUEUE_PGSQL)
+    if backend not in (TASK_QUEUE_PGSQL, TASK_QUEUE_REDIS):
+        raise RuntimeError(
+            "TaskQueueFactory: invalid task queue backend '{}'".format(backend)
+        )
+
+    @_di.register(DI_TASK_QUEUE)
+    def _factory(_di: Di):
+        if backend == TASK_QUEUE_PGSQL:
+            queue = PgTaskQueue(_di)
+        else:
+            queue = RedisTaskQueue(_di)
+        queue.max_attempts = max(
+            1, int(_di.get(DI_CONFIG).get(CFG_TASK_MAX_ATTEMPTS, 5))
+        )
+        return queue
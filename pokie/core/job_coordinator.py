@@ -0,0 +1,254 @@
+import hashlib
+import logging
+import os
+import socket
+import threading
+import uuid
+import zlib
+from typing import Optional
+
+from rick_db.backend.pg import PgConnectionPool
+
+from pokie.constants import JOB_LEASE_PREFIX
+
+logger = logging.getLogger(__name__)
+
+
+def job_shard(name: str, shards: int) -> int:
+    """
+    Get the shard of a job
+    :param name: job name
+    :param shards: number of shards
+    :return: shard index, from 0 to shards - 1
+    """
+    return zlib.crc32(name.encode("utf-8")) % shards
+
+
+class JobCoordinator:
+    """
+    Coordinates job execution between several job runner nodes
+
+    Each job is owned by at most one node at a time, through a lease; the owner keeps the lease while it is running,
+    and renews it on each run. When the owner stops, the lease is released (or expires) and another node takes over
+    """
+
+    def __init__(self, node_id: str = None):
+        """
+        Constructor
+        :param node_id: optional node identifier; defaults to hostname:pid
+        """
+        self.node_id = node_id or "{}:{}".format(socket.gethostname(), os.getpid())
+
+    def acquire(self, name: str, ttl: float) -> bool:
+        """
+        Acquire or renew the lease of a job, without blocking
+        :param name: job name
+        :param ttl: lease duration, in seconds, for backends with expiring leases
+        :return: True if this node owns the job
+        """
+        raise NotImplementedError
+
+    def release(self, name: str):
+        """
+        Release the lease of a job, if owned by this node
+        :param name:
+        :return:
+        """
+        raise NotImplementedError
+
+    def release_all(self):
+        """
+        Release all leases owned by this node
+        :return:
+        """
+        raise NotImplementedError
+
+
+class PgJobCoordinator(JobCoordinator):
+    """
+    JobCoordinator using PostgreSQL session-level advisory locks
+
+    Locks are held on a dedicated connection; if the node dies or the connection is lost, the server releases them
+    """
+
+    def __init__(self, db, node_id: str = None):
+        """
+        Constructor
+        :param db: PgConnectionPool, or a PgConnection to hold the locks on
+        :param node_id:
+        """
+        super().__init__(node_id)
+        self._db = db
+        self._pooled = isinstance(db, PgConnectionPool)
+        self._conn = None if self._pooled else db
+        self._held = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def lock_id(name: str) -> int:
+        """
+        Get the advisory lock id of a job
+        :param name:
+        :return: signed 64-bit int
+        """
+        digest = hashlib.blake2b(
+            (JOB_LEASE_PREFIX + name).encode("utf-8"), digest_size=8
+        ).digest()
+        return int.from_bytes(digest, "big", signed=True)
+
+    def _fetch(self, sql: str, params: list):
+        if self._conn is None:
+            self._conn = self._db.getconn()
+        with self._conn.cursor() as c:
+            record = c.fetchone(sql, params)
+        if self._conn.in_transaction():
+            self._conn.commit()
+        return record
+
+    def _reset(self):
+        # locks are released by the server when the session ends
+        self._held.clear()
+        if not self._pooled:
+            return
+        conn = self._conn
+        self._conn = None
+        if conn is not None:
+            try:
+                # close the session instead of returning it to the pool with locks
+                conn.db.close()
+                self._db.putconn(conn)
+            except Exception:
+                pass
+
+    def acquire(self, name: str, ttl: float) -> bool:
+        with self._lock:
+            try:
+                if name in self._held:
+                    # the lock is held while the session is alive
+                    self._fetch("SELECT 1 AS alive", [])
+                    return True
+                record = self._fetch(
+                    "SELECT pg_try_advisory_lock(%s) AS locked", [self.lock_id(name)]
+                )
+                if record["locked"]:
+                    self._held.add(name)
+                    return True
+                return False
+            except Exception as e:
+                logger.warning("PgJobCoordinator: cannot acquire lease: %s", e)
+                self._reset()
+                return False
+
+    def release(self, name: str):
+        with self._lock:
+            if name not in self._held:
+                return
+            self._held.discard(name)
+            try:
+                self._fetch(
+                    "SELECT pg_advisory_unlock(%s) AS unlocked", [self.lock_id(name)]
+                )
+            except Exception as e:
+                logger.warning("PgJobCoordinator: cannot release lease: %s", e)
+                self._reset()
+
+    def release_all(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._fetch("SELECT pg_advisory_unlock_all() AS unlocked", [])
+            except Exception:
+                pass
+            self._held.clear()
+            if self._pooled:
+                self._db.putconn(self._conn)
+                self._conn = None
+
+
+class RedisJobCoordinator(JobCoordinator):
+    """
+    JobCoordinator using expiring Redis keys
+
+    The lease of a job is a key holding the owner token, renewed on each run; if the owner stops without releasing
+    it, the lease expires after its TTL
+    """
+
+    # set the lease if free, or extend it if owned by the token
+    lua_acquire = """
+local owner = redis.call('get', KEYS[1])
+if owner == ARGV[1] then
+    redis.call('pexpire', KEYS[1], ARGV[2])
+    return 1
+end
+if not owner then
+    redis.call('set', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+    # delete the lease only if owned by the token
+    lua_release = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+    def __init__(self, redis_client, node_id: str = None, prefix: str = None):
+        """
+        Constructor
+        :param redis_client: redis.Redis client
+        :param node_id:
+        :param prefix: optional key prefix
+        """
+        super().__init__(node_id)
+        self._redis = redis_client
+        self._prefix = prefix if prefix is not None else JOB_LEASE_PREFIX
+        # unique per instance, so restarted nodes with the same node_id do not share leases
+        self.token = "{}:{}".format(self.node_id, uuid.uuid4().hex)
+        self._held = set()
+
+    def key(self, name: str) -> str:
+        return self._prefix + name
+
+    def owner(self, name: str) -> Optional[str]:
+        """
+        Get the token of the current owner of a job
+        :param name:
+        :return: str or None
+        """
+        value = self._redis.get(self.key(name))
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    def acquire(self, name: str, ttl: float) -> bool:
+        try:
+            acquired = self._redis.eval(
+                self.lua_acquire,
+                1,
+                self.key(name),
+                self.token,
+                max(1, int(ttl * 1000)),
+            )
+        except Exception as e:
+            logger.warning("RedisJobCoordinator: cannot acquire lease: %s", e)
+            return False
+        if acquired:
+            self._held.add(name)
+            return True
+        self._held.discard(name)
+        return False
+
+    def release(self, name: str):
+        self._held.discard(name)
+        try:
+            self._redis.eval(self.lua_release, 1, self.key(name), self.token)
+        except Exception as e:
+            logger.warning("RedisJobCoordinator: cannot release lease: %s", e)
+
+    def release_all(self):
+        for name in list(self._held):
+            self.release(name)
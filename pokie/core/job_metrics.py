@@ -0,0 +1,279 @@
+import bisect
+import json
+import os
+import tempfile
+import time
+from typing import List, Optional
+
+# histogram bucket upper bounds, in seconds
+DURATION_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram, compatible with the Prometheus histogram type
+    """
+
+    def __init__(self, buckets: tuple = DURATION_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # per-bucket counts; the last one holds values above the largest bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count > 0 else 0.0
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile, as the upper bound of the bucket containing it
+        :param q: quantile, from 0 to 1
+        :return: seconds; values above the largest bound are estimated with the max observed value
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        total = 0
+        for i, count in enumerate(self.counts):
+            total += count
+            if total >= rank and count > 0:
+                if i < len(self.buckets):
+                    return min(self.buckets[i], self.max)
+                return self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "buckets": list(self.buckets),
+            "counts": list(self.counts),
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        histogram = cls(tuple(data["buckets"]))
+        histogram.counts = list(data["counts"])
+        histogram.count = data["count"]
+        histogram.sum = data["sum"]
+        histogram.max = data["max"]
+        return histogram
+
+
+class JobMetrics:
+    """
+    Per-job run metrics, collected by the JobRunner
+    """
+
+    def __init__(self):
+        self.runs = 0
+        # run duration (wall clock)
+        self.duration = Histogram()
+        # delay between the scheduled and the actual start of each run
+        self.lag = Histogram()
+        self.last_duration = 0.0
+        self.last_lag = 0.0
+        self.last_error = None  # type: Optional[str]
+        self.last_error_at = 0.0  # unix timestamp
+        self.last_success_at = 0.0  # unix timestamp
+
+    def observe_run(self, duration: float):
+        self.runs += 1
+        self.last_duration = duration
+        self.duration.observe(duration)
+
+    def observe_lag(self, lag: float):
+        self.last_lag = lag
+        self.lag.observe(lag)
+
+
+def job_stats(state, uptime: float) -> dict:
+    """
+    Build a JSON-serializable snapshot of the state and metrics of a job
+    :param state: JobState
+    :param uptime: seconds since the runner started, used to compute throughput
+    :return: dict
+    """
+    metrics = state.metrics
+    return {
+        "name": state.name,
+        "path": state.path,
+        "runs": metrics.runs,
+        "failures": state.total_failures,
+        "consecutive_failures": state.consecutive_failures,
+        "timeouts": state.timeouts,
+        "skipped": state.skipped,
+        "cpu_time": state.cpu_time,
+        "throughput": metrics.runs * 60 / uptime if uptime > 0 else 0.0,
+        "last_duration": metrics.last_duration,
+        "last_lag": metrics.last_lag,
+        "last_error": metrics.last_error,
+        "last_error_at": metrics.last_error_at,
+        "last_success_at": metrics.last_success_at,
+        "duration": metrics.duration.to_dict(),
+        "lag": metrics.lag.to_dict(),
+    }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_bound(value: float) -> str:
+    return repr(float(value))
+
+
+def prometheus_text(stats: List[dict], prefix: str = "pokie_job") -> str:
+    """
+    Render job snapshots in the Prometheus text exposition format
+    :param stats: list of job_stats() dicts
+    :param prefix: metric name prefix
+    :return: str
+    """
+    lines = []
+    counters = [
+        ("runs_total", "runs", "Finished job runs"),
+        ("failures_total", "failures", "Failed job runs"),
+        ("timeouts_total", "timeouts", "Timed out job runs"),
+        (
+            "skipped_total",
+            "skipped",
+            "Job runs skipped because another node owns the job",
+        ),
+        ("cpu_seconds_total", "cpu_time", "CPU time used by job runs"),
+    ]
+    for suffix, key, description in counters:
+        name = "{}_{}".format(prefix, suffix)
+        lines.append("# HELP {} {}".format(name, description))
+        lines.append("# TYPE {} counter".format(name))
+        for item in stats:
+            lines.append(
+                '{}{{job_class="{}"}} {}'.format(name, _escape(item["path"]), item[key])
+            )
+
+    gauges = [
+        (
+            "last_success_timestamp_seconds",
+            "last_success_at",
+            "Time of the last successful run",
+        ),
+        (
+            "last_error_timestamp_seconds",
+            "last_error_at",
+            "Time of the last failed run",
+        ),
+    ]
+    for suffix, key, description in gauges:
+        name = "{}_{}".format(prefix, suffix)
+        lines.append("# HELP {} {}".format(name, description))
+        lines.append("# TYPE {} gauge".format(name))
+        for item in stats:
+            lines.append(
+                '{}{{job_class="{}"}} {}'.format(name, _escape(item["path"]), item[key])
+            )
+
+    histograms = [
+        ("duration_seconds", "duration", "Job run duration"),
+        (
+            "lag_seconds",
+            "lag",
+            "Delay between the scheduled and the actual start of job runs",
+        ),
+    ]
+    for suffix, key, description in histograms:
+        name = "{}_{}".format(prefix, suffix)
+        lines.append("# HELP {} {}".format(name, description))
+        lines.append("# TYPE {} histogram".format(name))
+        for item in stats:
+            job = _escape(item["path"])
+            histogram = item[key]
+            total = 0
+            for bound, count in zip(histogram["buckets"], histogram["counts"]):
+                total += count
+                lines.append(
+                    '{}_bucket{{job_class="{}",le="{}"}} {}'.format(
+                        name, job, _format_bound(bound), total
+                    )
+                )
+            lines.append(
+                '{}_bucket{{job_class="{}",le="+Inf"}} {}'.format(
+                    name, job, histogram["count"]
+                )
+            )
+            lines.append(
+                '{}_sum{{job_class="{}"}} {}'.format(name, job, histogram["sum"])
+            )
+            lines.append(
+                '{}_count{{job_class="{}"}} {}'.format(name, job, histogram["count"])
+            )
+
+    return "\n".join(lines) + "\n"
+
+
+def write_file(path: str, contents: str):
+    """
+    Write a file atomically, so readers never see a partial file
+    :param path:
+    :param contents:
+    :return:
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".pokie-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(contents)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def write_stats(stats: List[dict], stats_file: str = None, metrics_file: str = None):
+    """
+    Dump job snapshots as JSON (read by job:stats) and/or Prometheus text (e.g. for the node_exporter textfile
+    collector)
+    :param stats: list of job_stats() dicts
+    :param stats_file: optional JSON file path
+    :param metrics_file: optional Prometheus text file path
+    :return:
+    """
+    if stats_file:
+        write_file(stats_file, json.dumps({"generated_at": time.time(), "jobs": stats}))
+    if metrics_file:
+        write_file(metrics_file, prometheus_text(stats))
+
+
+def read_stats(stats_file: str) -> dict:
+    """
+    Read a job:run JSON dump
+    :param stats_file:
+    :return: dict with "generated_at" (unix timestamp) and "jobs" (list of job_stats() dicts)
+    """
+    with open(stats_file, "r") as f:
+        return json.load(f)
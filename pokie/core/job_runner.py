@@ -1,17 +1,107 @@
 import time
 import threading
 import logging
+import heapq
+import multiprocessing
+import random
+import resource
+import select
+import signal
+import socket
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from typing import Optional, Tuple
 
 from rick.resource.console import ConsoleWriter
 
-from pokie.constants import DI_TTY
+from pokie.constants import (
+    DI_APP,
+    DI_TTY,
+    JOB_EXECUTOR_THREAD,
+    JOB_EXECUTOR_PROCESS,
+    JOB_TIMEOUT_THREAD,
+    JOB_TIMEOUT_PROCESS,
+)
+from .cron import CronExpression
+from .job_coordinator import JobCoordinator, job_shard
+from .job_metrics import JobMetrics, job_stats, write_stats
 
 logger = logging.getLogger(__name__)
 
 # Maximum backoff in seconds
 MAX_BACKOFF = 300
 
+# per-thread cancellation token of the running job; see current_token()
+_local = threading.local()
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation token for a job run
+
+    The runner cancels the token when the run times out; long-running jobs should check it periodically, or use
+    wait() instead of sleep(), and return early when it is cancelled
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Sleep until the timeout expires or the token is cancelled
+        :param timeout: seconds
+        :return: True if the token was cancelled
+        """
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise JobCancelledError("job run was cancelled")
+
+
+def current_token() -> CancellationToken:
+    """
+    Get the cancellation token of the job running in the current thread
+    :return: CancellationToken; outside a job run, a token that is never cancelled
+    """
+    token = getattr(_local, "token", None)
+    if token is None:
+        token = CancellationToken()
+    return token
+
+
+def _run_with_token(job, di, token: CancellationToken) -> float:
+    """
+    Run a job with a cancellation token
+    :return: CPU time used by the run, in seconds
+    """
+    _local.token = token
+    start = time.thread_time()
+    try:
+        job.run(di)
+    finally:
+        _local.token = None
+    return time.thread_time() - start
+
 
 @dataclass
 class JobState:
@@ -24,58 +114,339 @@ class JobState:
     consecutive_failures: int = 0
     total_failures: int = 0
     backoff_until: float = 0.0  # monotonic timestamp; skip until this time
+    future: Optional[Future] = None  # pending run, when using a worker pool
+    cron: Optional[CronExpression] = None  # cron schedule, instead of interval
+    jitter: float = 0.0  # max random delay added to each scheduled run, in seconds
+    next_run: float = 0.0  # monotonic timestamp of the next cron/jittered run
+    timeout_mode: str = JOB_TIMEOUT_THREAD  # "thread" or "process"
+    # resource accounting
+    timeouts: int = 0  # total timed out runs
+    cpu_time: float = 0.0  # total CPU time of all runs, in seconds
+    max_rss: int = 0  # peak memory of subprocess runs, in KiB
+    leaked_threads: int = 0  # timed out threads still running after the last run
+    # timed out threads (thread timeout mode)
+    abandoned: list = field(default_factory=list)
+    # coordination
+    path: str = ""  # qualified job class name; used for leases and sharding
+    distributed: bool = True  # if False, runs on every node
+    skipped: int = 0  # runs skipped because another node owns the job
+    owned: bool = True  # False if the last lease attempt failed
+    running: bool = False  # a sequential run is in progress
+    # run count, duration and schedule lag histograms, last error
+    metrics: JobMetrics = field(default_factory=JobMetrics)
+
+
+# process pool worker state; set in each worker process by _init_process_worker()
+_process_worker = None
+
+
+def _post_fork(di):
+    """
+    Recreate the application resources holding connections in a forked job process (see
+    FlaskApplication.post_fork()), so the process does not use the parent connections
+    """
+    if di.has(DI_APP):
+        di.get(DI_APP).post_fork()
+
+
+def _init_process_worker(runner, di):
+    global _process_worker
+    _post_fork(di)
+    _process_worker = (runner, di)
+    # shutdown is handled by the parent process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class _Waker:
+    """
+    Self-pipe used to interrupt the run_loop() wait, from worker threads or signals
+    """
+
+    def __init__(self):
+        self._r, self._w = socket.socketpair()
+        self._r.setblocking(False)
+        self._w.setblocking(False)
+
+    def fileno(self) -> int:
+        return self._w.fileno()
+
+    def wake(self, *args):
+        try:
+            self._w.send(b"\0")
+        except OSError:
+            # buffer full (a wakeup is already pending) or closed
+            pass
+
+    def wait(self, timeout: Optional[float]):
+        ready, _, _ = select.select([self._r], [], [], timeout)
+        if ready:
+            try:
+                while self._r.recv(4096):
+                    pass
+            except OSError:
+                pass
+
+    def close(self):
+        self._r.close()
+        self._w.close()
+
+
+def _run_in_process(index: int) -> Tuple[Optional[str], dict]:
+    """
+    Run a job in a process pool worker
+    :param index: job index in JobRunner.states
+    :return: tuple of (None on success or error message, resource usage dict)
+    """
+    runner, di = _process_worker
+    error, usage = runner._run_job(runner.states[index], di)
+    if error is not None:
+        # exceptions may not be picklable; return the message instead
+        error = "{}: {}".format(type(error).__name__, error)
+    return error, usage
+
+
+def _run_subprocess(job, di, conn):
+    """
+    Run a job in a forked subprocess (process timeout mode), and send the result to the parent
+    :param conn: multiprocessing Connection
+    """
+    token = CancellationToken()
+    # SIGTERM cancels the token; the parent sends SIGKILL if the job does not exit
+    signal.signal(signal.SIGTERM, lambda signal_no, frame: token.cancel())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _post_fork(di)
+    error = None
+    try:
+        _run_with_token(job, di, token)
+    except BaseException as e:
+        error = "{}: {}".format(type(e).__name__, e)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    conn.send((error, usage.ru_utime + usage.ru_stime, usage.ru_maxrss))
+    conn.close()
 
 
 class JobRunner:
     """
-    Manages job execution with per-job intervals, retry/backoff, and timeouts.
+    Manages job execution with per-job intervals or cron schedules, jitter, retry/backoff, and timeouts.
+
+    By default, jobs run sequentially in the calling thread; if workers > 0, jobs run concurrently on a bounded
+    thread or process pool. A job is never run again while a previous run is still in progress.
+
+    run_loop() keeps jobs in a priority queue ordered by their next due time, and sleeps until the earliest one
+    is due, a pool run finishes, or a signal is received.
     """
 
-    def __init__(self, job_list: list, tty: ConsoleWriter = None, silent: bool = False):
+    # minimum delay between runs of a job without interval or cron schedule in run_loop(), in seconds
+    MIN_INTERVAL = 0.1
+
+    # seconds between SIGTERM and SIGKILL when a job subprocess times out
+    TERMINATE_GRACE = 5
+
+    # seconds added to expiring job leases, on top of the job period
+    LEASE_GRACE = 60
+
+    # seconds between lease renewals of running jobs; lower than LEASE_GRACE, so leases outlive long runs
+    LEASE_RENEW_INTERVAL = 20
+
+    # minimum delay between lease attempts of a job owned by another node in run_loop(), in seconds
+    LEASE_RETRY = 5
+
+    def __init__(
+        self,
+        job_list: list,
+        tty: ConsoleWriter = None,
+        silent: bool = False,
+        workers: int = 0,
+        executor: str = JOB_EXECUTOR_THREAD,
+        timeout_mode: str = JOB_TIMEOUT_THREAD,
+        coordinator: JobCoordinator = None,
+        shards: int = 1,
+        shard_index: int = 0,
+        stats_file: str = None,
+        metrics_file: str = None,
+        stats_interval: float = 15,
+    ):
+        """
+        Constructor
+        :param job_list: list of job instances
+        :param tty:
+        :param silent:
+        :param workers: worker pool size; 0 = run jobs sequentially
+        :param executor: worker pool type, "thread" or "process"
+        :param timeout_mode: default timeout mode of jobs with a timeout, "thread" or "process"
+        :param coordinator: optional JobCoordinator; each distributed job only runs on the node that owns its lease
+        :param shards: number of job shards; distributed jobs not in shard_index are not run by this runner
+        :param shard_index: shard of this runner, from 0 to shards - 1
+        :param stats_file: optional path of a JSON dump of job metrics, read by job:stats
+        :param metrics_file: optional path of a Prometheus text dump of job metrics
+        :param stats_interval: seconds between metric dumps in run_loop()
+        """
+        if executor not in (JOB_EXECUTOR_THREAD, JOB_EXECUTOR_PROCESS):
+            raise ValueError("JobRunner: invalid executor '{}'".format(executor))
+        if executor == JOB_EXECUTOR_PROCESS and workers > 0:
+            self._require_fork("process executor")
+        shards = max(1, int(shards))
+        if not 0 <= int(shard_index) < shards:
+            raise ValueError(
+                "JobRunner: invalid shard index {} for {} shard(s)".format(
+                    shard_index, shards
+                )
+            )
+
         self.states = []
         self.silent = silent
         self.tty = tty
+        self.workers = max(0, int(workers))
+        self.executor = executor
+        self._pool = None
+        self._waker = None
+        self._heartbeat = None
+        self._heartbeat_stop = threading.Event()
+        self._lease_lock = threading.Lock()
+        self._stopped = False
+        self.coordinator = coordinator
+        self.stats_file = stats_file
+        self.metrics_file = metrics_file
+        self.stats_interval = max(1.0, float(stats_interval))
+        self._started = time.monotonic()
 
         for job in job_list:
             state = JobState(
                 job=job,
                 name=type(job).__name__,
+                path="{}.{}".format(type(job).__module__, type(job).__qualname__),
+                distributed=getattr(job, "job_distributed", True),
                 interval=getattr(job, "job_interval", 0),
                 max_retries=getattr(job, "job_max_retries", 0),
                 timeout=getattr(job, "job_timeout", 0),
+                jitter=getattr(job, "job_jitter", 0),
+                timeout_mode=getattr(job, "job_timeout_mode", None) or timeout_mode,
             )
+            if state.timeout_mode not in (JOB_TIMEOUT_THREAD, JOB_TIMEOUT_PROCESS):
+                raise ValueError(
+                    "JobRunner: invalid timeout mode '{}' for job '{}'".format(
+                        state.timeout_mode, state.name
+                    )
+                )
+            if state.timeout_mode == JOB_TIMEOUT_PROCESS and state.timeout > 0:
+                self._require_fork("process timeout mode")
+            cron = getattr(job, "job_cron", None)
+            if cron:
+                if state.interval > 0:
+                    raise ValueError(
+                        "JobRunner: job '{}' cannot have both job_interval and job_cron".format(
+                            state.name
+                        )
+                    )
+                state.cron = CronExpression(cron)
+
+            # cron jobs wait for their first scheduled time; jitter spreads the first run of interval jobs
+            if state.cron is not None or state.jitter > 0:
+                state.next_run = self._next_run(state, time.monotonic())
+
+            if state.distributed and job_shard(state.path, shards) != int(shard_index):
+                # runs on another shard
+                continue
             self.states.append(state)
 
-    def _should_run(self, state: JobState, now: float) -> bool:
-        # check interval
-        if state.interval > 0 and now < state.last_run + state.interval:
-            return False
+    @staticmethod
+    def _require_fork(feature: str):
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError(
+                "JobRunner: {} requires the 'fork' start method".format(feature)
+            )
 
-        # check backoff
-        if now < state.backoff_until:
-            return False
+    @staticmethod
+    def _prepare_fork(di):
+        """
+        Create the application resources recreated by forked job processes, before forking (see
+        FlaskApplication.prepare_fork())
+        """
+        if not di.has(DI_APP):
+            return
+        try:
+            di.get(DI_APP).prepare_fork()
+        except Exception as e:
+            # the forked process creates its own resources anyway
+            logger.warning("JobRunner: cannot prepare resources for fork: %s", e)
 
+    def _next_run(self, state: JobState, now: float) -> float:
+        """
+        Compute the next cron or jittered run time of a job
+        :param state:
+        :param now: monotonic timestamp
+        :return: monotonic timestamp
+        """
+        delay = 0.0
+        if state.cron is not None:
+            # cron schedules use the local wall clock
+            wall = datetime.now()
+            delay = (state.cron.next(wall) - wall).total_seconds()
+        if state.jitter > 0:
+            delay += random.uniform(0, state.jitter)
+        return now + delay
+
+    def _due(self, state: JobState) -> Optional[float]:
+        """
+        Get the earliest time a job may run
+        :param state:
+        :return: monotonic timestamp, or None if the job will not run again
+        """
         # check max retries
         if state.max_retries > 0 and state.consecutive_failures >= state.max_retries:
+            return None
+
+        due = max(state.next_run, state.backoff_until)
+        if state.interval > 0:
+            due = max(due, state.last_run + state.interval)
+        return due
+
+    def _should_run(self, state: JobState, now: float) -> bool:
+        # a previous run is still in progress
+        if state.future is not None:
             return False
 
-        return True
+        # check interval, cron schedule, backoff and max retries
+        due = self._due(state)
+        return due is not None and now >= due
+
+    def _run_with_timeout(self, state: JobState, di, usage: dict):
+        """
+        Run a job with a timeout using a thread
 
-    def _run_with_timeout(self, state: JobState, di):
-        """Run a job with a timeout using a thread."""
+        The thread cannot be killed; on timeout, the run's cancellation token is cancelled and the thread is
+        abandoned. New runs fail until all abandoned threads of the job have finished, so a job that hangs does not
+        accumulate threads.
+        """
+        state.abandoned = [thread for thread in state.abandoned if thread.is_alive()]
+        usage["leaked_threads"] = len(state.abandoned)
+        if len(state.abandoned) > 0:
+            raise RuntimeError(
+                "Job '{}' has {} timed out run(s) still running".format(
+                    state.name, len(state.abandoned)
+                )
+            )
+
+        token = CancellationToken()
         result = {"error": None}
 
         def target():
             try:
-                state.job.run(di)
+                usage["cpu_time"] = _run_with_token(state.job, di, token)
             except Exception as e:
                 result["error"] = e
 
-        thread = threading.Thread(target=target, daemon=True)
+        thread = threading.Thread(
+            target=target, name="pokie-job-{}".format(state.name), daemon=True
+        )
         thread.start()
         thread.join(timeout=state.timeout)
 
         if thread.is_alive():
+            token.cancel()
+            state.abandoned.append(thread)
+            usage["timeout"] = True
+            usage["leaked_threads"] = len(state.abandoned)
             raise TimeoutError(
                 "Job '{}' timed out after {}s".format(state.name, state.timeout)
             )
@@ -83,43 +454,366 @@ class JobRunner:
         if result["error"] is not None:
             raise result["error"]
 
+    def _run_subprocess(self, state: JobState, di, usage: dict):
+        """
+        Run a job with a timeout in a forked subprocess; on timeout, the subprocess is terminated (SIGTERM, which
+        cancels the run's token) and killed (SIGKILL) if it does not exit within TERMINATE_GRACE seconds
+        """
+        self._prepare_fork(di)
+        ctx = multiprocessing.get_context("fork")
+        reader, writer = ctx.Pipe(duplex=False)
+        process = ctx.Process(
+            target=_run_subprocess,
+            args=(state.job, di, writer),
+            name="pokie-job-{}".format(state.name),
+            daemon=True,
+        )
+        process.start()
+        writer.close()
+        result = None
+        try:
+            finished = reader.poll(state.timeout)
+            if finished:
+                try:
+                    result = reader.recv()
+                except EOFError:
+                    # the subprocess exited without a result
+                    pass
+                process.join(self.TERMINATE_GRACE)
+
+            if process.is_alive():
+                process.terminate()
+                process.join(self.TERMINATE_GRACE)
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+        finally:
+            reader.close()
+
+        if not finished:
+            usage["timeout"] = True
+            raise TimeoutError(
+                "Job '{}' timed out after {}s".format(state.name, state.timeout)
+            )
+        if result is None:
+            raise RuntimeError(
+                "Job '{}' subprocess exited with code {}".format(
+                    state.name, process.exitcode
+                )
+            )
+
+        error, usage["cpu_time"], usage["max_rss"] = result
+        if error is not None:
+            raise RuntimeError(error)
+
+    def _invoke(self, state: JobState, di, usage: dict):
+        """Run a job, handling timeout if configured; exceptions are propagated."""
+        if state.timeout <= 0:
+            usage["cpu_time"] = _run_with_token(state.job, di, CancellationToken())
+        elif state.timeout_mode == JOB_TIMEOUT_PROCESS:
+            self._run_subprocess(state, di, usage)
+        else:
+            self._run_with_timeout(state, di, usage)
+
+    def _run_job(self, state: JobState, di) -> tuple:
+        """
+        Run a job
+        :return: tuple of (exception or None, resource usage dict)
+        """
+        usage = {}
+        start = time.monotonic()
+        try:
+            self._invoke(state, di, usage)
+        except Exception as e:
+            return e, usage
+        finally:
+            usage["duration"] = time.monotonic() - start
+        return None, usage
+
+    def _account(self, state: JobState, usage: dict):
+        """Update the resource accounting of a job with the usage of a run."""
+        if "duration" in usage:
+            state.metrics.observe_run(usage["duration"])
+        state.cpu_time += usage.get("cpu_time", 0.0)
+        state.max_rss = max(state.max_rss, usage.get("max_rss", 0))
+        if "leaked_threads" in usage:
+            state.leaked_threads = usage["leaked_threads"]
+        if usage.get("timeout", False):
+            state.timeouts += 1
+            if state.leaked_threads > 0:
+                logger.warning(
+                    "Job '%s' timed out; %d thread(s) still running",
+                    state.name,
+                    state.leaked_threads,
+                )
+
+    def _success(self, state: JobState):
+        # reset consecutive failures, update last_run
+        state.consecutive_failures = 0
+        state.last_run = time.monotonic()
+        state.metrics.last_success_at = time.time()
+        self._reschedule(state)
+
+    def _failure(self, state: JobState, error):
+        state.consecutive_failures += 1
+        state.total_failures += 1
+        state.last_run = time.monotonic()
+        state.metrics.last_error = str(error)
+        state.metrics.last_error_at = time.time()
+
+        # compute backoff: min(2^failures, MAX_BACKOFF)
+        backoff = min(2**state.consecutive_failures, MAX_BACKOFF)
+        state.backoff_until = time.monotonic() + backoff
+        self._reschedule(state)
+
+        if not self.silent and self.tty:
+            self.tty.error(
+                "Job '{}' failed (attempt {}): {}".format(
+                    state.name, state.consecutive_failures, error
+                )
+            )
+
+    def _reschedule(self, state: JobState):
+        if state.cron is not None:
+            state.next_run = self._next_run(state, state.last_run)
+        elif state.jitter > 0:
+            state.next_run = self._next_run(state, state.last_run + state.interval)
+
+    def _lease_ttl(self, state: JobState) -> float:
+        """
+        Compute the lease duration of a job, for expiring leases: the owner renews it on each run
+        :param state:
+        :return: seconds
+        """
+        period = max(state.interval, self.MIN_INTERVAL)
+        if state.cron is not None:
+            wall = datetime.now()
+            after = state.cron.next(wall)
+            period = (state.cron.next(after) - wall).total_seconds()
+        return period + max(state.timeout, 0) + state.jitter + self.LEASE_GRACE
+
+    def _claim(self, state: JobState) -> bool:
+        """
+        Check if this node owns a job; if not, the run is skipped until the next scheduled time
+        :param state:
+        :return: True if the job can run
+        """
+        if self.coordinator is None or not state.distributed:
+            return True
+        if self.coordinator.acquire(state.path, self._lease_ttl(state)):
+            state.owned = True
+            self._start_heartbeat()
+            return True
+
+        state.owned = False
+        state.skipped += 1
+        state.last_run = time.monotonic()
+        self._reschedule(state)
+        return False
+
+    def _start_heartbeat(self):
+        """
+        Start the thread renewing the leases of running jobs, if not running
+        :return:
+        """
+        if self._heartbeat is not None and self._heartbeat.is_alive():
+            return
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat = threading.Thread(
+            target=self._renew_leases, name="pokie-job-lease", daemon=True
+        )
+        self._heartbeat.start()
+
+    def _renew_leases(self):
+        """
+        Renew the leases of running jobs every LEASE_RENEW_INTERVAL seconds, so they don't expire during runs
+        longer than the lease duration
+        :return:
+        """
+        while not self._heartbeat_stop.wait(self.LEASE_RENEW_INTERVAL):
+            for state in self.states:
+                with self._lease_lock:
+                    future = state.future
+                    running = state.running or (
+                        future is not None and not future.done()
+                    )
+                    if not running or not state.distributed:
+                        continue
+                    if not self.coordinator.acquire(state.path, self._lease_ttl(state)):
+                        logger.warning("Job '%s': lease lost while running", state.name)
+
+    def _release_lease(self, state: JobState, future=None):
+        with self._lease_lock:
+            self.coordinator.release(state.path)
+
+    def _schedule_lag(self, state: JobState, now: float) -> float:
+        """
+        Compute the delay between the scheduled and the actual start of a run; for jobs without interval or cron
+        schedule, the time since the previous run finished
+        :param state:
+        :param now: monotonic timestamp
+        :return: seconds
+        """
+        due = self._due(state)
+        if due is None:
+            return 0.0
+        if state.interval <= 0 and state.cron is None:
+            # run_loop() waits MIN_INTERVAL between runs
+            delay = self.MIN_INTERVAL if self._waker is not None else 0.0
+            due = max(due, state.last_run + delay)
+        return max(0.0, now - max(due, self._started))
+
     def _execute_job(self, state: JobState, di):
-        """Execute a single job, handling timeout if configured."""
+        """Execute a single job in the calling thread."""
         now = time.monotonic()
 
-        if not self._should_run(state, now):
+        if not self._should_run(state, now) or not self._claim(state):
             return
 
+        state.metrics.observe_lag(self._schedule_lag(state, time.monotonic()))
+
+        state.running = True
         try:
-            if state.timeout > 0:
-                self._run_with_timeout(state, di)
+            error, usage = self._run_job(state, di)
+        finally:
+            state.running = False
+        self._account(state, usage)
+        if error is None:
+            self._success(state)
+        else:
+            self._failure(state, error)
+
+    def _get_pool(self, di):
+        if self._pool is None:
+            if self.executor == JOB_EXECUTOR_PROCESS:
+                self._prepare_fork(di)
+                # workers are forked, so jobs are inherited instead of pickled
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("fork"),
+                    initializer=_init_process_worker,
+                    initargs=(self, di),
+                )
             else:
-                state.job.run(di)
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="pokie-job"
+                )
+        return self._pool
+
+    def _submit(self, state: JobState, di):
+        """Submit a job to the worker pool."""
+        pool = self._get_pool(di)
+        state.metrics.observe_lag(self._schedule_lag(state, time.monotonic()))
+        if self.executor == JOB_EXECUTOR_PROCESS:
+            state.future = pool.submit(_run_in_process, self.states.index(state))
+        else:
+            state.future = pool.submit(self._run_job, state, di)
+        if self._waker is not None:
+            state.future.add_done_callback(self._waker.wake)
+
+    def _complete(self, state: JobState):
+        """Update the state of a job whose pool run has finished."""
+        future = state.future
+        state.future = None
+        usage = {}
+        try:
+            error, usage = future.result()
+        except BrokenProcessPool as e:
+            # a worker process died; start a new pool on the next submit
+            self._pool = None
+            error = e
+        except Exception as e:
+            error = e
 
-            # success: reset consecutive failures, update last_run
-            state.consecutive_failures = 0
-            state.last_run = time.monotonic()
+        self._account(state, usage)
+        if error is None:
+            self._success(state)
+        else:
+            self._failure(state, error)
 
-        except Exception as e:
-            state.consecutive_failures += 1
-            state.total_failures += 1
-            state.last_run = time.monotonic()
-
-            # compute backoff: min(2^failures, MAX_BACKOFF)
-            backoff = min(2 ** state.consecutive_failures, MAX_BACKOFF)
-            state.backoff_until = time.monotonic() + backoff
-
-            if not self.silent and self.tty:
-                self.tty.error(
-                    "Job '{}' failed (attempt {}): {}".format(
-                        state.name, state.consecutive_failures, e
-                    )
-                )
+    def _dispatch(self, di) -> list:
+        """
+        Submit all due jobs to the worker pool, and collect finished runs
+        :param di:
+        :return: list of pending futures
+        """
+        for state in self.states:
+            if state.future is not None and state.future.done():
+                self._complete(state)
+
+        now = time.monotonic()
+        for state in self.states:
+            if self._should_run(state, now) and self._claim(state):
+                self._submit(state, di)
+
+        return [state.future for state in self.states if state.future is not None]
 
     def run_once(self, di):
         """Run all jobs once."""
-        for state in self.states:
-            self._execute_job(state, di)
+        if self.workers == 0:
+            for state in self.states:
+                self._execute_job(state, di)
+            self.dump_stats()
+            return
+
+        try:
+            wait(self._dispatch(di))
+            for state in self.states:
+                if state.future is not None:
+                    self._complete(state)
+        finally:
+            self.shutdown()
+            self.dump_stats()
+
+    def stats(self) -> list:
+        """
+        Get a snapshot of the metrics of all jobs
+        :return: list of dicts (see pokie.core.job_metrics.job_stats())
+        """
+        uptime = time.monotonic() - self._started
+        return [job_stats(state, uptime) for state in self.states]
+
+    def dump_stats(self):
+        """
+        Write the job metrics to stats_file and metrics_file, if configured
+        :return:
+        """
+        if not self.stats_file and not self.metrics_file:
+            return
+        try:
+            write_stats(self.stats(), self.stats_file, self.metrics_file)
+        except OSError as e:
+            logger.warning("JobRunner: cannot write job metrics: %s", e)
+
+    def _push(self, queue: list, index: int, state: JobState):
+        """
+        Add a job to the run_loop() queue, if it will run again
+        """
+        due = self._due(state)
+        if due is not None:
+            if state.interval <= 0 and state.cron is None:
+                due = max(due, state.last_run + self.MIN_INTERVAL)
+            if not state.owned:
+                # owned by another node; don't poll the coordinator on every iteration
+                due = max(due, state.last_run + self.LEASE_RETRY)
+            heapq.heappush(queue, (due, index))
+
+    def wakeup(self):
+        """
+        Interrupt the run_loop() wait, so due times are re-evaluated; can be called from other threads
+        :return:
+        """
+        waker = self._waker
+        if waker is not None:
+            waker.wake()
+
+    def stop(self):
+        """
+        Stop run_loop() after the current iteration; can be called from other threads
+        :return:
+        """
+        self._stopped = True
+        self.wakeup()
 
     def run_loop(self, di, signal_manager=None, abort_callback=None):
         """
@@ -129,16 +823,101 @@ class JobRunner:
         :param signal_manager: optional signal manager for shutdown handling
         :param abort_callback: optional callback for SIGINT handling
         """
-        import signal as signal_mod
-
         if signal_manager and abort_callback:
-            signal_manager.add_handler(signal_mod.SIGINT, abort_callback)
+            signal_manager.add_handler(signal.SIGINT, abort_callback)
 
         if not self.silent and self.tty:
             self.tty.write("\nRunning jobs, press CTRL+C to abort...")
 
-        while True:
-            for state in self.states:
-                self._execute_job(state, di)
-            # prevent busy-loop if no job provides its own sleep/idle
-            time.sleep(0.1)
+        self._stopped = False
+        self._waker = _Waker()
+        old_wakeup_fd = None
+        try:
+            # received signals interrupt the wait
+            old_wakeup_fd = signal.set_wakeup_fd(
+                self._waker.fileno(), warn_on_full_buffer=False
+            )
+        except ValueError:
+            # not running in the main thread
+            pass
+
+        queue = []
+        for index, state in enumerate(self.states):
+            self._push(queue, index, state)
+
+        dump_stats = bool(self.stats_file or self.metrics_file)
+        next_dump = time.monotonic() + self.stats_interval
+        try:
+            while not self._stopped:
+                # reschedule finished pool runs
+                for index, state in enumerate(self.states):
+                    if state.future is not None and state.future.done():
+                        self._complete(state)
+                        self._push(queue, index, state)
+
+                now = time.monotonic()
+                while len(queue) > 0 and queue[0][0] <= now and not self._stopped:
+                    _, index = heapq.heappop(queue)
+                    state = self.states[index]
+                    if self.workers == 0:
+                        self._execute_job(state, di)
+                        self._push(queue, index, state)
+                        # jobs may run for a long time; check the queue head again
+                        now = time.monotonic()
+                    elif state.future is None:
+                        if self._claim(state):
+                            # pushed again when the run finishes
+                            self._submit(state, di)
+                        else:
+                            self._push(queue, index, state)
+
+                if dump_stats and time.monotonic() >= next_dump:
+                    self.dump_stats()
+                    next_dump = time.monotonic() + self.stats_interval
+
+                timeout = None
+                if len(queue) > 0:
+                    timeout = max(0.0, queue[0][0] - time.monotonic())
+                if dump_stats:
+                    until_dump = max(0.0, next_dump - time.monotonic())
+                    timeout = (
+                        until_dump if timeout is None else min(timeout, until_dump)
+                    )
+                self._waker.wait(timeout)
+        finally:
+            if old_wakeup_fd is not None:
+                signal.set_wakeup_fd(old_wakeup_fd)
+            self._waker.close()
+            self._waker = None
+            self.dump_stats()
+
+    def shutdown(self, wait_running: bool = True):
+        """
+        Stop the worker pool, if any, and release job leases; queued runs are cancelled
+        :param wait_running: if True, wait for running jobs to finish; if False, the leases of running jobs are
+        kept, and released when their runs finish
+        :return:
+        """
+        pool = self._pool
+        self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=wait_running, cancel_futures=True)
+        if self.coordinator is None:
+            return
+
+        running = [
+            state
+            for state in self.states
+            if state.future is not None and not state.future.done()
+        ]
+        if len(running) == 0:
+            self._heartbeat_stop.set()
+            self.coordinator.release_all()
+            return
+
+        for state in self.states:
+            if state.distributed and state not in running:
+                self._release_lease(state)
+        for state in running:
+            if state.distributed:
+                state.future.add_done_callback(partial(self._release_lease, state))
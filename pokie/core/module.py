@@ -20,9 +20,15 @@ class BaseModule(Injectable, abc.ABC):
     # events
     events = {}
 
+    # event dispatch modes, by event name ("sync", "async" or "task")
+    event_dispatch = {}
+
     # jobs
     jobs = []
 
+    # task handlers, by task name
+    tasks = {}
+
     # fixtures
     fixtures = []
 
@@ -36,8 +42,12 @@ class BaseModule(Injectable, abc.ABC):
             self.cmd = {}
         if "events" not in type(self).__dict__:
             self.events = {}
+        if "event_dispatch" not in type(self).__dict__:
+            self.event_dispatch = {}
         if "jobs" not in type(self).__dict__:
             self.jobs = []
+        if "tasks" not in type(self).__dict__:
+            self.tasks = {}
         if "fixtures" not in type(self).__dict__:
             self.fixtures = []
 
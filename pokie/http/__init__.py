@@ -1,5 +1,11 @@
 from .view import PokieView, PokieAuthView
 from .routes import AutoRouter
 from .http_error import HttpErrorHandler
-from .response import ResponseRendererInterface, JsonResponse, CamelCaseJsonResponse
+from .response import (
+    ResponseRendererInterface,
+    JsonResponse,
+    CamelCaseJsonResponse,
+    JsonStreamResponse,
+    CamelCaseJsonStreamResponse,
+)
 from .dbgrid import DbGridRequest
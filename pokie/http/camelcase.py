@@ -0,0 +1,116 @@
+import dataclasses
+import datetime
+import decimal
+import uuid
+from collections.abc import Mapping
+
+import humps
+
+
+class CamelCaseDict(dict):
+    """
+    dict with already translated keys and values; returned as-is by CamelCaseTranslator
+    """
+
+    pass
+
+
+class CamelCaseList(list):
+    """
+    list of already translated values; returned as-is by CamelCaseTranslator
+    """
+
+    pass
+
+
+class CamelCaseTranslator:
+    """
+    Single-pass camelCase translation of response payloads
+
+    Produces the same result as humps.camelize() followed by CamelCaseJsonEncoder: dict keys are camelCased, and
+    Records, dataclasses and other objects serialized via their attributes are converted to camelCased dicts while the
+    payload is walked, so the encoder does not need to convert them again. Translated keys are memoized, as the same
+    keys repeat across rows; only str keys are memoized.
+
+    Values the encoder serializes as strings (dates, Decimal, UUID, objects with __html__) are kept as-is, as are
+    tuples, which humps.camelize() does not traverse. CamelCaseDict and CamelCaseList objects are considered already
+    translated, and are not traversed.
+    """
+
+    # max amount of memoized keys; keys not in the table are still translated when the limit is reached
+    max_keys = 8192
+
+    # types that are not traversed
+    passthrough_types = (
+        datetime.date,
+        decimal.Decimal,
+        uuid.UUID,
+        tuple,
+    )
+
+    def __init__(self):
+        self._keys = {}
+
+    def key(self, name) -> str:
+        """
+        Translate a key to camelCase
+        :param name:
+        :return: str
+        """
+        if type(name) is not str:
+            # True, 1 and 1.0 are equal dict keys, but translate differently
+            return humps.camelize(name)
+        result = self._keys.get(name, None)
+        if result is None:
+            result = humps.camelize(name)
+            if len(self._keys) < self.max_keys:
+                self._keys[name] = result
+        return result
+
+    def translate(self, obj):
+        """
+        Translate a payload to camelCase
+        :param obj:
+        :return: translated object
+        """
+        t = type(obj)
+        if t is str or t is int or t is float or t is bool or obj is None:
+            return obj
+        if t is dict:
+            key = self.key
+            translate = self.translate
+            return {key(k): translate(v) for k, v in obj.items()}
+        if t is list:
+            translate = self.translate
+            return [translate(v) for v in obj]
+        if t is CamelCaseDict or t is CamelCaseList:
+            return obj
+        if isinstance(obj, Mapping):
+            key = self.key
+            translate = self.translate
+            return {key(k): translate(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            translate = self.translate
+            return [translate(v) for v in obj]
+        if isinstance(obj, (str, int, float)) or isinstance(
+            obj, self.passthrough_types
+        ):
+            return obj
+
+        # objects serialized via CamelCaseJsonEncoder.default(), in the same order
+        if dataclasses.is_dataclass(obj):
+            return self.translate(dataclasses.asdict(obj))
+        if hasattr(obj, "__html__"):
+            return obj
+        if hasattr(obj, "asdict") and callable(getattr(obj, "asdict", None)):
+            return self.translate(obj.asdict())
+        try:
+            values = obj.__dict__
+        except AttributeError:
+            # not serializable; let the encoder handle it
+            return obj
+        return self.translate(values)
+
+
+# shared translator
+camel_case_translator = CamelCaseTranslator()
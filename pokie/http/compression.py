@@ -0,0 +1,302 @@
+import zlib
+from typing import Iterable, List, Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+from flask import has_request_context, request
+from werkzeug.wrappers import Response
+
+from pokie.constants import (
+    RESPONSE_ENCODING_GZIP,
+    RESPONSE_ENCODING_BROTLI,
+    RESPONSE_ENCODING_ZSTD,
+)
+
+# WSGI environ key; if set, compress_response() leaves responses uncompressed (see PokieView.cached_dispatch())
+ENVIRON_DEFER_COMPRESSION = "pokie.compression.defer"
+
+
+class Compressor:
+    """
+    Response body compressor
+    """
+
+    # Content-Encoding name
+    encoding = None
+    # default compression level
+    level = None
+
+    def __init__(self, level: int = None):
+        if level is not None:
+            self.level = level
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Compress a body
+        :param data:
+        :return: bytes
+        """
+        raise NotImplementedError
+
+    def stream(self):
+        """
+        Create a streaming compressor
+        :return: object with compress(chunk) and finish() methods; the output of compress() is flushed, so each
+        chunk can be decompressed by the client as soon as it is received
+        """
+        raise NotImplementedError
+
+
+class _ZlibStream:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._obj.compress(chunk) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class GzipCompressor(Compressor):
+    encoding = RESPONSE_ENCODING_GZIP
+    level = 6
+
+    def compress(self, data: bytes) -> bytes:
+        obj = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return obj.compress(data) + obj.flush()
+
+    def stream(self):
+        return _ZlibStream(self.level)
+
+
+class _BrotliStream:
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._obj.process(chunk) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class BrotliCompressor(Compressor):
+    encoding = RESPONSE_ENCODING_BROTLI
+    level = 5
+
+    @classmethod
+    def available(cls) -> bool:
+        return brotli is not None
+
+    def compress(self, data: bytes) -> bytes:
+        return brotli.compress(data, quality=self.level)
+
+    def stream(self):
+        return _BrotliStream(self.level)
+
+
+class _ZstdStream:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._obj.compress(chunk) + self._obj.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class ZstdCompressor(Compressor):
+    encoding = RESPONSE_ENCODING_ZSTD
+    level = 3
+
+    @classmethod
+    def available(cls) -> bool:
+        return zstandard is not None
+
+    def compress(self, data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def stream(self):
+        return _ZstdStream(self.level)
+
+
+COMPRESSORS = {
+    RESPONSE_ENCODING_GZIP: GzipCompressor,
+    RESPONSE_ENCODING_BROTLI: BrotliCompressor,
+    RESPONSE_ENCODING_ZSTD: ZstdCompressor,
+}
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """
+    Parse an Accept-Encoding header
+    :param header:
+    :return: dict of {encoding: quality}
+    """
+    result = {}
+    for item in (header or "").split(","):
+        parts = item.strip().split(";")
+        name = parts[0].strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        result[name] = quality
+    return result
+
+
+class ResponseCompression:
+    """
+    Response compression settings
+
+    Bodies are compressed with the encoding accepted by the client (Accept-Encoding) that has the highest quality;
+    ties are resolved by the order of the configured encodings
+    """
+
+    def __init__(self, encodings: Iterable, threshold: int = 1024):
+        """
+        Constructor
+        :param encodings: list of encodings, in order of preference; see COMPRESSORS
+        :param threshold: minimum body size to compress, in bytes; streamed bodies are always compressed
+        """
+        self.compressors = {}
+        for name in encodings:
+            name = name.strip().lower()
+            if not name:
+                continue
+            cls = COMPRESSORS.get(name, None)
+            if cls is None:
+                raise ValueError(
+                    "ResponseCompression: invalid encoding '{}'".format(name)
+                )
+            if not cls.available():
+                raise RuntimeError(
+                    "ResponseCompression: encoding '{}' is not available; is the package installed?".format(
+                        name
+                    )
+                )
+            self.compressors[name] = cls()
+        self.encodings = list(self.compressors.keys())  # type: List[str]
+        self.threshold = threshold
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """
+        Select an encoding
+        :param accept_encoding: Accept-Encoding header value
+        :return: encoding name, or None if no compression should be used
+        """
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        best = None
+        best_quality = 0.0
+        for name in self.encodings:
+            quality = accepted.get(name, wildcard)
+            if quality > best_quality:
+                best = name
+                best_quality = quality
+        return best
+
+    def compressor(self, encoding: str) -> Compressor:
+        return self.compressors[encoding]
+
+    def compress_response(self, response: Response, encoding: str) -> Response:
+        """
+        Compress a response body in place
+        :param response:
+        :param encoding: encoding returned by negotiate(), or None
+        :return: Response
+        """
+        response.vary.add("Accept-Encoding")
+        if encoding is None or "Content-Encoding" in response.headers:
+            return response
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return response
+
+        compressor = self.compressors[encoding]
+        if response.is_streamed:
+            response.response = compress_stream(response.response, compressor)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < self.threshold:
+                return response
+            response.set_data(compressor.compress(data))
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+def compress_stream(chunks: Iterable, compressor: Compressor):
+    """
+    Compress a streamed body
+    :param chunks: iterable of str or bytes
+    :param compressor:
+    :return: generator
+    """
+    stream = compressor.stream()
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if chunk:
+                data = stream.compress(chunk)
+                if data:
+                    yield data
+        yield stream.finish()
+    finally:
+        # close the wrapped iterable (such as a stream_with_context() generator) in this context
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def app_response_compression(_app) -> Optional[ResponseCompression]:
+    """
+    Get the response compression settings for a Flask application
+    :param _app: Flask application
+    :return: ResponseCompression, or None if compression is disabled
+    """
+    compression = getattr(_app, "response_compression", None)
+    if compression is None or len(compression.encodings) == 0:
+        return None
+    return compression
+
+
+def compress_response(_app, response):
+    """
+    Compress a response according to the application settings and the request Accept-Encoding header
+    :param _app: Flask application
+    :param response: Response
+    :return: Response
+    """
+    compression = app_response_compression(_app)
+    if (
+        compression is None
+        or not isinstance(response, Response)
+        or not has_request_context()
+        or request.environ.get(ENVIRON_DEFER_COMPRESSION, False)
+    ):
+        return response
+    return compression.compress_response(
+        response, compression.negotiate(request.headers.get("Accept-Encoding", ""))
+    )
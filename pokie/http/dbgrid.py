@@ -5,7 +5,12 @@ from rick.form import RequestRecord, field
 from rick.mixin import Translator
 import humps
 
-from pokie.constants import DEFAULT_LIST_SIZE, MAX_LIST_SIZE
+from pokie.constants import (
+    DEFAULT_LIST_SIZE,
+    MAX_LIST_SIZE,
+    LIST_COUNT_EXACT,
+    LIST_COUNT_MODES,
+)
 
 
 class DbGridRequest(RequestRecord):
@@ -14,6 +19,8 @@ class DbGridRequest(RequestRecord):
     FIELD_SORT = "sort"
     FIELD_MATCH = "match"
     FIELD_SEARCH = "search"
+    FIELD_CURSOR = "cursor"
+    FIELD_COUNT = "count"
 
     fields = {
         FIELD_OFFSET: field(validators="numeric", value=0),
@@ -21,6 +28,8 @@ class DbGridRequest(RequestRecord):
         FIELD_SORT: field(),
         FIELD_MATCH: field(),
         FIELD_SEARCH: field(),
+        FIELD_CURSOR: field(),
+        FIELD_COUNT: field(),
     }
 
     def __init__(
@@ -145,13 +154,56 @@ class DbGridRequest(RequestRecord):
         self.fields[self.FIELD_LIMIT].value = limit
         return True
 
+    def validator_cursor(self, data, t: Translator):
+        cursor = data.get(self.FIELD_CURSOR, None)
+        if cursor is not None:
+            if not isinstance(cursor, str):
+                self.add_error(self.FIELD_CURSOR, t.t("invalid cursor value"))
+                return False
+            # an empty cursor requests the first page in cursor mode
+            cursor = cursor.strip()
+            offset = self.fields[self.FIELD_OFFSET].value
+            if offset is not None and int(offset) != 0:
+                self.add_error(
+                    self.FIELD_CURSOR, t.t("cursor cannot be combined with offset")
+                )
+                return False
+
+        self.fields[self.FIELD_CURSOR].value = cursor
+        return True
+
+    def validator_count(self, data, t: Translator):
+        count = data.get(self.FIELD_COUNT, None)
+        if count is not None:
+            if (
+                not isinstance(count, str)
+                or count.strip().lower() not in LIST_COUNT_MODES
+            ):
+                self.add_error(self.FIELD_COUNT, t.t("invalid count mode"))
+                return False
+            count = count.strip().lower()
+
+        self.fields[self.FIELD_COUNT].value = count
+        return True
+
+    def has_cursor(self) -> bool:
+        """
+        Returns True if the request uses cursor (keyset) pagination
+        :return: bool
+        """
+        return self.fields[self.FIELD_CURSOR].value is not None
+
     def dbgrid_parameters(
-        self, list_limit: int = 0, search_fields: list = None
+        self, list_limit: int = 0, search_fields: list = None, count_mode: str = None
     ) -> dict:
         """
         Return a list of parameters to be used as argument for DbGrid.run()
+
+        The count mode specified in the request takes precedence over count_mode; count_mode is only included in
+        the result if it is not LIST_COUNT_EXACT, to keep compatibility with custom list() implementations
         :param list_limit:
         :param search_fields:
+        :param count_mode: optional default count mode
         :return:
         """
         offset = self.fields[self.FIELD_OFFSET].value
@@ -168,7 +220,7 @@ class DbGridRequest(RequestRecord):
         if offset is None and limit is None and list_limit > 0:
             limit = list_limit
 
-        return {
+        result = {
             "search_text": self.fields[self.FIELD_SEARCH].value,
             "match_fields": self.fields[self.FIELD_MATCH].value,
             "limit": limit,
@@ -176,3 +228,39 @@ class DbGridRequest(RequestRecord):
             "sort_fields": self.fields[self.FIELD_SORT].value,
             "search_fields": search_fields,
         }
+
+        if self.fields[self.FIELD_COUNT].value is not None:
+            count_mode = self.fields[self.FIELD_COUNT].value
+        if count_mode is not None and count_mode != LIST_COUNT_EXACT:
+            result["count_mode"] = count_mode
+        return result
+
+    def keyset_parameters(
+        self, list_limit: int = 0, search_fields: list = None
+    ) -> dict:
+        """
+        Return a list of parameters to be used as argument for RestServiceMixin.seek()
+
+        Cursor pagination always requires a page size; if no limit is specified, list_limit is used
+        when positive, otherwise DEFAULT_LIST_SIZE
+        :param list_limit:
+        :param search_fields:
+        :return:
+        """
+        limit = self.fields[self.FIELD_LIMIT].value
+        if limit is not None:
+            limit = int(limit)
+        elif list_limit > 0:
+            limit = list_limit
+        else:
+            limit = DEFAULT_LIST_SIZE
+
+        cursor = self.fields[self.FIELD_CURSOR].value
+        return {
+            "search_text": self.fields[self.FIELD_SEARCH].value,
+            "match_fields": self.fields[self.FIELD_MATCH].value,
+            "limit": limit,
+            "cursor": cursor if cursor else None,
+            "sort_fields": self.fields[self.FIELD_SORT].value,
+            "search_fields": search_fields,
+        }
@@ -0,0 +1,197 @@
+import json
+import re
+from abc import ABC, abstractmethod
+from typing import Type, Union, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+from pokie.constants import JSON_BACKEND_AUTO, JSON_BACKEND_STDLIB, JSON_BACKEND_ORJSON
+
+
+class JsonBackend(ABC):
+    """
+    JSON serialization backend
+
+    Backends serialize objects using a json.JSONEncoder class - such as ExtendedJsonEncoder or CamelCaseJsonEncoder -
+    to convert non-native types
+    """
+
+    name = None
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    @abstractmethod
+    def dumps(
+        self, obj, encoder: Type[json.JSONEncoder], pretty: bool = False
+    ) -> Union[str, bytes]:
+        """
+        Serialize an object
+        :param obj: object to serialize
+        :param encoder: JSONEncoder class used for non-native types
+        :param pretty: if True, output is indented
+        :return: str or utf-8 encoded bytes
+        """
+        pass
+
+    def dumps_str(
+        self, obj, encoder: Type[json.JSONEncoder], pretty: bool = False
+    ) -> str:
+        """
+        Serialize an object to str
+        :param obj: object to serialize
+        :param encoder: JSONEncoder class used for non-native types
+        :param pretty: if True, output is indented
+        :return: str
+        """
+        result = self.dumps(obj, encoder, pretty)
+        if isinstance(result, bytes):
+            return result.decode("utf-8")
+        return result
+
+
+class StdlibJsonBackend(JsonBackend):
+    """
+    json.dumps() backend
+    """
+
+    name = JSON_BACKEND_STDLIB
+
+    def dumps(
+        self, obj, encoder: Type[json.JSONEncoder], pretty: bool = False
+    ) -> Union[str, bytes]:
+        if pretty:
+            return json.dumps(obj, indent=2, separators=(", ", ": "), cls=encoder)
+        return json.dumps(obj, separators=(",", ":"), cls=encoder)
+
+
+class OrjsonBackend(StdlibJsonBackend):
+    """
+    orjson backend
+
+    Native types are serialized by orjson; datetime and dataclass objects, as well as other non-native types, are
+    passed to the encoder default() method, as with json.dumps(). Non-ASCII characters are escaped as json.dumps()
+    does by default.
+
+    Objects orjson cannot serialize (e.g. integers larger than 64 bits) are serialized with json.dumps() instead.
+
+    The output differs from json.dumps() for some values: floats in exponent notation (1e16 instead of 1e+16,
+    1e-05 is 0.00001), NaN and Infinity (serialized as null) and Enum members (serialized as their value, while
+    ExtendedJsonEncoder raises an error); this backend is only used if explicitly selected
+    """
+
+    name = JSON_BACKEND_ORJSON
+
+    options = (
+        orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_NON_STR_KEYS
+        if orjson
+        else 0
+    )
+
+    # non-ASCII characters to escape
+    re_escape = re.compile(r"[^\x00-\x7f]")
+
+    def __init__(self):
+        # encoder default() hooks, by encoder class
+        self._hooks = {}
+
+    @classmethod
+    def available(cls) -> bool:
+        return orjson is not None
+
+    def dumps(
+        self, obj, encoder: Type[json.JSONEncoder], pretty: bool = False
+    ) -> Union[str, bytes]:
+        hook = self._hooks.get(encoder, None)
+        if hook is None:
+            hook = encoder().default
+            self._hooks[encoder] = hook
+
+        try:
+            if pretty:
+                result = orjson.dumps(
+                    obj, default=hook, option=self.options | orjson.OPT_INDENT_2
+                )
+                # json.dumps() uses ", " as item separator, even at the end of the line; newlines within strings
+                # are always escaped, so ",\n" only occurs between items
+                result = result.replace(b",\n", b", \n")
+            else:
+                result = orjson.dumps(obj, default=hook, option=self.options)
+        except TypeError:
+            # orjson.JSONEncodeError is a TypeError; json.dumps() either succeeds or raises the original error
+            return super().dumps(obj, encoder, pretty)
+
+        if result.isascii():
+            return result
+        return self.re_escape.sub(self._escape, result.decode("utf-8"))
+
+    @staticmethod
+    def _escape(match) -> str:
+        c = ord(match.group(0))
+        if c < 0x10000:
+            return "\\u{0:04x}".format(c)
+        # surrogate pair
+        c -= 0x10000
+        return "\\u{0:04x}\\u{1:04x}".format(
+            0xD800 | ((c >> 10) & 0x3FF), 0xDC00 | (c & 0x3FF)
+        )
+
+
+JSON_BACKENDS = {
+    JSON_BACKEND_STDLIB: StdlibJsonBackend,
+    JSON_BACKEND_ORJSON: OrjsonBackend,
+}
+
+# backend instances, by name
+_backends = {}
+
+
+def get_json_backend(name: Optional[str] = JSON_BACKEND_STDLIB) -> JsonBackend:
+    """
+    Get a JSON backend by name
+    If name is empty, the json module backend is used; if name is JSON_BACKEND_AUTO, the fastest available backend
+    :param name: backend name
+    :return: JsonBackend
+    """
+    if not name:
+        name = JSON_BACKEND_STDLIB
+    elif name == JSON_BACKEND_AUTO:
+        name = JSON_BACKEND_ORJSON if OrjsonBackend.available() else JSON_BACKEND_STDLIB
+
+    backend = _backends.get(name, None)
+    if backend is None:
+        cls = JSON_BACKENDS.get(name, None)
+        if cls is None:
+            raise ValueError("get_json_backend(): invalid backend '{}'".format(name))
+        if not cls.available():
+            raise RuntimeError(
+                "get_json_backend(): backend '{}' is not available; is the package installed?".format(
+                    name
+                )
+            )
+        backend = cls()
+        _backends[name] = backend
+    return backend
+
+
+def app_json_backend(_app, name: Optional[str] = None) -> JsonBackend:
+    """
+    Get the JSON backend for a Flask application
+    If name is specified, that backend is used; otherwise, the application backend is used if set, or the json module
+    backend
+    :param _app: Flask application
+    :param name: optional backend name
+    :return: JsonBackend
+    """
+    if name is not None:
+        return get_json_backend(name)
+    backend = getattr(_app, "json_backend", None)
+    if backend is None:
+        return get_json_backend()
+    return backend
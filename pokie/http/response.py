@@ -1,9 +1,15 @@
 import json
-from typing import Type
+import logging
+from typing import Type, Iterable
 from collections.abc import Mapping
-import humps
+from flask import stream_with_context
 from rick.serializer.json.json import CamelCaseJsonEncoder, ExtendedJsonEncoder
 from pokie.constants import HTTP_OK
+from .json_backend import JsonBackend, get_json_backend, app_json_backend
+from .camelcase import camel_case_translator
+from .compression import compress_response
+
+logger = logging.getLogger(__name__)
 
 
 class ResponseRendererInterface:
@@ -48,6 +54,10 @@ class JsonResponse(ResponseRendererInterface):
     mime_type = "application/json"
     # default error message
     msg_default_error = "an error has occurred"
+    # optional JSON backend name; if None, the application backend is used (see CFG_JSON_BACKEND)
+    json_backend = None
+    # if True, the response is compressed according to the application settings (see CFG_RESPONSE_COMPRESSION)
+    compress = True
 
     def __init__(
         self,
@@ -99,19 +109,29 @@ class JsonResponse(ResponseRendererInterface):
         :param _app:
         :return: Response
         """
-        indent = None
-        separators = (",", ":")
-
-        if not _app.json.compact or _app.debug:
-            indent = 2
-            separators = (", ", ": ")
-
-        data = json.dumps(
-            self.response, indent=indent, separators=separators, cls=self.serializer()
-        )
-        return _app.response_class(
+        pretty = not _app.json.compact or _app.debug
+        data = self.backend(_app).dumps(self.payload(), self.serializer(), pretty)
+        response = _app.response_class(
             data, status=self.code, mimetype=self.mime_type, headers=self.headers
         )
+        if self.compress:
+            response = compress_response(_app, response)
+        return response
+
+    def payload(self):
+        """
+        Get the object to serialize
+        :return:
+        """
+        return self.response
+
+    def backend(self, _app) -> JsonBackend:
+        """
+        Get JSON backend
+        :param _app:
+        :return: JsonBackend
+        """
+        return app_json_backend(_app, self.json_backend)
 
     def serializer(self) -> Type[json.JSONEncoder]:
         """
@@ -122,28 +142,158 @@ class JsonResponse(ResponseRendererInterface):
 
 
 class CamelCaseJsonResponse(JsonResponse):
+    def payload(self):
+        """
+        Get the object to serialize, with camelCased keys
+        Keys are translated in a single pass, including the ones from Record objects
+        :return:
+        """
+        return camel_case_translator.translate(self.response)
+
+    def serializer(self) -> Type[json.JSONEncoder]:
+        """
+        Get JSON serializer
+        :return:
+        """
+        return CamelCaseJsonEncoder
+
+
+class JsonStreamResponse:
+    """
+    Streaming JSON response formatter
+
+    Rows are consumed from an iterable and serialized one at a time, and sent to the client using chunked transfer
+    encoding; memory usage does not depend on the amount of rows. Rows are written either as NDJSON (one JSON document
+    per line) or as a JSON array.
+
+    Note: the status code is sent before the first row is read; errors while iterating the rows are logged, and
+    error_record is written as the last row so clients can detect the truncated output. JSON arrays are also left
+    unterminated, so they fail to parse
+    """
+
+    # mime types
+    mime_type = "application/x-ndjson"
+    mime_type_array = "application/json"
+
+    # approximate size of each sent chunk, in characters
+    chunk_size = 65536
+
+    # optional JSON backend name; if None, the application backend is used (see CFG_JSON_BACKEND)
+    json_backend = None
+    # if True, the response is compressed according to the application settings (see CFG_RESPONSE_COMPRESSION)
+    compress = True
+
+    # terminal row written when iterating the rows fails
+    error_record = {"success": False, "error": {"message": "stream interrupted"}}
+
+    def __init__(
+        self,
+        rows: Iterable,
+        as_array: bool = False,
+        code: int = HTTP_OK,
+        headers: list = None,
+    ):
+        """
+        Constructor for streaming json response
+        :param rows: iterable of rows to serialize
+        :param as_array: if True, rows are written as a JSON array instead of NDJSON
+        :param code:
+        :param headers:
+        """
+        self.rows = rows
+        self.as_array = as_array
+        self.code = code
+        self.headers = headers
+
+    def generate(self, backend: JsonBackend = None):
+        """
+        Serialize rows, yielding chunks of approximately chunk_size characters
+        :param backend: optional JSON backend
+        :return: generator
+        """
+        if backend is None:
+            backend = get_json_backend(self.json_backend)
+        encoder = self.serializer()
+        separator = "," if self.as_array else "\n"
+        buffer = []
+        size = 0
+        first = True
+
+        if self.as_array:
+            buffer.append("[")
+        try:
+            for row in self.rows:
+                item = backend.dumps_str(self.row_payload(row), encoder)
+                if self.as_array and not first:
+                    item = separator + item
+                elif not self.as_array:
+                    item = item + separator
+                first = False
+                buffer.append(item)
+                size += len(item)
+                if size >= self.chunk_size:
+                    yield "".join(buffer)
+                    buffer = []
+                    size = 0
+        except Exception as e:
+            logger.exception(e)
+            # send what is already serialized, followed by the error marker; arrays are not terminated
+            item = backend.dumps_str(self.error_record, encoder)
+            if self.as_array:
+                item = item if first else separator + item
+            else:
+                item = item + separator
+            buffer.append(item)
+            yield "".join(buffer)
+            return
+
+        if self.as_array:
+            buffer.append("]")
+        if len(buffer) > 0:
+            yield "".join(buffer)
+
+    def row_payload(self, row):
+        """
+        Get the object to serialize for a row
+        :param row:
+        :return:
+        """
+        return row
+
     def assemble(self, _app, **kwargs):
         """
-        Assemble Flask response object
+        Assemble Flask streaming response object
         :param _app:
         :return: Response
         """
-        indent = None
-        separators = (",", ":")
+        response = _app.response_class(
+            stream_with_context(
+                self.generate(app_json_backend(_app, self.json_backend))
+            ),
+            status=self.code,
+            mimetype=self.mime_type_array if self.as_array else self.mime_type,
+            headers=self.headers,
+        )
+        if self.compress:
+            response = compress_response(_app, response)
+        return response
 
-        if not _app.json.compact or _app.debug:
-            indent = 2
-            separators = (", ", ": ")
+    def serializer(self) -> Type[json.JSONEncoder]:
+        """
+        Get JSON serializer
+        :return:
+        """
+        return ExtendedJsonEncoder
 
-        data = json.dumps(
-            humps.camelize(self.response),
-            indent=indent,
-            separators=separators,
-            cls=self.serializer(),
-        )
-        return _app.response_class(
-            data, status=self.code, mimetype=self.mime_type, headers=self.headers
-        )
+
+class CamelCaseJsonStreamResponse(JsonStreamResponse):
+    def row_payload(self, row):
+        """
+        Get the object to serialize for a row, with camelCased keys
+        :param row:
+        :return:
+        """
+        return camel_case_translator.translate(row)
 
     def serializer(self) -> Type[json.JSONEncoder]:
         """
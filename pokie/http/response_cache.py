@@ -0,0 +1,173 @@
+import base64
+import hashlib
+import json
+import uuid
+from typing import Iterable, List, Optional
+
+from rick.resource import CacheInterface
+
+from pokie.constants import RESPONSE_CACHE_PREFIX, RESPONSE_CACHE_TAG_PREFIX
+
+
+def response_etag(body: bytes) -> str:
+    """
+    Compute a strong ETag value for a response body
+    :param body:
+    :return: str (unquoted)
+    """
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def version_etag(version, parts: Iterable = None) -> str:
+    """
+    Compute a strong ETag value from a data version (such as a row updated_at or xmin value)
+    :param version:
+    :param parts: optional list of str identifying the representation, such as the request path
+    :return: str (unquoted)
+    """
+    data = "\n".join(list(parts or []) + [str(version)])
+    return response_etag(data.encode("utf-8"))
+
+
+def record_cache_tag(record_class) -> str:
+    """
+    Get the response cache tag for a Record class
+    :param record_class:
+    :return: str
+    """
+    return "{}.{}".format(record_class.__module__, record_class.__qualname__)
+
+
+# response headers that are not stored in cache entries
+UNCACHED_HEADERS = frozenset(
+    [
+        "cache-control",
+        "content-encoding",
+        "content-length",
+        "content-type",
+        "etag",
+        "set-cookie",
+    ]
+)
+
+
+def _get_many(cache: CacheInterface, keys: list) -> dict:
+    get_many = getattr(cache, "get_many", None)
+    if get_many is not None:
+        return get_many(keys)
+    result = {}
+    for key in keys:
+        value = cache.get(key)
+        if value is not None:
+            result[key] = value
+    return result
+
+
+def _set_many(cache: CacheInterface, values: dict):
+    set_many = getattr(cache, "set_many", None)
+    if set_many is not None:
+        set_many(values)
+        return
+    for key, value in values.items():
+        cache.set(key, value)
+
+
+def tag_versions(cache: CacheInterface, tags: Iterable) -> List[str]:
+    """
+    Get the current version of each tag; missing versions are created
+    Cached responses are keyed on the versions of their tags, so changing a version invalidates all of them
+    :param cache:
+    :param tags:
+    :return: list of versions, in the same order as tags
+    """
+    keys = [RESPONSE_CACHE_TAG_PREFIX + tag for tag in tags]
+    if len(keys) == 0:
+        return []
+    versions = _get_many(cache, keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if len(missing) > 0:
+        _set_many(cache, missing)
+        versions.update(missing)
+    # the raw cache serializer returns bytes
+    return [
+        v.decode("utf-8") if isinstance(v, bytes) else str(v)
+        for v in (versions[key] for key in keys)
+    ]
+
+
+def invalidate_tags(cache: CacheInterface, tags: Iterable):
+    """
+    Invalidate all cached responses for the given tags
+    :param cache:
+    :param tags:
+    :return:
+    """
+    _set_many(
+        cache, {RESPONSE_CACHE_TAG_PREFIX + tag: uuid.uuid4().hex for tag in tags}
+    )
+
+
+def response_cache_key(parts: Iterable) -> str:
+    """
+    Build a response cache key from its parts
+    :param parts: list of str
+    :return: str
+    """
+    digest = hashlib.blake2b("\n".join(parts).encode("utf-8"), digest_size=20)
+    return RESPONSE_CACHE_PREFIX + digest.hexdigest()
+
+
+def pack_entry(entry: dict) -> str:
+    """
+    Encode a cached response as str, so it can be stored with any cache serializer
+    The entry header is a JSON document in the first line, followed by the body; bodies that are not UTF-8 text and
+    compressed bodies are base64-encoded
+    :param entry: dict with body (bytes), content_type, headers, etag and encoded (dict of {encoding: bytes})
+    :return: str
+    """
+    try:
+        body = entry["body"].decode("utf-8")
+        binary = False
+    except UnicodeDecodeError:
+        body = base64.b64encode(entry["body"]).decode("ascii")
+        binary = True
+    header = {
+        "content_type": entry["content_type"],
+        "headers": entry["headers"],
+        "etag": entry["etag"],
+        "binary": binary,
+        "encoded": {
+            encoding: base64.b64encode(data).decode("ascii")
+            for encoding, data in entry["encoded"].items()
+        },
+    }
+    # json.dumps() escapes newlines, so the header is a single line
+    return json.dumps(header, separators=(",", ":")) + "\n" + body
+
+
+def unpack_entry(value) -> Optional[dict]:
+    """
+    Decode a cached response stored with pack_entry()
+    :param value: str, or bytes if stored with the raw cache serializer
+    :return: entry dict, with the body as bytes, or None if value is not a valid entry
+    """
+    if isinstance(value, bytes):
+        value = value.decode("utf-8")
+    if not isinstance(value, str):
+        return None
+    header, sep, body = value.partition("\n")
+    if sep == "":
+        return None
+    try:
+        entry = json.loads(header)
+        entry["encoded"] = {
+            encoding: base64.b64decode(data)
+            for encoding, data in entry["encoded"].items()
+        }
+        if entry.get("binary", False):
+            entry["body"] = base64.b64decode(body)
+        else:
+            entry["body"] = body.encode("utf-8")
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+    return entry
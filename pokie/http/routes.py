@@ -20,6 +20,12 @@ class AutoRouter:
         "delete": [["/{slug}/<{type}:id_record>", ["DELETE"], "_delete"]],
     }
 
+    # optional resource actions, registered with view_method() only if enabled in the class
+    # method_name: [rule, methods, suffix, class attribute that enables the action]
+    resource_extra_action_map = {
+        "export": ["/{slug}/export", ["GET"], "_export", "allow_export"],
+    }
+
     @staticmethod
     def controller(app, slug: str, cls, id_type: str = "int"):
         """
@@ -69,3 +75,14 @@ class AutoRouter:
                         methods=methods,
                         view_func=cls.as_view("{}{}".format(name, suffix)),
                     )
+
+        for method_name, opts in AutoRouter.resource_extra_action_map.items():
+            route, methods, suffix, enable_attr = opts
+            if getattr(cls, enable_attr, False) and callable(
+                getattr(cls, method_name, None)
+            ):
+                app.add_url_rule(
+                    "{}{}".format(prefix, route.format(slug=slug)),
+                    methods=methods,
+                    view_func=cls.view_method(method_name, "{}{}".format(name, suffix)),
+                )
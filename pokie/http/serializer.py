@@ -0,0 +1,153 @@
+import datetime
+import decimal
+import uuid
+from typing import Optional, Iterable, Callable, Dict
+
+from rick_db.mapper import BaseRecord
+
+from .camelcase import CamelCaseDict, CamelCaseList, camel_case_translator
+
+
+class RecordSerializer:
+    """
+    Row serializer compiled for a specific Record class
+
+    The field list and output key names (camelCased, if required) are computed once from the Record field map, so
+    rows are converted to dicts without attribute lookups or per-row key translation. Values are converted to the
+    same representation the JSON encoders would produce (ISO dates, Decimal and UUID as strings); other values are
+    left to the encoder or, in camelCase mode, translated with CamelCaseTranslator.
+
+    Rows that are not instances of the Record class, or Record classes that customize their serialization (asdict()
+    or __html__), use the regular encoder path; the output is always the same as serializing the Record objects.
+    """
+
+    # value converters, by exact value type
+    converters = {
+        datetime.datetime: datetime.datetime.isoformat,
+        datetime.date: datetime.date.isoformat,
+        decimal.Decimal: str,
+        uuid.UUID: str,
+    }
+
+    # additional value converters for snake_case output, as supported by ExtendedJsonEncoder
+    snake_case_converters = {
+        bytes: lambda v: str(v, "utf-8"),
+        memoryview: lambda v: str(v.tobytes(), "utf-8"),
+    }
+
+    # values of these types are not converted
+    native_types = frozenset((str, int, float, bool, type(None)))
+
+    def __init__(
+        self,
+        record_class,
+        camel_case: bool = False,
+        field_converters: Optional[Dict[str, Callable]] = None,
+    ):
+        """
+        Constructor
+        :param record_class: Record class
+        :param camel_case: if True, output keys and nested values are camelCased
+        :param field_converters: optional converters by attribute name, used instead of the type converters
+        """
+        self.record_class = record_class
+        self.camel_case = camel_case
+        self.compiled = self.compilable(record_class)
+
+        converters = dict(self.converters)
+        if not camel_case:
+            converters.update(self.snake_case_converters)
+        self._converters = converters
+
+        if field_converters is None:
+            field_converters = {}
+        fields = []
+        if self.compiled:
+            exclude = record_class._json_exclude
+            for name, dbfield in record_class._fieldmap.items():
+                if name in exclude:
+                    continue
+                key = camel_case_translator.key(name) if camel_case else name
+                fields.append((key, dbfield, field_converters.get(name, None)))
+        self.fields = tuple(fields)
+
+    @staticmethod
+    def compilable(record_class) -> bool:
+        """
+        Check if a Record class is serialized via its field map
+        :param record_class:
+        :return: bool
+        """
+        if record_class is None or hasattr(record_class, "__html__"):
+            return False
+        # fieldmapper() classes have the BaseRecord methods patched in
+        return getattr(record_class, "asdict", None) is BaseRecord.asdict
+
+    def row(self, record):
+        """
+        Serialize a row
+        :param record: Record object
+        :return: dict, or the unmodified object if it is not a record_class instance
+        """
+        if not self.compiled or type(record) is not self.record_class:
+            return self._generic(record)
+
+        attrs = record.__dict__
+        if "_fieldmap" in attrs:
+            # field map was changed with Record.add()
+            return self._generic(record)
+
+        row = attrs["_row"]
+        native = self.native_types
+        converters = self._converters
+        fallback = camel_case_translator.translate if self.camel_case else None
+        result = CamelCaseDict() if self.camel_case else {}
+        for key, dbfield, convert in self.fields:
+            if dbfield in row:
+                value = row[dbfield]
+                if convert is not None:
+                    value = convert(value)
+                elif value.__class__ not in native:
+                    c = converters.get(value.__class__, None)
+                    if c is not None:
+                        value = c(value)
+                    elif fallback is not None:
+                        value = fallback(value)
+                result[key] = value
+        return result
+
+    def rows(self, records: Iterable) -> list:
+        """
+        Serialize a list of rows
+        :param records: iterable of Record objects
+        :return: list
+        """
+        row = self.row
+        if self.camel_case:
+            return CamelCaseList([row(r) for r in records])
+        return [row(r) for r in records]
+
+    def _generic(self, record):
+        if self.camel_case:
+            return camel_case_translator.translate(record)
+        return record
+
+
+# serializer instances, by (record_class, camel_case)
+_serializers = {}
+
+
+def get_record_serializer(record_class, camel_case: bool = False) -> RecordSerializer:
+    """
+    Get the serializer for a Record class
+    Serializers are built once per Record class and output mode
+    :param record_class: Record class
+    :param camel_case: if True, output keys are camelCased
+    :return: RecordSerializer
+    """
+    key = (record_class, camel_case)
+    serializer = _serializers.get(key, None)
+    if serializer is None:
+        serializer = RecordSerializer(record_class, camel_case)
+        _serializers[key] = serializer
+    return serializer
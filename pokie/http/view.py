@@ -1,22 +1,44 @@
 import json
 import logging
+import threading
 from typing import Any, Optional, Callable
+from urllib.parse import urlencode
 from flask import request
 from flask.views import MethodView
 from flask.typing import ResponseReturnValue
 from flask import current_app
 from flask_login import current_user
 from rick.form import RequestRecord
+from rick.resource import CacheInterface
+from werkzeug.wrappers import Response
 
 from .response import JsonResponse, CamelCaseJsonResponse
+from .compression import (
+    ENVIRON_DEFER_COMPRESSION,
+    app_response_compression,
+    compress_response,
+)
+from .response_cache import (
+    response_etag,
+    version_etag,
+    response_cache_key,
+    tag_versions,
+    pack_entry,
+    unpack_entry,
+    UNCACHED_HEADERS,
+)
 from pokie.constants import (
     HTTP_OK,
+    HTTP_NOT_MODIFIED,
     HTTP_BADREQ,
     HTTP_INTERNAL_ERROR,
     HTTP_NOAUTH,
     HTTP_FORBIDDEN,
     DI_SERVICES,
+    DI_CACHE,
     HTTP_NOT_FOUND,
+    RESPONSE_CACHE_SCOPE_USER,
+    RESPONSE_CACHE_SCOPE_ACL,
 )
 
 
@@ -51,6 +73,28 @@ class PokieView(MethodView):
     # these hooks are appended to the dispatch hooks to be executed lastly
     internal_hooks = ["_hook_request"]
 
+    # compiled hook chain for the instance hook lists; see compile_hooks()
+    _hook_chain = None
+
+    # if False, the view object is initialized only once per registered route (on the first request), and each request
+    # is served by a lightweight copy of it; see clone()
+    # Note: instance attributes are shared between copies; __init__ and init_methods must not create state that is
+    # modified during dispatch
+    init_every_request = True
+
+    # if > 0, successful GET responses are stored in DI_CACHE for response_cache_ttl seconds; see cached_dispatch()
+    response_cache_ttl = 0
+    # response cache scope; one of RESPONSE_CACHE_SCOPE_USER, RESPONSE_CACHE_SCOPE_ACL
+    response_cache_scope = RESPONSE_CACHE_SCOPE_USER
+    # Cache-Control header for cacheable responses; by default, clients revalidate them using the ETag
+    response_cache_control = "private, no-cache"
+    # if True, compressed bodies are also stored, so cached responses are compressed only once per encoding
+    response_cache_compressed = True
+
+    # if True, success() adds a strong ETag to GET responses, and answers requests with a matching If-None-Match
+    # header with 304; the ETag is a hash of the response body, unless a data version is passed to success()
+    etag = False
+
     def __init__(self, *args, **kwargs):
         self.di = current_app.di
         self.logger = current_app.logger
@@ -90,6 +134,130 @@ class PokieView(MethodView):
             if callable(fn):
                 fn(**kwargs)
 
+    def clone(self) -> "PokieView":
+        """
+        Create a per-request copy of an initialized view object
+        Instance attributes are shallow-copied, and per-request state is reset
+        :return: PokieView
+        """
+        if self._hook_chain is None:
+            # compile once on the initialized object, so all copies share the result
+            self._hook_chain = self.compile_hooks(
+                self.dispatch_hooks, self.internal_hooks
+            )
+        obj = object.__new__(type(self))
+        obj.__dict__.update(self.__dict__)
+        obj.request = None
+        return obj
+
+    @classmethod
+    def compile_dispatch(cls) -> dict:
+        """
+        Resolve handler methods and class-level dispatch hooks once per class
+        Raises RuntimeError if a hook does not exist; called when routes are registered, so misconfigured views fail
+        at startup
+        :return: dict with the compiled dispatch state
+        """
+        compiled = cls.__dict__.get("_dispatch_compiled", None)
+        if compiled is not None:
+            return compiled
+
+        compiled = {"handlers": {}, "hooks": {}, "last_chain": None}
+        for name in cls.methods or []:
+            cls._compile_handler(compiled, name.lower())
+        # HEAD requests are routed to views with GET
+        cls._compile_handler(compiled, "head")
+        cls._compile_hook_chain(compiled, cls.dispatch_hooks, cls.internal_hooks)
+        # store in the class dict; subclasses must not inherit it
+        setattr(cls, "_dispatch_compiled", compiled)
+        return compiled
+
+    @classmethod
+    def compile_hooks(cls, dispatch_hooks: list, internal_hooks: list) -> tuple:
+        """
+        Resolve a hook chain (dispatch hooks followed by internal hooks) to a tuple of unbound class attributes
+        Results are memoized per class and hook list; the last resolved lists are compared first, so views initialized
+        on every request with the same hooks reuse the chain without building lookup keys
+        :param dispatch_hooks:
+        :param internal_hooks:
+        :return: tuple
+        """
+        compiled = cls.compile_dispatch()
+        last = compiled["last_chain"]
+        if last is not None and last[0] == dispatch_hooks and last[1] == internal_hooks:
+            return last[2]
+
+        chain = cls._compile_hook_chain(compiled, dispatch_hooks, internal_hooks)
+        compiled["last_chain"] = (list(dispatch_hooks), list(internal_hooks), chain)
+        return chain
+
+    @classmethod
+    def _compile_hook_chain(
+        cls, compiled: dict, dispatch_hooks: list, internal_hooks: list
+    ) -> tuple:
+        key = (tuple(dispatch_hooks), tuple(internal_hooks))
+        chain = compiled["hooks"].get(key, None)
+        if chain is None:
+            chain = []
+            for name in key[0] + key[1]:
+                hook = cls._lookup(name)
+                if hook is None:
+                    raise RuntimeError(f"non-existing dispatch hook {name!r}")
+                chain.append(hook)
+            chain = tuple(chain)
+            compiled["hooks"][key] = chain
+        return chain
+
+    @classmethod
+    def _compile_handler(cls, compiled: dict, name: str):
+        handler = compiled["handlers"].get(name, None)
+        if handler is None and name not in compiled["handlers"]:
+            handler = cls._lookup(name)
+            # If the request method is HEAD and we don't have a handler for it
+            # retry with GET.
+            if handler is None and name == "head":
+                handler = cls._lookup("get")
+            compiled["handlers"][name] = handler
+        return handler
+
+    @classmethod
+    def _lookup(cls, name: str):
+        """
+        Find a class attribute by name, without binding it
+        :param name:
+        :return: attribute or None
+        """
+        for klass in cls.__mro__:
+            if name in klass.__dict__:
+                attr = klass.__dict__[name]
+                return attr if hasattr(attr, "__get__") else None
+        return None
+
+    @classmethod
+    def view_factory(cls, *class_args: Any, **class_kwargs: Any) -> Callable:
+        """
+        Build the callable used by route handlers to create a view object for each request
+        If init_every_request is False, a single view object is initialized and cloned on each request
+        :param class_args:
+        :param class_kwargs:
+        :return: Callable
+        """
+        if cls.init_every_request:
+            return lambda: cls(*class_args, **class_kwargs)
+
+        lock = threading.Lock()
+        prototype = []
+
+        def factory() -> PokieView:
+            if not prototype:
+                with lock:
+                    if not prototype:
+                        # initialization requires an application context, so it is postponed to the first request
+                        prototype.append(cls(*class_args, **class_kwargs))
+            return prototype[0].clone()
+
+        return factory
+
     def _hook_request(
         self, method: str, *args: Any, **kwargs: Any
     ) -> Optional[ResponseReturnValue]:
@@ -140,50 +308,69 @@ class PokieView(MethodView):
         :return: ResponseReturnValue
         """
         method = request.method.lower()
-        handler = getattr(self, method, None)
+        cls = type(self)
+        compiled = cls.compile_dispatch()
 
         if method not in self.allow_methods:
             return self.error("method not allowed")
 
-        # If the request method is HEAD and we don't have a handler for it
-        # retry with GET.
-        if handler is None and method == "head":
-            handler = getattr(self, "get", None)
-
         # support for named views
-        if "_action_method_" in kwargs.keys():
-            handler = getattr(self, kwargs["_action_method_"], None)
-            del kwargs["_action_method_"]
-
+        name = kwargs.pop("_action_method_", method)
+        handler = cls._compile_handler(compiled, name)
         if handler is None:
             raise RuntimeError("Cannot resolve handler method for dispatch")
+        handler = handler.__get__(self, cls)
 
         try:
-            # run pre-dispatch hooks
-            hook_list = list(self.dispatch_hooks)
-            hook_list.extend(self.internal_hooks)  # add system hooks
-            for name in hook_list:
-                hook = getattr(self, name, None)
-                if hook is None:
-                    raise RuntimeError(f"non-existing dispatch hook {name!r}")
-                pre = hook(method, *args, **kwargs)
+            hook_chain = self._hook_chain
+            if hook_chain is None:
+                hook_chain = self.compile_hooks(
+                    self.dispatch_hooks, self.internal_hooks
+                )
+
+            # run pre-dispatch hooks, followed by system hooks
+            for hook in hook_chain:
+                pre = hook.__get__(self, cls)(method, *args, **kwargs)
                 if pre is not None:
                     return pre
 
+            if self.response_cache_ttl > 0 and method in ("get", "head"):
+                return self.cached_dispatch(handler, *args, **kwargs)
             return current_app.ensure_sync(handler)(*args, **kwargs)
         except Exception as e:
             return self.exception_handler(e)
 
+    @classmethod
+    def as_view(cls, name: str, *class_args: Any, **class_kwargs: Any) -> Callable:
+        """
+        Flask's as_view, using view_factory() to create the view object for each request
+        :param name: route name
+        :param class_args:
+        :param class_kwargs:
+        :return: Callable
+        """
+        cls.compile_dispatch()
+        if cls.init_every_request:
+            return super().as_view(name, *class_args, **class_kwargs)
+
+        factory = cls.view_factory(*class_args, **class_kwargs)
+
+        def view(*args: Any, **kwargs: Any) -> ResponseReturnValue:
+            self = factory()
+            return current_app.ensure_sync(self.dispatch_request)(*args, **kwargs)
+
+        return cls._wrap_view(view, name)
+
     @classmethod
     def view_method(
         cls, action_method: str, name=None, *class_args: Any, **class_kwargs: Any
     ) -> Callable:
         """
         Variant of Flask's as_view that supports custom handlers for actions
-        :param action_method: method to be called on dispatch 
+        :param action_method: method to be called on dispatch
         :param name: optional route name
-        :param class_args: 
-        :param class_kwargs: 
+        :param class_args:
+        :param class_kwargs:
         :return: Callable
         """
         if name is None:
@@ -191,12 +378,30 @@ class PokieView(MethodView):
                 ".", "_"
             )
 
+        if cls._compile_handler(cls.compile_dispatch(), action_method) is None:
+            raise RuntimeError(
+                "view_method(): method '{}' not found in class {}".format(
+                    action_method, cls.__name__
+                )
+            )
+        factory = cls.view_factory(*class_args, **class_kwargs)
+
         def view(*args: Any, **kwargs: Any) -> ResponseReturnValue:
-            self = view.view_class(*class_args, **class_kwargs)  # type: ignore
+            self = factory()
             # add the action method to the dispatch arguments
             kwargs["_action_method_"] = action_method
             return current_app.ensure_sync(self.dispatch_request)(*args, **kwargs)
 
+        return cls._wrap_view(view, name)
+
+    @classmethod
+    def _wrap_view(cls, view: Callable, name: str) -> Callable:
+        """
+        Apply class decorators and Flask view attributes to a route handler
+        :param view: route handler
+        :param name: route name
+        :return: Callable
+        """
         if getattr(cls, "decorators", None):
             view.__name__ = name
             view.__module__ = cls.__module__
@@ -211,6 +416,149 @@ class PokieView(MethodView):
         view.provide_automatic_options = cls.provide_automatic_options  # type: ignore
         return view
 
+    def cached_dispatch(
+        self, handler: Callable, *args: Any, **kwargs: Any
+    ) -> ResponseReturnValue:
+        """
+        Serve a request from the response cache, or call the handler and cache its response
+
+        Responses are keyed on the request path, query string, cache scope and the versions of the view cache tags;
+        only 200 responses that are not streamed are stored, with their headers (except Set-Cookie)
+        :param handler: bound handler method
+        :param args:
+        :param kwargs:
+        :return: ResponseReturnValue
+        """
+        cache = self.response_cache()
+        if cache is None:
+            return current_app.ensure_sync(handler)(*args, **kwargs)
+
+        # tag versions are read before calling the handler, so a response built while a write is in progress is
+        # stored under the previous versions, and never served
+        parts = [
+            request.path,
+            urlencode(sorted(request.args.items(multi=True))),
+            self.response_cache_scope_key(),
+        ]
+        try:
+            key = response_cache_key(
+                parts + tag_versions(cache, self.response_cache_tags())
+            )
+            entry = unpack_entry(cache.get(key))
+        except Exception as e:
+            # the cache is optional; serve the request without it
+            self.logger.warning("cannot read response cache: %s", e)
+            return current_app.ensure_sync(handler)(*args, **kwargs)
+        store = False
+        if entry is not None:
+            response = current_app.response_class(
+                entry["body"],
+                status=HTTP_OK,
+                headers=entry["headers"],
+                content_type=entry["content_type"],
+            )
+        else:
+            # the response is compressed below, so compressed bodies can be cached
+            request.environ[ENVIRON_DEFER_COMPRESSION] = True
+            try:
+                response = current_app.ensure_sync(handler)(*args, **kwargs)
+            finally:
+                del request.environ[ENVIRON_DEFER_COMPRESSION]
+            if (
+                not isinstance(response, Response)
+                or response.status_code != HTTP_OK
+                or response.is_streamed
+            ):
+                return compress_response(current_app, response)
+
+            entry = {
+                "body": response.get_data(),
+                "content_type": response.content_type,
+                "headers": [
+                    [name, value]
+                    for name, value in response.headers.items()
+                    if name.lower() not in UNCACHED_HEADERS
+                ],
+                "etag": response_etag(response.get_data()),
+                "encoded": {},
+            }
+            store = True
+
+        etag = entry["etag"]
+        compression = app_response_compression(current_app)
+        if compression is not None:
+            response.vary.add("Accept-Encoding")
+            encoding = compression.negotiate(request.headers.get("Accept-Encoding", ""))
+            data = response.get_data()
+            if encoding is not None and len(data) >= compression.threshold:
+                # each representation has its own strong ETag
+                etag = "{}-{}".format(etag, encoding)
+                compressed = entry["encoded"].get(encoding, None)
+                if compressed is None:
+                    compressed = compression.compressor(encoding).compress(data)
+                    if self.response_cache_compressed:
+                        # entries updated with a new encoding get a new TTL
+                        entry["encoded"][encoding] = compressed
+                        store = True
+                response.set_data(compressed)
+                response.headers["Content-Encoding"] = encoding
+
+        if store:
+            try:
+                cache.set(key, pack_entry(entry), self.response_cache_ttl)
+            except Exception as e:
+                self.logger.warning("cannot store response in cache: %s", e)
+        return self.cacheable_response(response, etag)
+
+    def cacheable_response(self, response: Response, etag: str) -> Response:
+        """
+        Add ETag and Cache-Control headers to a response
+        If the request has a matching If-None-Match header, a 304 response without body is returned
+        :param response:
+        :param etag: unquoted ETag value
+        :return: Response
+        """
+        response.headers["Cache-Control"] = self.response_cache_control
+        return self.etag_response(response, etag)
+
+    def etag_response(self, response: Response, etag: str) -> Response:
+        """
+        Add an ETag header to a response
+        If the request has a matching If-None-Match header, a 304 response without body is returned
+        :param response:
+        :param etag: unquoted ETag value
+        :return: Response
+        """
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+    def response_cache(self) -> Optional[CacheInterface]:
+        """
+        Get the response cache
+        :return: CacheInterface, or None if DI_CACHE is not available
+        """
+        if self.di.has(DI_CACHE):
+            return self.di.get(DI_CACHE)
+        return None
+
+    def response_cache_tags(self) -> list:
+        """
+        Get the cache tags of the view responses; invalidating a tag discards all cached responses that use it
+        :return: list of str
+        """
+        return []
+
+    def response_cache_scope_key(self) -> str:
+        """
+        Get the cache key part that identifies who may see a cached response
+        :return: str
+        """
+        if self.response_cache_scope == RESPONSE_CACHE_SCOPE_ACL:
+            return "acl:" + ",".join(sorted(getattr(self, "acl", None) or []))
+        if hasattr(current_app, "login_manager") and current_user.is_authenticated:
+            return "user:" + str(current_user.get_id())
+        return "anonymous"
+
     def exception_handler(self, e) -> ResponseReturnValue:
         """
         Generic exception handler for dispatch
@@ -221,15 +569,52 @@ class PokieView(MethodView):
             self.logger.exception(e)
         return self.error("internal error", code=HTTP_INTERNAL_ERROR)
 
-    def success(self, data=None, code: int = HTTP_OK):
+    def success(self, data=None, code: int = HTTP_OK, version=None):
         """
         Returns a success response with optional data payload
+
+        GET responses carry an ETag if etag is True or a version is specified; if the version ETag matches the
+        If-None-Match request header, a 304 response is returned without serializing the data
         :param data: optional response data
         :param code: int
+        :param version: optional data version, such as a row updated_at or xmin value
         :return: Response
         """
+        conditional = (
+            code == HTTP_OK
+            and (self.etag or version is not None)
+            and request.method in ("GET", "HEAD")
+        )
+        etag = None
+        if conditional and version is not None:
+            etag = version_etag(version, [request.full_path])
+            # compressed representations have their own ETag; for a given version and encoding, the representation
+            # is always the same
+            compression = app_response_compression(current_app)
+            candidates = [etag]
+            if compression is not None:
+                encoding = compression.negotiate(
+                    request.headers.get("Accept-Encoding", "")
+                )
+                if encoding is not None:
+                    candidates.append("{}-{}".format(etag, encoding))
+            for candidate in candidates:
+                if request.if_none_match.contains_weak(candidate):
+                    response = current_app.response_class(status=HTTP_NOT_MODIFIED)
+                    response.set_etag(candidate)
+                    if compression is not None:
+                        response.vary.add("Accept-Encoding")
+                    return response
+
         cls = self.response_class(data=data, success=True, code=code)
-        return cls.assemble(current_app)
+        response = cls.assemble(current_app)
+        if not conditional or not isinstance(response, Response):
+            return response
+        if etag is None:
+            etag = response_etag(response.get_data())
+        elif "Content-Encoding" in response.headers:
+            etag = "{}-{}".format(etag, response.headers["Content-Encoding"])
+        return self.etag_response(response, etag)
 
     def success_message(self, message: str):
         """
@@ -318,6 +703,11 @@ class PokieAuthView(PokieView):
         self.dispatch_hooks.append("_hook_auth")
         self.user = current_user
 
+    def clone(self) -> "PokieAuthView":
+        obj = super().clone()
+        obj.user = current_user
+        return obj
+
     def _hook_auth(
         self, method: str, *args: Any, **kwargs: Any
     ) -> Optional[ResponseReturnValue]:
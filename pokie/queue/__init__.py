@@ -0,0 +1,4 @@
+from .base import Task, TaskHandler, TaskQueue
+from .pgsql import PgTaskQueue
+from .redis import RedisTaskQueue
+from .worker import TaskWorker
@@ -0,0 +1,118 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from rick.mixin import Injectable
+
+from pokie.constants import TASK_QUEUE_DEFAULT
+
+
+@dataclass
+class Task:
+    id: str
+    name: str
+    payload: dict = field(default_factory=dict)
+    queue: str = TASK_QUEUE_DEFAULT
+    attempts: int = 0  # delivery attempts, including the current one
+    max_attempts: int = 0
+    # claim identifier; required by ack(), retry() and fail()
+    receipt: Optional[str] = None
+
+
+class TaskHandler(Injectable):
+    """
+    Base task handler
+
+    Handlers are registered in the module "tasks" dict, and instantiated once per worker
+    """
+
+    def run(self, payload: dict):
+        """
+        Process a task; raising an exception fails the attempt, and the task is retried
+        :param payload:
+        :return:
+        """
+        raise NotImplementedError
+
+
+class TaskQueue:
+    """
+    Persistent task queue interface
+
+    Claimed tasks are invisible to other consumers until acknowledged, retried or failed, or until the visibility
+    timeout expires; in that case, they are delivered again (at-least-once delivery)
+    """
+
+    # default max delivery attempts, if not specified on enqueue()
+    max_attempts = 5
+
+    def enqueue(
+        self,
+        name: str,
+        payload: dict = None,
+        delay: float = 0,
+        queue: str = TASK_QUEUE_DEFAULT,
+        max_attempts: int = None,
+    ) -> str:
+        """
+        Add a task to the queue
+        :param name: task name, as registered in the module "tasks" dict
+        :param payload: JSON-serializable dict
+        :param delay: seconds before the task becomes available
+        :param queue: queue name
+        :param max_attempts: max delivery attempts before the task is marked as failed
+        :return: task id
+        """
+        raise NotImplementedError
+
+    def claim(
+        self, queue: str, count: int, visibility_timeout: float, consumer: str = None
+    ) -> List[Task]:
+        """
+        Claim available tasks
+        :param queue: queue name
+        :param count: max number of tasks to claim
+        :param visibility_timeout: seconds before an unfinished task is delivered again
+        :param consumer: optional consumer name
+        :return: list of Task
+        """
+        raise NotImplementedError
+
+    def ack(self, task: Task):
+        """
+        Remove a completed task
+        :param task:
+        :return:
+        """
+        raise NotImplementedError
+
+    def retry(self, task: Task, delay: float = 0, error: str = None):
+        """
+        Make a claimed task available again
+        :param task:
+        :param delay: seconds before the task becomes available
+        :param error: optional error message of the failed attempt
+        :return:
+        """
+        raise NotImplementedError
+
+    def fail(self, task: Task, error: str = None):
+        """
+        Mark a claimed task as failed; failed tasks are kept for inspection, and are not delivered again
+        :param task:
+        :param error:
+        :return:
+        """
+        raise NotImplementedError
+
+    def pending(self, queue: str = TASK_QUEUE_DEFAULT) -> int:
+        """
+        Count the tasks waiting to be completed, including delayed and claimed tasks
+        :param queue:
+        :return: int
+        """
+        raise NotImplementedError
+
+    def _max_attempts(self, max_attempts: Optional[int]) -> int:
+        if max_attempts is None:
+            return self.max_attempts
+        return max(1, int(max_attempts))
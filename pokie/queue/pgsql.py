@@ -0,0 +1,146 @@
+import json
+import uuid
+from contextlib import contextmanager
+from typing import List
+
+from rick.base import Di
+from rick.mixin import Injectable
+from rick_db.backend.pg import PgConnectionPool
+
+from pokie.constants import DI_DB, TASK_QUEUE_DEFAULT
+from .base import Task, TaskQueue
+
+
+class PgTaskQueue(TaskQueue, Injectable):
+    """
+    PostgreSQL task queue
+
+    Tasks are stored in the task_queue table (see the base module migrations); consumers claim them with
+    SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never block on, or claim, the same rows. Claiming a
+    task pushes its available_at forward by the visibility timeout
+    """
+
+    sql_enqueue = """
+        INSERT INTO task_queue (queue, name, payload, max_attempts, available_at)
+        VALUES (%s, %s, %s::jsonb, %s, now() + make_interval(secs => %s))
+        RETURNING id_task_queue
+    """
+
+    # tasks whose last claim expired after max_attempts deliveries; the expired delivery was counted when claimed
+    sql_expire = """
+        UPDATE task_queue SET status = 'failed', receipt = NULL, last_error = 'visibility timeout expired'
+        WHERE queue = %s AND status = 'pending' AND receipt IS NOT NULL AND available_at <= now()
+            AND attempts >= max_attempts
+    """
+
+    sql_claim = """
+        UPDATE task_queue SET
+            attempts = attempts + 1,
+            receipt = %s,
+            available_at = now() + make_interval(secs => %s)
+        WHERE id_task_queue IN (
+            SELECT id_task_queue FROM task_queue
+            WHERE queue = %s AND status = 'pending' AND available_at <= now()
+                AND (receipt IS NULL OR attempts < max_attempts)
+            ORDER BY available_at, id_task_queue
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id_task_queue, queue, name, payload, attempts, max_attempts
+    """
+
+    sql_ack = "DELETE FROM task_queue WHERE id_task_queue = %s AND receipt = %s"
+
+    sql_retry = """
+        UPDATE task_queue SET
+            receipt = NULL,
+            last_error = %s,
+            available_at = now() + make_interval(secs => %s)
+        WHERE id_task_queue = %s AND receipt = %s
+    """
+
+    sql_fail = """
+        UPDATE task_queue SET status = 'failed', receipt = NULL, last_error = %s
+        WHERE id_task_queue = %s AND receipt = %s
+    """
+
+    sql_pending = "SELECT COUNT(*) AS total FROM task_queue WHERE queue = %s AND status = 'pending'"
+
+    def __init__(self, di: Di):
+        if not di.has(DI_DB):
+            raise RuntimeError("DI_DB not found; maybe PgSqlFactory is missing?")
+        super().__init__(di)
+
+    @contextmanager
+    def conn(self):
+        db = self.get_di().get(DI_DB)
+        if isinstance(db, PgConnectionPool):
+            conn = db.getconn()
+            try:
+                yield conn
+            finally:
+                db.putconn(conn)
+        else:
+            yield db
+
+    def _exec(self, sql: str, params: list) -> list:
+        with self.conn() as conn:
+            with conn.cursor() as c:
+                # commits, if not in a transaction
+                return c.exec(sql, params)
+
+    def enqueue(
+        self,
+        name: str,
+        payload: dict = None,
+        delay: float = 0,
+        queue: str = TASK_QUEUE_DEFAULT,
+        max_attempts: int = None,
+    ) -> str:
+        rows = self._exec(
+            self.sql_enqueue,
+            [
+                queue,
+                name,
+                json.dumps(payload or {}),
+                self._max_attempts(max_attempts),
+                max(0, delay),
+            ],
+        )
+        return str(rows[0]["id_task_queue"])
+
+    def claim(
+        self, queue: str, count: int, visibility_timeout: float, consumer: str = None
+    ) -> List[Task]:
+        receipt = uuid.uuid4().hex
+        self._exec(self.sql_expire, [queue])
+        rows = self._exec(self.sql_claim, [receipt, visibility_timeout, queue, count])
+        result = []
+        for row in rows:
+            result.append(
+                Task(
+                    id=str(row["id_task_queue"]),
+                    name=row["name"],
+                    payload=row["payload"],
+                    queue=row["queue"],
+                    attempts=row["attempts"],
+                    max_attempts=row["max_attempts"],
+                    receipt=receipt,
+                )
+            )
+        # oldest first
+        result.sort(key=lambda task: int(task.id))
+        return result
+
+    def ack(self, task: Task):
+        self._exec(self.sql_ack, [int(task.id), task.receipt])
+
+    def retry(self, task: Task, delay: float = 0, error: str = None):
+        self._exec(self.sql_retry, [error, max(0, delay), int(task.id), task.receipt])
+
+    def fail(self, task: Task, error: str = None):
+        self._exec(self.sql_fail, [error, int(task.id), task.receipt])
+
+    def pending(self, queue: str = TASK_QUEUE_DEFAULT) -> int:
+        rows = self._exec(self.sql_pending, [queue])
+        return rows[0]["total"]
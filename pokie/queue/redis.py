@@ -0,0 +1,241 @@
+import json
+import os
+import socket
+import time
+import uuid
+from typing import List
+
+from redis.exceptions import ResponseError
+from rick.base import Di
+from rick.mixin import Injectable
+
+from pokie.constants import DI_REDIS, TASK_QUEUE_DEFAULT, TASK_QUEUE_PREFIX
+from .base import Task, TaskQueue
+
+
+class RedisTaskQueue(TaskQueue, Injectable):
+    """
+    Redis task queue
+
+    Each queue is a stream read by a consumer group; claimed tasks stay in the group pending list until acknowledged,
+    and tasks idle for longer than the visibility timeout are reclaimed with XAUTOCLAIM. Delayed tasks are kept in a
+    sorted set, and moved to the stream when due. Failed tasks are moved to a separate "<queue>:dead" stream
+
+    Unlike PgTaskQueue, expired claims are detected with the visibility timeout of the consumer claiming tasks, so all
+    consumers of a queue should use the same visibility timeout
+    """
+
+    group = "pokie"
+
+    # max delayed tasks moved to the stream per claim
+    promote_limit = 100
+
+    # move due tasks from the delayed set to the stream
+    lua_promote = """
+local items = redis.call('zrangebyscore', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, item in ipairs(items) do
+    redis.call('xadd', KEYS[2], '*', 'task', item)
+    redis.call('zrem', KEYS[1], item)
+end
+return #items
+"""
+
+    # acknowledge a claimed task and add it to a stream, or to the delayed set; ignored if the claim expired
+    lua_settle = """
+if redis.call('xack', KEYS[1], ARGV[1], ARGV[2]) == 0 then
+    return 0
+end
+redis.call('xdel', KEYS[1], ARGV[2])
+if ARGV[4] == 'delayed' then
+    redis.call('zadd', KEYS[2], ARGV[5], ARGV[3])
+else
+    redis.call('xadd', KEYS[2], '*', 'task', ARGV[3])
+end
+return 1
+"""
+
+    def __init__(self, di: Di, prefix: str = None):
+        """
+        Constructor
+        :param di:
+        :param prefix: optional key prefix
+        """
+        if not di.has(DI_REDIS):
+            raise RuntimeError("DI_REDIS not found; maybe RedisFactory is missing?")
+        super().__init__(di)
+        self._redis = di.get(DI_REDIS)
+        self._prefix = prefix if prefix is not None else TASK_QUEUE_PREFIX
+        self._groups = set()
+        self.consumer = "{}:{}".format(socket.gethostname(), os.getpid())
+
+    def stream_key(self, queue: str) -> str:
+        return self._prefix + queue
+
+    def delayed_key(self, queue: str) -> str:
+        return self._prefix + queue + ":delayed"
+
+    def dead_key(self, queue: str) -> str:
+        return self._prefix + queue + ":dead"
+
+    def _ensure_group(self, queue: str):
+        if queue in self._groups:
+            return
+        try:
+            self._redis.xgroup_create(
+                self.stream_key(queue), self.group, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._groups.add(queue)
+
+    @staticmethod
+    def _serialize(task: Task, error: str = None) -> str:
+        # attempts is the number of finished delivery attempts
+        return json.dumps(
+            {
+                "id": task.id,
+                "name": task.name,
+                "payload": task.payload,
+                "attempts": task.attempts,
+                "max_attempts": task.max_attempts,
+                "last_error": error,
+            }
+        )
+
+    @staticmethod
+    def _deserialize(queue: str, message_id, fields: dict) -> Task:
+        if isinstance(message_id, bytes):
+            message_id = message_id.decode("utf-8")
+        data = fields.get(b"task", fields.get("task"))
+        record = json.loads(data)
+        return Task(
+            id=record["id"],
+            name=record["name"],
+            payload=record["payload"],
+            queue=queue,
+            attempts=record["attempts"],
+            max_attempts=record["max_attempts"],
+            receipt=message_id,
+        )
+
+    def _push(self, pipe, task: Task, delay: float, error: str = None):
+        data = self._serialize(task, error)
+        if delay > 0:
+            pipe.zadd(self.delayed_key(task.queue), {data: time.time() + delay})
+        else:
+            pipe.xadd(self.stream_key(task.queue), {"task": data})
+
+    def enqueue(
+        self,
+        name: str,
+        payload: dict = None,
+        delay: float = 0,
+        queue: str = TASK_QUEUE_DEFAULT,
+        max_attempts: int = None,
+    ) -> str:
+        task = Task(
+            id=uuid.uuid4().hex,
+            name=name,
+            payload=payload or {},
+            queue=queue,
+            max_attempts=self._max_attempts(max_attempts),
+        )
+        self._ensure_group(queue)
+        pipe = self._redis.pipeline(transaction=False)
+        self._push(pipe, task, delay)
+        pipe.execute()
+        return task.id
+
+    def _reclaim(self, queue: str, count: int, visibility_timeout: float, consumer):
+        # tasks whose consumer did not finish them within the visibility timeout; the expired delivery counts as an
+        # attempt, so the task is queued again with an increased attempt count, or moved to the dead stream
+        result = self._redis.xautoclaim(
+            self.stream_key(queue),
+            self.group,
+            consumer,
+            min_idle_time=max(1, int(visibility_timeout * 1000)),
+            start_id="0-0",
+            count=count,
+        )
+        messages = result[1] if len(result) > 1 else []
+        if len(messages) == 0:
+            return
+
+        pipe = self._redis.pipeline(transaction=True)
+        for message_id, fields in messages:
+            pipe.xack(self.stream_key(queue), self.group, message_id)
+            pipe.xdel(self.stream_key(queue), message_id)
+            if not fields:
+                # deleted from the stream
+                continue
+            task = self._deserialize(queue, message_id, fields)
+            task.attempts += 1
+            error = "visibility timeout expired"
+            if task.attempts >= task.max_attempts:
+                pipe.xadd(self.dead_key(queue), {"task": self._serialize(task, error)})
+            else:
+                self._push(pipe, task, 0, error)
+        pipe.execute()
+
+    def claim(
+        self, queue: str, count: int, visibility_timeout: float, consumer: str = None
+    ) -> List[Task]:
+        consumer = consumer or self.consumer
+        self._ensure_group(queue)
+        self._redis.eval(
+            self.lua_promote,
+            2,
+            self.delayed_key(queue),
+            self.stream_key(queue),
+            time.time(),
+            self.promote_limit,
+        )
+        self._reclaim(queue, count, visibility_timeout, consumer)
+
+        response = self._redis.xreadgroup(
+            self.group, consumer, {self.stream_key(queue): ">"}, count=count
+        )
+        result = []
+        for _, messages in response or []:
+            for message_id, fields in messages:
+                task = self._deserialize(queue, message_id, fields)
+                task.attempts += 1
+                result.append(task)
+        return result
+
+    def ack(self, task: Task):
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.xack(self.stream_key(task.queue), self.group, task.receipt)
+        pipe.xdel(self.stream_key(task.queue), task.receipt)
+        pipe.execute()
+
+    def _settle(self, task: Task, target: str, data: str, delay: float = 0):
+        self._redis.eval(
+            self.lua_settle,
+            2,
+            self.stream_key(task.queue),
+            target,
+            self.group,
+            task.receipt,
+            data,
+            "delayed" if delay > 0 else "stream",
+            time.time() + delay,
+        )
+
+    def retry(self, task: Task, delay: float = 0, error: str = None):
+        data = self._serialize(task, error)
+        if delay > 0:
+            self._settle(task, self.delayed_key(task.queue), data, delay)
+        else:
+            self._settle(task, self.stream_key(task.queue), data)
+
+    def fail(self, task: Task, error: str = None):
+        self._settle(task, self.dead_key(task.queue), self._serialize(task, error))
+
+    def pending(self, queue: str = TASK_QUEUE_DEFAULT) -> int:
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.xlen(self.stream_key(queue))
+        pipe.zcard(self.delayed_key(queue))
+        stream, delayed = pipe.execute()
+        return stream + delayed
@@ -0,0 +1,257 @@
+import logging
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Optional
+
+from rick.base import Di
+from rick.mixin import Injectable
+from rick.resource.console import ConsoleWriter
+from rick.util.loader import load_class
+
+from pokie.constants import TASK_QUEUE_DEFAULT
+from .base import Task, TaskHandler, TaskQueue
+
+logger = logging.getLogger(__name__)
+
+
+class TaskWorker(Injectable):
+    """
+    Task queue consumer
+
+    Claims tasks in batches, never more than the free worker threads, and runs them concurrently. Completed tasks are
+    acknowledged; failed tasks are retried with exponential backoff, until max_attempts is reached
+    """
+
+    # max seconds between retries of a failed task
+    MAX_BACKOFF = 300
+
+    def __init__(
+        self,
+        di: Di,
+        queue: TaskQueue,
+        handlers: dict,
+        queue_name: str = TASK_QUEUE_DEFAULT,
+        concurrency: int = 4,
+        batch_size: int = 10,
+        visibility_timeout: float = 300,
+        poll_interval: float = 1,
+        tty: ConsoleWriter = None,
+        silent: bool = False,
+    ):
+        """
+        Constructor
+        :param di:
+        :param queue: TaskQueue to consume
+        :param handlers: dict of {task name: TaskHandler class or class path}
+        :param queue_name: queue name
+        :param concurrency: number of worker threads
+        :param batch_size: max tasks claimed per round trip
+        :param visibility_timeout: seconds before an unfinished task is delivered again
+        :param poll_interval: seconds to wait when the queue is empty
+        :param tty:
+        :param silent:
+        """
+        super().__init__(di)
+        if concurrency < 1 or batch_size < 1:
+            raise ValueError("TaskWorker: concurrency and batch_size must be >= 1")
+        self.queue = queue
+        self.handlers = dict(handlers)
+        self.queue_name = queue_name
+        self.concurrency = int(concurrency)
+        self.batch_size = int(batch_size)
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.tty = tty
+        self.silent = silent
+
+        # counters
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+        self._instances = {}
+        self._running = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._pool = None
+
+    def _handler(self, name: str) -> Optional[TaskHandler]:
+        handler = self._instances.get(name, None)
+        if handler is None:
+            cls = self.handlers.get(name, None)
+            if cls is None:
+                return None
+            if isinstance(cls, str):
+                cls = load_class(cls, raise_exception=True)
+            handler = cls(self.get_di())
+            self._instances[name] = handler
+        return handler
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def backoff(self, attempts: int) -> float:
+        """
+        Get the delay before retrying a failed task
+        :param attempts: delivery attempts so far
+        :return: seconds
+        """
+        return min(2**attempts, self.MAX_BACKOFF)
+
+    def process(self, task: Task) -> bool:
+        """
+        Run a claimed task, and acknowledge, retry or fail it
+        :param task:
+        :return: True if the task completed
+        """
+        try:
+            handler = self._handler(task.name)
+            if handler is None:
+                # retrying will not help
+                self._count("failed")
+                self.queue.fail(task, "unknown task '{}'".format(task.name))
+                logger.error("TaskWorker: unknown task '%s'", task.name)
+                return False
+
+            handler.run(task.payload)
+            self.queue.ack(task)
+            self._count("completed")
+            return True
+
+        except Exception as e:
+            error = "{}: {}".format(type(e).__name__, e)
+            try:
+                if task.attempts >= task.max_attempts:
+                    self._count("failed")
+                    self.queue.fail(task, error)
+                    logger.error(
+                        "TaskWorker: task '%s' (%s) failed after %d attempt(s): %s",
+                        task.name,
+                        task.id,
+                        task.attempts,
+                        error,
+                    )
+                else:
+                    self._count("retried")
+                    self.queue.retry(task, self.backoff(task.attempts), error)
+                    logger.warning(
+                        "TaskWorker: task '%s' (%s) failed, retrying: %s",
+                        task.name,
+                        task.id,
+                        error,
+                    )
+            except Exception:
+                # the task is delivered again when the visibility timeout expires
+                logger.exception("TaskWorker: cannot update task '%s'", task.id)
+            return False
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.concurrency, thread_name_prefix="pokie-task"
+            )
+        return self._pool
+
+    def _done(self, future):
+        with self._lock:
+            self._running.discard(future)
+        self._wakeup.set()
+
+    def free_slots(self) -> int:
+        with self._lock:
+            return self.concurrency - len(self._running)
+
+    def dispatch(self) -> list:
+        """
+        Claim a batch of tasks, up to the free worker threads, and submit them to the pool
+        :return: list of futures
+        """
+        count = min(self.batch_size, self.free_slots())
+        if count < 1:
+            return []
+
+        tasks = self.queue.claim(self.queue_name, count, self.visibility_timeout)
+        pool = self._get_pool()
+        futures = []
+        for task in tasks:
+            future = pool.submit(self.process, task)
+            with self._lock:
+                self._running.add(future)
+            future.add_done_callback(self._done)
+            futures.append(future)
+        return futures
+
+    def run_once(self) -> int:
+        """
+        Claim a single batch of tasks, and wait for them to finish
+        :return: number of claimed tasks
+        """
+        futures = self.dispatch()
+        wait(futures)
+        return len(futures)
+
+    def run(self, signal_manager=None, abort_callback=None):
+        """
+        Consume tasks until stop() is called
+        :param signal_manager: optional signal manager for shutdown handling
+        :param abort_callback: optional callback for SIGINT handling
+        :return:
+        """
+        if signal_manager and abort_callback:
+            signal_manager.add_handler(signal.SIGINT, abort_callback)
+
+        if not self.silent and self.tty:
+            self.tty.write(
+                "\nConsuming queue '{}' with {} worker(s), press CTRL+C to abort...".format(
+                    self.queue_name, self.concurrency
+                )
+            )
+
+        self._stopped = False
+        try:
+            while not self._stopped:
+                self._wakeup.clear()
+                requested = min(self.batch_size, self.free_slots())
+                claimed = 0
+                if requested > 0:
+                    try:
+                        claimed = len(self.dispatch())
+                    except Exception as e:
+                        logger.error("TaskWorker: cannot claim tasks: %s", e)
+
+                if requested > 0 and claimed == requested:
+                    # probably more tasks waiting
+                    continue
+                if requested > 0:
+                    self._wakeup.wait(self.poll_interval)
+                else:
+                    # all threads are busy; wait for a task to finish
+                    self._wakeup.wait()
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        """
+        Stop consuming tasks; running tasks are allowed to finish
+        :return:
+        """
+        self._stopped = True
+        self._wakeup.set()
+
+    def shutdown(self, wait_running: bool = True):
+        """
+        Stop the worker pool
+        :param wait_running: if True, wait for running tasks to finish
+        :return:
+        """
+        pool = self._pool
+        self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=wait_running)
+
+    def running(self) -> List:
+        with self._lock:
+            return list(self._running)
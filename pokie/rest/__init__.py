@@ -1,4 +1,6 @@
 from .service import RestService
+from .grid import RestGrid
+from .keyset import KeysetGrid
 from .service_mixin import RestServiceMixin
 from .view import RestView
 from .auto import Auto
@@ -9,7 +9,7 @@ from rick_db.backend.pg import PgInfo
 import pokie.codegen.pg
 from pokie.codegen import RequestGenerator
 from pokie.codegen.pg import PgTableSpec
-from pokie.constants import DI_DB
+from pokie.constants import DI_DB, DI_TABLESPEC_CACHE
 from pokie.http import PokieView, PokieAuthView, AutoRouter
 
 from pokie.rest import RestView
@@ -99,6 +99,7 @@ class Auto:
         prefix: str = "",
         auth: bool = True,
         acl: list = None,
+        allow_export: bool = False,
         **kwargs
     ) -> PokieView:
         """
@@ -122,22 +123,23 @@ class Auto:
             (PokieAuthView is composed into the view); set auth=False for public access
         :param acl: optional list of acl keys required to access the endpoints;
             only used when auth is True
+        :param allow_export: if True, the streaming export endpoint is enabled (see RestView.allow_export)
         :param kwargs: optional extra parameters
         :return: generated View class
         """
         if not schema:
             schema = PgInfo.SCHEMA_DEFAULT
 
-        db = app.di.get(DI_DB)
-        info = PgInfo(db)
-        if not info.table_exists(table_name, schema=schema):
-            raise ValueError(
-                "Auto.view(): table name '{}' not found in schema '{}'".format(
-                    table_name, schema
+        pg_spec = Auto._table_spec(app.di)
+        spec = pg_spec.cached(table_name, schema)
+        if spec is None:
+            if not pg_spec.manager().table_exists(table_name, schema=schema):
+                raise ValueError(
+                    "Auto.view(): table name '{}' not found in schema '{}'".format(
+                        table_name, schema
+                    )
                 )
-            )
-
-        spec = PgTableSpec(db).generate(table_name, schema)
+            spec = pg_spec.generate(table_name, schema)
         if search_fields is None:
             search_fields = [
                 f.name for f in spec.fields if f.dtype in ["varchar", "text"]
@@ -173,6 +175,8 @@ class Auto:
         }
         if allow_methods:
             cls_attrs["allow_methods"] = allow_methods
+        if allow_export:
+            cls_attrs["allow_export"] = True
 
         extends, cls_attrs = Auto._compose_auth(extends, cls_attrs, auth, acl)
         cls = type("AutoView_{}".format(secrets.token_hex(8)), extends, cls_attrs)
@@ -257,11 +261,20 @@ class Auto:
 
             # found a table name, lets assume it is actually a db table
             if table:
-                pg_spec = PgTableSpec(di.get(DI_DB))
-                spec = pg_spec.generate(table, schema)
+                spec = Auto._table_spec(di).generate(table, schema)
                 return RequestGenerator().generate_class(spec, camelcase=camel_case)
         return None
 
+    @staticmethod
+    def _table_spec(di: Di) -> PgTableSpec:
+        """
+        Build a PgTableSpec object, using the persistent TableSpec cache if registered (see TableSpecCacheFactory)
+        :param di:
+        :return: PgTableSpec
+        """
+        cache = di.get(DI_TABLESPEC_CACHE) if di.has(DI_TABLESPEC_CACHE) else None
+        return PgTableSpec(di.get(DI_DB), cache=cache)
+
     @staticmethod
     def _compose_auth(extends: tuple, cls_attrs: dict, auth: bool, acl: list):
         """
@@ -300,4 +313,6 @@ class Auto:
                 view_class.internal_hooks = list(view_class.internal_hooks) + list(item.internal_hooks)
             if getattr(item, "init_methods", None):
                 view_class.init_methods = list(view_class.init_methods) + list(item.init_methods)
+        # validate hook names and resolve handlers
+        view_class.compile_dispatch()
         return view_class
@@ -0,0 +1,164 @@
+import copy
+import secrets
+
+from rick_db import DbGrid
+from rick_db.sql import Select
+
+from pokie.constants import (
+    LIST_COUNT_EXACT,
+    LIST_COUNT_ESTIMATE,
+    LIST_COUNT_NONE,
+    EXPORT_BATCH_SIZE,
+)
+
+
+class RestGrid(DbGrid):
+    """
+    DbGrid variant with selectable total count mode
+
+    - LIST_COUNT_EXACT: total is computed with COUNT(*), as in DbGrid;
+    - LIST_COUNT_ESTIMATE: total is the PostgreSQL planner row estimate for the filtered query;
+    - LIST_COUNT_NONE: no total is computed, and None is returned instead;
+
+    When the returned page is not full, the exact total is known (offset + row count) and no estimation is performed.
+
+    Additionally, stream() iterates over all matching records using a server-side cursor.
+    """
+
+    def run(
+        self,
+        qry: Select = None,
+        search_text: str = None,
+        match_fields: dict = None,
+        limit: int = None,
+        offset: int = None,
+        sort_fields: dict = None,
+        search_fields: list = None,
+        count_mode: str = LIST_COUNT_EXACT,
+    ) -> tuple:
+        """
+        Executes a query and returns the total row count according to count_mode, as well as the records within the
+        specified range.
+
+        :param qry: optional Select query
+        :param search_text: optional search string
+        :param match_fields: optional field filter
+        :param limit: optional limit
+        :param offset: optional offset (ignored if no limit)
+        :param sort_fields: optional sort fields in the format {field_name: order}
+        :param search_fields: optional search fields
+        :param count_mode: one of LIST_COUNT_EXACT, LIST_COUNT_ESTIMATE, LIST_COUNT_NONE
+        :return: tuple(total_row_count, filtered_rows)
+        """
+        if count_mode is None or count_mode == LIST_COUNT_EXACT:
+            return super().run(
+                qry=qry,
+                search_text=search_text,
+                match_fields=match_fields,
+                limit=limit,
+                offset=offset,
+                sort_fields=sort_fields,
+                search_fields=search_fields,
+            )
+
+        if count_mode not in (LIST_COUNT_ESTIMATE, LIST_COUNT_NONE):
+            raise ValueError("count mode '%s' is not supported" % count_mode)
+
+        qry = self._assemble(
+            qry=qry,
+            search_text=search_text,
+            match_fields=match_fields,
+            sort_fields=sort_fields,
+            search_fields=search_fields,
+        )
+        page = copy.deepcopy(qry)
+        if limit:
+            page.limit(limit, offset)
+        rows = self._repo.fetch(page)
+
+        if count_mode == LIST_COUNT_NONE:
+            return None, rows
+
+        offset = offset or 0
+        if not limit:
+            return len(rows), rows
+
+        # partial page, or empty first page; total is known without counting
+        if 0 < len(rows) < limit or (len(rows) == 0 and offset == 0):
+            return offset + len(rows), rows
+
+        return max(self.estimate(qry), offset + len(rows)), rows
+
+    def estimate(self, qry: Select) -> int:
+        """
+        Retrieve the planner row estimate for a query
+        :param qry: query to estimate
+        :return: int
+        """
+        sql, values = qry.assemble()
+        with self._repo.cursor() as c:
+            record = c.fetchone("EXPLAIN (FORMAT JSON) " + sql, values)
+            if record is None:
+                return 0
+            return int(record[0][0]["Plan"]["Plan Rows"])
+
+    def stream(
+        self,
+        qry: Select = None,
+        search_text: str = None,
+        match_fields: dict = None,
+        sort_fields: dict = None,
+        search_fields: list = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ):
+        """
+        Iterate over all records matching the query, using a server-side (named) cursor
+
+        Rows are fetched from the database in batches of batch_size; the connection is held until the iteration is
+        completed or the generator is closed. The query is assembled immediately, so invalid field names raise
+        ValueError before any row is read.
+
+        :param qry: optional Select query
+        :param search_text: optional search string
+        :param match_fields: optional field filter
+        :param sort_fields: optional sort fields in the format {field_name: order}
+        :param search_fields: optional search fields
+        :param batch_size: amount of rows to fetch per round trip
+        :return: generator of Record objects
+        """
+        if batch_size < 1:
+            raise ValueError("batch size must be a positive integer")
+
+        qry = self._assemble(
+            qry=qry,
+            search_text=search_text,
+            match_fields=match_fields,
+            sort_fields=sort_fields,
+            search_fields=search_fields,
+        )
+        sql, values = qry.assemble()
+        return self._stream(sql, values, batch_size)
+
+    def _stream(self, sql: str, values: list, batch_size: int):
+        record_cls = self._repo.record_class()
+        with self._repo.conn() as conn:
+            db = conn.db
+            # named cursors require a transaction; if autocommit is enabled, the cursor must be WITH HOLD
+            cursor = db.cursor(
+                name="pokie_stream_{}".format(secrets.token_hex(8)),
+                withhold=db.autocommit,
+            )
+            cursor.itersize = batch_size
+            try:
+                cursor.execute(sql, values)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield record_cls().fromrecord(row)
+            finally:
+                cursor.close()
+                # read-only operation; close the implicit transaction
+                if not conn.in_transaction():
+                    db.rollback()
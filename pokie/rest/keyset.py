@@ -0,0 +1,76 @@
+from rick_db import DbGrid, Keyset, KeysetError
+from rick_db.sql import Select
+
+
+class KeysetGrid(DbGrid):
+    """
+    DbGrid variant for cursor (keyset) pagination
+
+    Search and match filters are applied as in DbGrid, but instead of LIMIT/OFFSET the page is selected with a
+    row-value comparison on the sort fields - e.g. WHERE (name, id) > (%s, %s) - so deep pages do not need to scan
+    and discard all previous rows. The primary key is always appended to the sort fields as tie-breaker.
+    """
+
+    def default_sort(self) -> dict:
+        # ordering is generated by Keyset; the assembled query must not have an ORDER BY clause
+        return {}
+
+    def keyset_fields(self, sort_fields: dict = None) -> tuple:
+        """
+        Build the Keyset field list and order from a DbGrid sort dictionary
+        :param sort_fields: optional sort fields in the format {field_name: order}
+        :return: tuple(field_list, order)
+        """
+        fields = []
+        orders = set()
+        if sort_fields:
+            for field, order in sort_fields.items():
+                if field not in self._fields:
+                    raise KeysetError(
+                        "field '%s' used for sorting does not exist on Record" % field
+                    )
+                fields.append(field)
+                orders.add(order.upper())
+
+        if len(orders) > 1:
+            raise KeysetError("cursor pagination requires a single sort direction")
+
+        if self._field_pk and self._field_pk not in fields:
+            fields.append(self._field_pk)
+
+        if len(fields) == 0:
+            raise KeysetError("cursor pagination requires sort fields or a primary key")
+
+        order = orders.pop() if orders else Keyset.ASC
+        return fields, order
+
+    def seek(
+        self,
+        limit: int,
+        cursor: str = None,
+        qry: Select = None,
+        search_text: str = None,
+        match_fields: dict = None,
+        sort_fields: dict = None,
+        search_fields: list = None,
+    ) -> tuple:
+        """
+        Executes a query and returns a page of records, as well as the cursor for the next page
+
+        :param limit: page size
+        :param cursor: cursor returned by the previous page, or None for the first page
+        :param qry: optional Select query
+        :param search_text: optional search string
+        :param match_fields: optional field filter
+        :param sort_fields: optional sort fields in the format {field_name: order}
+        :param search_fields: optional search fields
+        :return: tuple(rows, next_cursor); next_cursor is None on the last page
+        """
+        fields, order = self.keyset_fields(sort_fields)
+        qry = self._assemble(
+            qry=qry,
+            search_text=search_text,
+            match_fields=match_fields,
+            search_fields=search_fields,
+        )
+        return Keyset(self._repo, fields, order).run(limit, cursor, qry)
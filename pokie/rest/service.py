@@ -1,10 +1,18 @@
+import logging
+
 from rick.base import Di
 
-from pokie.constants import DI_DB
+from pokie.constants import DI_DB, DI_CACHE
+from pokie.http.response_cache import (
+    record_cache_tag,
+    invalidate_tags,
+)
 from rick.mixin import Injectable
 from rick_db import Repository
 from .service_mixin import RestServiceMixin
 
+logger = logging.getLogger(__name__)
+
 
 class RestService(Injectable, RestServiceMixin):
     record_class = None  # record class
@@ -23,6 +31,21 @@ class RestService(Injectable, RestServiceMixin):
     def set_repository_class(self, cls):
         self._repository_cls = cls
 
+    def invalidate_response_cache(self):
+        """
+        Invalidate cached RestView responses for the record class, if DI_CACHE is available; writes from processes
+        without routes, such as job runners and task workers, also invalidate them
+        Cache errors are logged, and do not fail the write
+        """
+        di = self.get_di()
+        if self._record_cls is None or not di.has(DI_CACHE):
+            return
+        tag = record_cache_tag(self._record_cls)
+        try:
+            invalidate_tags(di.get(DI_CACHE), [tag])
+        except Exception as e:
+            logger.warning("cannot invalidate response cache tag '%s': %s", tag, e)
+
     @property
     def repository(self) -> Repository:
         if self._record_cls is None:
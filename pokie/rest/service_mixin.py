@@ -1,18 +1,28 @@
 from rick_db import DbGrid, Repository
 
+from pokie.constants import DEFAULT_LIST_SIZE, LIST_COUNT_EXACT, EXPORT_BATCH_SIZE
+from .grid import RestGrid
+from .keyset import KeysetGrid
+
 
 class RestServiceMixin:
     def get(self, id_record):
         return self.repository.fetch_pk(id_record)
 
     def delete(self, id_record):
-        return self.repository.delete_pk(id_record)
+        result = self.repository.delete_pk(id_record)
+        self.invalidate_response_cache()
+        return result
 
     def insert(self, record):
-        return self.repository.insert_pk(record)
+        result = self.repository.insert_pk(record)
+        self.invalidate_response_cache()
+        return result
 
     def update(self, id_record, record):
-        return self.repository.update(record, id_record)
+        result = self.repository.update(record, id_record)
+        self.invalidate_response_cache()
+        return result
 
     def exists(self, id_record):
         return self.repository.valid_pk(id_record)
@@ -25,8 +35,9 @@ class RestServiceMixin:
         limit: int = None,
         offset: int = None,
         sort_fields: dict = None,
+        count_mode: str = LIST_COUNT_EXACT,
     ):
-        grid = DbGrid(self.repository, search_fields, DbGrid.SEARCH_ANY)
+        grid = RestGrid(self.repository, search_fields, DbGrid.SEARCH_ANY)
         return grid.run(
             None,
             search_text=search_text,
@@ -34,8 +45,50 @@ class RestServiceMixin:
             limit=limit,
             offset=offset,
             sort_fields=sort_fields,
+            count_mode=count_mode,
         )
 
+    def seek(
+        self,
+        search_fields: list = None,
+        search_text: str = None,
+        match_fields: dict = None,
+        limit: int = DEFAULT_LIST_SIZE,
+        cursor: str = None,
+        sort_fields: dict = None,
+    ):
+        grid = KeysetGrid(self.repository, search_fields, DbGrid.SEARCH_ANY)
+        return grid.seek(
+            limit,
+            cursor=cursor,
+            search_text=search_text,
+            match_fields=match_fields,
+            sort_fields=sort_fields,
+        )
+
+    def export(
+        self,
+        search_fields: list = None,
+        search_text: str = None,
+        match_fields: dict = None,
+        sort_fields: dict = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ):
+        grid = RestGrid(self.repository, search_fields, DbGrid.SEARCH_ANY)
+        return grid.stream(
+            None,
+            search_text=search_text,
+            match_fields=match_fields,
+            sort_fields=sort_fields,
+            batch_size=batch_size,
+        )
+
+    def invalidate_response_cache(self):
+        """
+        Invalidate cached RestView responses for the service records; called after each write
+        """
+        pass
+
     @property
     def repository(self) -> Repository:
         raise RuntimeError("RestServiceMixin::repository must be overridden")
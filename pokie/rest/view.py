@@ -1,12 +1,55 @@
-from typing import List
+import inspect
+from typing import List, Optional
 
-from flask import request
+from flask import request, current_app
 from flask.typing import ResponseReturnValue
 from psycopg2 import IntegrityError, DataError
+from rick_db import KeysetError
 
-from pokie.http import DbGridRequest, PokieView
+from pokie.http import (
+    DbGridRequest,
+    PokieView,
+    JsonStreamResponse,
+    CamelCaseJsonStreamResponse,
+)
+from pokie.http.serializer import RecordSerializer, get_record_serializer
+from pokie.http.response_cache import record_cache_tag
 from pokie.rest import RestService, RestServiceMixin
-from pokie.constants import DI_SERVICES, HTTP_BADREQ, HTTP_INTERNAL_ERROR
+from pokie.constants import (
+    DI_SERVICES,
+    HTTP_BADREQ,
+    HTTP_INTERNAL_ERROR,
+    LIST_COUNT_EXACT,
+    EXPORT_BATCH_SIZE,
+    EXPORT_FORMATS,
+    EXPORT_FORMAT_NDJSON,
+    EXPORT_FORMAT_JSON,
+)
+
+# count_mode support of list(), by service class
+_count_mode_support = {}
+
+
+def _accepts_count_mode(svc) -> bool:
+    """
+    Check if the list() method of a service accepts the count_mode parameter; custom services predating count
+    modes may not
+    :param svc:
+    :return: bool
+    """
+    cls = type(svc)
+    result = _count_mode_support.get(cls, None)
+    if result is None:
+        try:
+            params = inspect.signature(svc.list).parameters.values()
+        except (TypeError, ValueError):
+            params = []
+        result = any(
+            p.name == "count_mode" or p.kind == inspect.Parameter.VAR_KEYWORD
+            for p in params
+        )
+        _count_mode_support[cls] = result
+    return result
 
 
 class RestView(PokieView):
@@ -23,6 +66,50 @@ class RestView(PokieView):
     service_name = None
     list_limit = -1
     camel_case = False
+    # default total count mode for listings; one of LIST_COUNT_EXACT, LIST_COUNT_ESTIMATE, LIST_COUNT_NONE
+    count_mode = LIST_COUNT_EXACT
+    # if True, AutoRouter.resource() registers the streaming export endpoint (/<slug>/export)
+    allow_export = False
+    # default export format; one of EXPORT_FORMAT_NDJSON, EXPORT_FORMAT_JSON
+    export_format = EXPORT_FORMAT_NDJSON
+    # server-side cursor batch size for export operations
+    export_batch_size = EXPORT_BATCH_SIZE
+    # if True, records are serialized with a RecordSerializer compiled for record_class; disable if a custom
+    # response_class relies on receiving Record objects
+    serialize_records = True
+    # optional record attribute used as the data version of get() ETags, such as an updated_at column; see
+    # PokieView.success()
+    version_field = None
+
+    @classmethod
+    def compile_dispatch(cls) -> dict:
+        compiled = cls.__dict__.get("_dispatch_compiled", None)
+        if compiled is not None:
+            return compiled
+
+        compiled = super().compile_dispatch()
+        # build the row serializer when routes are registered
+        cls.record_serializer()
+        return compiled
+
+    @classmethod
+    def record_serializer(cls) -> Optional[RecordSerializer]:
+        """
+        Get the row serializer for record_class
+        :return: RecordSerializer, or None if serialize_records is False or record_class is not set
+        """
+        if not cls.serialize_records or cls.record_class is None:
+            return None
+        return get_record_serializer(cls.record_class, cls.camel_case)
+
+    def response_cache_tags(self) -> list:
+        """
+        Cached responses are invalidated on writes to record_class through RestService
+        :return: list of str
+        """
+        if self.record_class is None:
+            return []
+        return [record_cache_tag(self.record_class)]
 
     def get(self, id_record=None):
         """
@@ -37,7 +124,13 @@ class RestView(PokieView):
         if record is None:
             return self.not_found()
 
-        return self.success(record)
+        version = None
+        if self.version_field is not None:
+            version = getattr(record, self.version_field, None)
+        serializer = self.record_serializer()
+        if serializer is not None:
+            record = serializer.row(record)
+        return self.success(record, version=version)
 
     def list(self):
         """
@@ -51,16 +144,100 @@ class RestView(PokieView):
 
         if not dbgrid_request.is_valid(request.args):
             return self.request_error(dbgrid_request)
+        if dbgrid_request.has_cursor():
+            return self.list_cursor(dbgrid_request, search_fields)
+
+        params = dbgrid_request.dbgrid_parameters(
+            self.list_limit, search_fields, self.count_mode
+        )
+        if (
+            "count_mode" in params
+            and dbgrid_request.fields[DbGridRequest.FIELD_COUNT].value is not None
+            and not _accepts_count_mode(self.svc)
+        ):
+            # requested by the client, but not supported by a custom service
+            return self.error("count mode not supported", code=HTTP_BADREQ)
+
         try:
-            count, data = self.svc.list(
-                **dbgrid_request.dbgrid_parameters(self.list_limit, search_fields)
+            count, data = self.svc.list(**params)
+            result = {"total": count, "items": self.serialize_rows(data)}
+            return self.success(result)
+        except Exception as e:
+            self.logger.exception(e)
+            return self.error("internal error", code=HTTP_INTERNAL_ERROR)
+
+    def list_cursor(self, dbgrid_request: DbGridRequest, search_fields: list):
+        """
+        Query records using cursor (keyset) pagination
+        :param dbgrid_request:
+        :param search_fields:
+        :return:
+        """
+        try:
+            data, next_cursor = self.svc.seek(
+                **dbgrid_request.keyset_parameters(self.list_limit, search_fields)
             )
-            result = {"total": count, "items": data}
+            result = {"items": self.serialize_rows(data), "nextCursor": next_cursor}
             return self.success(result)
+        except KeysetError as e:
+            self.logger.warning("invalid cursor request: %s", e)
+            return self.error("invalid cursor", code=HTTP_BADREQ)
         except Exception as e:
             self.logger.exception(e)
             return self.error("internal error", code=HTTP_INTERNAL_ERROR)
 
+    def export(self):
+        """
+        Stream all records matching the listing criteria, as NDJSON or JSON array
+
+        Search, match and sort parameters are the same as in list(); offset, limit and cursor are ignored
+        :return:
+        """
+        export_format = request.args.get("format", self.export_format)
+        if export_format not in EXPORT_FORMATS:
+            return self.error("invalid export format", code=HTTP_BADREQ)
+
+        search_fields = self.search_fields if self.search_fields is not None else []
+        dbgrid_request = DbGridRequest(
+            self.record_class, use_camel_case=self.camel_case
+        )
+
+        if not dbgrid_request.is_valid(request.args):
+            return self.request_error(dbgrid_request)
+        try:
+            params = dbgrid_request.dbgrid_parameters(search_fields=search_fields)
+            rows = self.svc.export(
+                search_fields=search_fields,
+                search_text=params["search_text"],
+                match_fields=params["match_fields"],
+                sort_fields=params["sort_fields"],
+                batch_size=self.export_batch_size,
+            )
+        except Exception as e:
+            self.logger.exception(e)
+            return self.error("internal error", code=HTTP_INTERNAL_ERROR)
+
+        serializer = self.record_serializer()
+        if serializer is not None:
+            rows = map(serializer.row, rows)
+
+        response_class = (
+            CamelCaseJsonStreamResponse if self.camel_case else JsonStreamResponse
+        )
+        response = response_class(rows, as_array=export_format == EXPORT_FORMAT_JSON)
+        return response.assemble(current_app)
+
+    def serialize_rows(self, rows: list) -> list:
+        """
+        Serialize a list of records using the row serializer, if available
+        :param rows:
+        :return: list
+        """
+        serializer = self.record_serializer()
+        if serializer is None:
+            return rows
+        return serializer.rows(rows)
+
     def post(self):
         """
         Create Record
@@ -151,6 +151,16 @@ class Module(BaseModule):
             auth=False,
         )
 
+        # Auto Rest with response cache; writes through catalog/category invalidate it
+        Auto.rest(
+            app,
+            "cached/category",
+            CategoryRecord,
+            search_fields=[CategoryRecord.name],
+            auth=False,
+            response_cache_ttl=60,
+        )
+
         # Auto Rest with custom RequestRecord class
         Auto.rest(
             app,
@@ -195,7 +205,9 @@ class Module(BaseModule):
         AutoRouter.resource(app, "catalog/supplier", view)
 
         # Auto View - products
-        view = Auto.view(app, "products", auth=False)
+        view = Auto.view(
+            app, "products", auth=False, camel_case=True, allow_export=True
+        )
         AutoRouter.resource(app, "catalog/product", view)
 
         # Auto View - tablespec
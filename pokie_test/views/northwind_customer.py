@@ -41,3 +41,9 @@ class CustomerView(RestView):
     # optional limit for default listing operations
     # if list_limit > 0, the specified value will be used as default limit for unbounded listing requests
     # list_limit = -1
+
+    # enable streaming export endpoint (/customers/export)
+    allow_export = True
+
+    # initialize the view once, and serve each request with a lightweight copy
+    init_every_request = False
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from pokie.cache import MemoryCache, RedisCache, LocalCache, DummyCache, FileCache
+
+
+@pytest.fixture(params=[MemoryCache, RedisCache, LocalCache, FileCache])
+def cache(request, pokie_di):
+    cache = request.param(pokie_di)
+    cache.set_prefix("batch:")
+    yield cache
+    cache.delete_many(["key1", "key2", "key3"])
+
+
+class TestBatch:
+    def test_batch(self, cache):
+        cache.delete_many(["key1", "key2", "key3"])
+        assert cache.get_many(["key1", "key2"]) == {}
+
+        cache.set_many({"key1": "value1", "key2": {"value": 2}})
+        assert cache.get("key1") == "value1"
+        assert cache.get_many(iter(["key1", "key2", "key3"])) == {
+            "key1": "value1",
+            "key2": {"value": 2},
+        }
+        assert cache.get_many([]) == {}
+
+        cache.delete_many(["key1", "key3"])
+        assert cache.has("key1") is False
+        assert cache.get_many(["key1", "key2"]) == {"key2": {"value": 2}}
+        cache.delete_many([])
+        cache.set_many({})
+
+    def test_batch_ttl(self, cache):
+        cache.set_many({"key1": 1, "key2": 2}, ttl=1)
+        assert cache.get_many(["key1", "key2"]) == {"key1": 1, "key2": 2}
+        time.sleep(1.1)
+        assert cache.get_many(["key1", "key2"]) == {}
+
+        # fractional ttl
+        cache.set_many({"key1": 1}, ttl=0.5)
+        assert cache.get_many(["key1"]) == {"key1": 1}
+        time.sleep(1.1)
+        assert cache.get_many(["key1"]) == {}
+
+    def test_dummy(self, pokie_di):
+        cache = DummyCache(pokie_di)
+        cache.set_many({"key1": 1})
+        assert cache.get_many(["key1"]) == {}
+        cache.delete_many(["key1"])
+
+
+class TestRedisBatch:
+    def test_round_trips(self, pokie_di):
+        cache = RedisCache(pokie_di)
+        cache.set_prefix("batch:")
+        calls = []
+        client = cache.client()
+        execute = client.execute_command
+
+        def counting(*args, **kwargs):
+            calls.append(args[0])
+            return execute(*args, **kwargs)
+
+        client.execute_command = counting
+        try:
+            cache.set_many({"key{}".format(i): i for i in range(100)}, ttl=60)
+            assert cache.get_many(["key{}".format(i) for i in range(100)]) == {
+                "key{}".format(i): i for i in range(100)
+            }
+            assert cache.hits == 100
+            cache.delete_many(["key{}".format(i) for i in range(100)])
+            # pipelined commands don't go through execute_command()
+            assert calls == ["MGET", "UNLINK"]
+            assert cache.get_many(["key1", "key2"]) == {}
+            assert cache.misses == 2
+        finally:
+            del client.execute_command
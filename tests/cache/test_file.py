@@ -0,0 +1,89 @@
+import os
+import time
+
+import pytest
+
+from pokie.cache import FileCache
+
+
+@pytest.fixture
+def file_cache(pokie_di, tmp_path):
+    return FileCache(pokie_di, str(tmp_path / "cache"))
+
+
+class TestFileCache:
+    def test_mutability(self, file_cache):
+        key = "key1"
+        data = {"key": "value"}
+        assert file_cache.has(key) is False
+        file_cache.set(key, data)
+        assert file_cache.has(key) is True
+        # mutate stored object
+        data["key"] = 3
+
+        record = file_cache.get(key)
+        assert record is not None
+        assert record["key"] == "value"
+
+    def test_get_nonexistent(self, file_cache):
+        assert file_cache.get("nonexistent") is None
+
+    def test_shared_between_instances(self, pokie_di, file_cache):
+        file_cache.set("key", "value")
+        other = FileCache(pokie_di, file_cache.path)
+        assert other.get("key") == "value"
+
+    def test_remove_and_purge(self, file_cache):
+        file_cache.set("key1", "val1")
+        file_cache.set("key2", "val2")
+        file_cache.remove("key1")
+        file_cache.remove("nonexistent")  # should not raise
+        assert file_cache.has("key1") is False
+        assert file_cache.has("key2") is True
+        file_cache.purge()
+        assert file_cache.has("key2") is False
+
+    def test_ttl(self, file_cache):
+        file_cache.set("key", "value", ttl=60)
+        assert file_cache.get("key") == "value"
+        file_cache.set("key", "value", ttl=-1)
+        assert file_cache.get("key") == "value"
+
+        # expired entry
+        file_cache.set("expired", "value", ttl=0.01)
+        time.sleep(0.02)
+        assert file_cache.has("expired") is False
+        assert file_cache.get("expired") is None
+
+    def test_prefix(self, file_cache):
+        file_cache.set("key", "value")
+        file_cache.set_prefix("other:")
+        assert file_cache.has("key") is False
+
+    def test_corrupted_entry(self, file_cache):
+        file_cache.set("key", "value")
+        with open(file_cache._file("key"), "wb") as f:
+            f.write(b"garbage")
+        assert file_cache.get("key") is None
+        assert os.path.exists(file_cache._file("key")) is False
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            b"cmissing_module\nMissingClass\n.",  # ModuleNotFoundError
+            b"cos\nMissingClass\n.",  # AttributeError
+        ],
+    )
+    def test_stale_entry(self, file_cache, data):
+        file_cache.set("key", "value")
+        with open(file_cache._file("key"), "wb") as f:
+            f.write(data)
+        assert file_cache.get("key") is None
+        assert os.path.exists(file_cache._file("key")) is False
+
+    def test_insecure_path(self, pokie_di, tmp_path):
+        path = tmp_path / "insecure"
+        path.mkdir()
+        os.chmod(path, 0o777)
+        with pytest.raises(RuntimeError):
+            FileCache(pokie_di, str(path))
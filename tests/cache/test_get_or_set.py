@@ -0,0 +1,173 @@
+import threading
+import time
+
+import pytest
+
+from pokie.cache import LocalCache, MemoryCache, RedisCache, DummyCache, TieredCache
+from pokie.cache.mixin import ENTRY_MARKER
+
+
+class Counter:
+    def __init__(self, value="value", delay=0.0):
+        self.calls = 0
+        self.value = value
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return self.value
+
+
+def run_threads(fn, count=8):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(fn())) for _ in range(count)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def store_entry(cache, key, value, delta, expiry, ttl=60):
+    cache.set(key, {ENTRY_MARKER: 1, "v": value, "d": delta, "e": expiry}, ttl)
+
+
+@pytest.fixture
+def redis_cache(pokie_di):
+    cache = RedisCache(pokie_di)
+    cache.set_prefix("get_or_set:")
+    yield cache
+    for key in ["key", "none", "stale", "early", "expired"]:
+        cache.remove(key)
+
+
+class TestGetOrSet:
+    @pytest.mark.parametrize("cls", [LocalCache, MemoryCache, RedisCache])
+    def test_get_or_set(self, pokie_di, cls):
+        cache = cls(pokie_di)
+        cache.set_prefix("get_or_set:")
+        cache.remove("key")
+        fn = Counter({"result": 1})
+        assert cache.get_or_set("key", fn, ttl=60) == {"result": 1}
+        assert cache.get_or_set("key", fn, ttl=60) == {"result": 1}
+        assert fn.calls == 1
+
+        # None is a valid value
+        cache.remove("none")
+        none = Counter(None)
+        assert cache.get_or_set("none", none) is None
+        assert cache.get_or_set("none", none) is None
+        assert none.calls == 1
+        cache.remove("key")
+        cache.remove("none")
+
+    def test_dummy(self, pokie_di):
+        cache = DummyCache(pokie_di)
+        fn = Counter()
+        assert cache.get_or_set("key", fn) == "value"
+        assert cache.get_or_set("key", fn) == "value"
+        assert fn.calls == 2
+
+    def test_single_flight(self, pokie_di):
+        cache = LocalCache(pokie_di)
+        fn = Counter(delay=0.1)
+        results = run_threads(lambda: cache.get_or_set("key", fn, ttl=60))
+        assert results == ["value"] * 8
+        assert fn.calls == 1
+
+    def test_distributed_lock(self, pokie_di, redis_cache):
+        # separate cache objects, as if in different processes
+        other = RedisCache(pokie_di)
+        other.set_prefix("get_or_set:")
+        fn = Counter(delay=0.2)
+        caches = [redis_cache, other] * 3
+        results = run_threads(
+            lambda: caches.pop().get_or_set("key", fn, ttl=60), count=len(caches)
+        )
+        assert results == ["value"] * 6
+        assert fn.calls == 1
+
+        # locks are only released by their owner
+        token = redis_cache.lock_acquire("key")
+        assert token is not None
+        assert other.lock_acquire("key") is None
+        other.lock_release("key", "invalid")
+        assert other.lock_acquire("key") is None
+        redis_cache.lock_release("key", token)
+        token = other.lock_acquire("key")
+        assert token is not None
+        other.lock_release("key", token)
+
+    def test_stale_while_revalidate(self, redis_cache):
+        store_entry(redis_cache, "stale", "old", 0.01, time.time() - 1)
+        fn = Counter("new")
+
+        # another process is recomputing the value
+        token = redis_cache.lock_acquire("stale")
+        assert redis_cache.get_or_set("stale", fn, ttl=60, stale_ttl=30) == "old"
+        assert fn.calls == 0
+        redis_cache.lock_release("stale", token)
+
+        assert redis_cache.get_or_set("stale", fn, ttl=60, stale_ttl=30) == "new"
+        assert fn.calls == 1
+        assert redis_cache.get_or_set("stale", fn, ttl=60, stale_ttl=30) == "new"
+        assert fn.calls == 1
+
+        # without stale_ttl, expired values are recomputed
+        store_entry(redis_cache, "stale", "old", 0.01, time.time() - 1)
+        assert redis_cache.get_or_set("stale", fn, ttl=60) == "new"
+        assert fn.calls == 2
+
+    def test_wait_expired(self, redis_cache):
+        # another process is computing the value; the stored entry expires while waiting
+        store_entry(redis_cache, "expired", "old", 0.01, time.time() - 1)
+        fn = Counter("new")
+        token = redis_cache.lock_acquire("expired")
+        redis_cache.lock_timeout = 0.3
+        try:
+            assert redis_cache.get_or_set("expired", fn, ttl=60) == "new"
+            assert fn.calls == 1
+        finally:
+            redis_cache.lock_release("expired", token)
+
+    def test_early_expiration(self, pokie_di, monkeypatch):
+        cache = LocalCache(pokie_di)
+        monkeypatch.setattr("pokie.cache.mixin.random.random", lambda: 0.5)
+        fn = Counter("new")
+
+        # expires in 10s; takes 1s to compute: -1 * ln(0.5) < 10, not refreshed
+        store_entry(cache, "early", "old", 1.0, time.time() + 10)
+        assert cache.get_or_set("early", fn, ttl=60) == "old"
+        # beta increases the probability of refreshing
+        assert cache.get_or_set("early", fn, ttl=60, beta=20) == "new"
+        assert fn.calls == 1
+
+        # takes 30s to compute: refreshed early, unless disabled with beta=0
+        store_entry(cache, "early", "old", 30.0, time.time() + 10)
+        assert cache.get_or_set("early", fn, ttl=60, beta=0) == "old"
+        assert cache.get_or_set("early", fn, ttl=60) == "new"
+        assert fn.calls == 2
+
+    def test_tiered(self, pokie_di):
+        cache = TieredCache(pokie_di, channel="pokie:test:get_or_set")
+        cache.set_prefix("get_or_set:")
+        try:
+            cache.remove("key")
+            fn = Counter()
+            assert cache.get_or_set("key", fn, ttl=60) == "value"
+            assert cache.l1.has("get_or_set:key") is True
+            assert cache.get_or_set("key", fn, ttl=60) == "value"
+            assert fn.calls == 1
+            token = cache.lock_acquire("key")
+            assert token is not None
+            assert cache.l2.lock_acquire("get_or_set:key") is None
+            cache.lock_release("key", token)
+            cache.remove("key")
+        finally:
+            cache.close()
@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+
+from pokie.cache import LocalCache
+from pokie.constants import CACHE_POLICY_TINYLFU
+
+
+class TestLocalCache:
+    def test_set_get_roundtrip(self, pokie_di):
+        cache = LocalCache(pokie_di)
+        assert cache.get("key") is None
+        assert cache.has("key") is False
+        data = {"nested": {"list": [1, 2, 3]}}
+        cache.set("key", data)
+        assert cache.has("key") is True
+        assert cache.get("key") == data
+
+        # stored values are copies
+        data["nested"] = None
+        result = cache.get("key")
+        assert result["nested"]["list"] == [1, 2, 3]
+        assert result is not cache.get("key")
+
+        cache.remove("key")
+        cache.remove("key")
+        assert cache.has("key") is False
+        assert cache.hits == 3
+        assert cache.misses == 1
+
+    def test_by_reference(self, pokie_di):
+        cache = LocalCache(pokie_di, by_reference=True)
+        value = ("a", "b")
+        cache.set("key", value)
+        assert cache.get("key") is value
+
+    def test_prefix_purge(self, pokie_di):
+        cache = LocalCache(pokie_di)
+        cache.set_prefix("prefix:")
+        cache.set("key1", 1)
+        cache.set("key2", 2)
+        assert len(cache) == 2
+        assert "prefix:key1" in cache._entries
+        cache.purge()
+        assert len(cache) == 0
+        assert cache.size == 0
+        assert cache.get("key1") is None
+
+    def test_lru_eviction(self, pokie_di):
+        cache = LocalCache(pokie_di, max_entries=3)
+        for i in range(3):
+            cache.set("key{}".format(i), i)
+        # key0 is now the most recently used
+        assert cache.get("key0") == 0
+        cache.set("key3", 3)
+        assert len(cache) == 3
+        assert cache.has("key1") is False
+        assert cache.evictions == 1
+        for key in ["key0", "key2", "key3"]:
+            assert cache.has(key) is True
+
+        # replacing an entry does not evict
+        cache.set("key2", 20)
+        assert len(cache) == 3
+        assert cache.get("key2") == 20
+
+    def test_max_bytes(self, pokie_di):
+        cache = LocalCache(pokie_di, max_entries=0, max_bytes=1000)
+        for i in range(10):
+            cache.set("key{}".format(i), "x" * 200)
+        assert cache.size <= 1000
+        assert cache.has("key9") is True
+        assert cache.has("key0") is False
+
+        # entries larger than the cache are not stored
+        cache.set("large", "x" * 2000)
+        assert cache.has("large") is False
+        assert cache.has("key9") is True
+
+    def test_expiry(self, pokie_di):
+        cache = LocalCache(pokie_di)
+        cache.set("short", 1, ttl=0.05)
+        cache.set("long", 2, ttl=60)
+        cache.set("forever", 3)
+        # replacing an entry discards the previous expiry
+        cache.set("replaced", 4, ttl=0.05)
+        cache.set("replaced", 5)
+        assert cache.get("short") == 1
+        time.sleep(0.1)
+        assert len(cache) == 3
+        assert cache.get("short") is None
+        assert cache.get("long") == 2
+        assert cache.get("forever") == 3
+        assert cache.get("replaced") == 5
+
+    def test_tinylfu(self, pokie_di):
+        cache = LocalCache(pokie_di, max_entries=10, policy=CACHE_POLICY_TINYLFU)
+        for i in range(10):
+            key = "hot{}".format(i)
+            cache.set(key, i)
+            for _ in range(5):
+                cache.get(key)
+
+        # a scan of one-off keys does not evict frequently used entries; frequencies are estimated, so a few
+        # scanned keys may be admitted due to hash collisions
+        for i in range(30):
+            cache.set("scan{}".format(i), i)
+        assert len(cache) == 10
+        hot = [i for i in range(10) if cache.get("hot{}".format(i)) == i]
+        assert len(hot) >= 8
+
+        # existing entries are always updated
+        key = "hot{}".format(hot[0])
+        cache.set(key, "updated")
+        assert cache.get(key) == "updated"
+
+    def test_invalid_policy(self, pokie_di):
+        with pytest.raises(ValueError):
+            LocalCache(pokie_di, policy="invalid")
+
+    def test_threads(self, pokie_di):
+        cache = LocalCache(pokie_di, max_entries=50)
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(500):
+                    key = "key{}".format((i * n) % 80)
+                    cache.set(key, i, ttl=0.01 if i % 3 else None)
+                    cache.get(key)
+                    if i % 7 == 0:
+                        cache.remove(key)
+            except Exception as e:  # pragma: no cover
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(1, 9)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert len(cache) <= 50
+        assert cache.size == sum(entry[2] for entry in cache._entries.values())
@@ -0,0 +1,111 @@
+import datetime
+import decimal
+import uuid
+
+import pytest
+
+from pokie.cache import LocalCache, RedisCache
+from pokie.cache.serializer import (
+    get_cache_serializer,
+    CompressedSerializer,
+    PickleSerializer,
+    JsonSerializer,
+    lz4_frame,
+)
+from pokie.constants import (
+    CACHE_SERIALIZER_PICKLE,
+    CACHE_SERIALIZER_MSGPACK,
+    CACHE_SERIALIZER_JSON,
+    CACHE_SERIALIZER_RAW,
+    CACHE_COMPRESSION_ZLIB,
+    CACHE_COMPRESSION_LZ4,
+)
+
+compression_methods = [None, CACHE_COMPRESSION_ZLIB]
+if lz4_frame is not None:
+    compression_methods.append(CACHE_COMPRESSION_LZ4)
+
+value = {
+    "name": "john",
+    "items": [1, 2.5, None, True, "x" * 2000],
+    "nested": {"key": ["value"]},
+}
+
+
+class TestCacheSerializer:
+    @pytest.mark.parametrize("compression", compression_methods)
+    @pytest.mark.parametrize(
+        "name",
+        [CACHE_SERIALIZER_PICKLE, CACHE_SERIALIZER_MSGPACK, CACHE_SERIALIZER_JSON],
+    )
+    def test_roundtrip(self, name, compression):
+        serializer = get_cache_serializer(name, compression, threshold=100)
+        data = serializer.dumps(value)
+        assert isinstance(data, bytes)
+        assert serializer.loads(data) == value
+        if compression:
+            # compressed above the threshold
+            assert len(data) < 1000
+            small = serializer.dumps("small")
+            assert small[:1] == CompressedSerializer.HEADER_NONE
+            assert serializer.loads(small) == "small"
+
+    def test_types(self):
+        typed = {
+            "date": datetime.date(2024, 1, 2),
+            "datetime": datetime.datetime(2024, 1, 2, 3, 4, 5),
+            "decimal": decimal.Decimal("1.50"),
+            "uuid": uuid.UUID(int=1),
+        }
+        for name in [CACHE_SERIALIZER_PICKLE, CACHE_SERIALIZER_MSGPACK]:
+            serializer = get_cache_serializer(name)
+            assert serializer.loads(serializer.dumps(typed)) == typed
+
+        serializer = get_cache_serializer(CACHE_SERIALIZER_JSON)
+        assert serializer.loads(serializer.dumps(typed)) == {
+            "date": "2024-01-02",
+            "datetime": "2024-01-02T03:04:05",
+            "decimal": "1.50",
+            "uuid": "00000000-0000-0000-0000-000000000001",
+        }
+
+    def test_raw(self):
+        serializer = get_cache_serializer(CACHE_SERIALIZER_RAW)
+        assert serializer.loads(serializer.dumps(b"bytes")) == b"bytes"
+        assert serializer.loads(serializer.dumps("text")) == b"text"
+        with pytest.raises(TypeError):
+            serializer.dumps({"key": "value"})
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            get_cache_serializer("invalid")
+        with pytest.raises(ValueError):
+            get_cache_serializer(CACHE_SERIALIZER_PICKLE, "invalid")
+        serializer = get_cache_serializer(
+            CACHE_SERIALIZER_PICKLE, CACHE_COMPRESSION_ZLIB
+        )
+        with pytest.raises(ValueError):
+            serializer.loads(b"\x09data")
+
+    def test_incompressible(self):
+        serializer = CompressedSerializer(
+            get_cache_serializer(CACHE_SERIALIZER_RAW), threshold=10
+        )
+        data = serializer.dumps(bytes(range(256)))
+        assert data[:1] == CompressedSerializer.HEADER_NONE
+
+    def test_backends(self, pokie_di):
+        serializer = get_cache_serializer(
+            CACHE_SERIALIZER_JSON, CACHE_COMPRESSION_ZLIB, threshold=100
+        )
+        redis_cache = RedisCache(pokie_di, serializer)
+        redis_cache.set("serializer:key", value)
+        assert redis_cache.get("serializer:key") == value
+        stored = redis_cache.client().get("serializer:key")
+        assert stored[:1] == CompressedSerializer.HEADER_ZLIB
+        redis_cache.remove("serializer:key")
+
+        local_cache = LocalCache(pokie_di, serializer=JsonSerializer())
+        local_cache.set("key", {"date": datetime.date(2024, 1, 1)})
+        assert local_cache.get("key") == {"date": "2024-01-01"}
+        assert isinstance(LocalCache(pokie_di).serializer, PickleSerializer)
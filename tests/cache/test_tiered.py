@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from pokie.cache import TieredCache, LocalCache, RedisCache
+
+
+def wait_for(condition, timeout=2.0):
+    limit = time.monotonic() + timeout
+    while time.monotonic() < limit:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def tiered(pokie_di):
+    caches = []
+
+    def build(**kwargs):
+        cache = TieredCache(pokie_di, channel="pokie:test:invalidate", **kwargs)
+        caches.append(cache)
+        return cache
+
+    yield build
+    for cache in caches:
+        cache.close()
+
+
+class TestTieredCache:
+    def test_read_through(self, pokie_di, tiered):
+        redis_cache = RedisCache(pokie_di)
+        redis_cache.remove("tiered:key")
+        cache = tiered()
+        assert cache.get("tiered:key") is None
+        redis_cache.set("tiered:key", {"value": 1}, ttl=60)
+
+        assert cache.get("tiered:key") == {"value": 1}
+        assert cache.l1.has("tiered:key") is True
+        # served from L1
+        redis_cache.client().set("tiered:key", b"invalid")
+        assert cache.get("tiered:key") == {"value": 1}
+
+        cache.remove("tiered:key")
+        assert cache.has("tiered:key") is False
+        assert redis_cache.has("tiered:key") is False
+
+    def test_l1_ttl(self, pokie_di, tiered):
+        cache = tiered(ttl=60, prefix_ttl={"nol1:": 0, "short:": 1, "short:long:": 120})
+        assert cache.l1_ttl("other") == 60
+        assert cache.l1_ttl("nol1:key") == 0
+        assert cache.l1_ttl("short:key") == 1
+        assert cache.l1_ttl("short:long:key") == 120
+
+        cache.set("nol1:key", "value")
+        assert cache.l1.has("nol1:key") is False
+        assert cache.get("nol1:key") == "value"
+        assert cache.l1.has("nol1:key") is False
+
+        # L1 entries do not outlive the L2 entry
+        cache.set("short:key", "value", ttl=60)
+        cache.l1.remove("short:key")
+        RedisCache(pokie_di).client().pexpire("short:key", 100)
+        assert cache.get("short:key") == "value"
+        time.sleep(0.2)
+        assert cache.l1.has("short:key") is False
+        cache.remove("short:key")
+
+    def test_invalidation(self, pokie_di, tiered):
+        # two caches, as if in different processes
+        worker1 = tiered()
+        worker2 = tiered()
+        worker1.set("tiered:shared", "first")
+        assert worker2.get("tiered:shared") == "first"
+        assert worker2.l1.has("tiered:shared") is True
+
+        worker1.set("tiered:shared", "second")
+        assert wait_for(lambda: not worker2.l1.has("tiered:shared"))
+        assert worker2.get("tiered:shared") == "second"
+        # own messages are ignored
+        assert worker1.l1.has("tiered:shared") is True
+
+        worker1.remove("tiered:shared")
+        assert wait_for(lambda: not worker2.l1.has("tiered:shared"))
+        assert worker2.get("tiered:shared") is None
+
+        worker2.set("tiered:other", 1)
+        # values read while an invalidation is received are not kept in L1
+        assert wait_for(
+            lambda: worker1.get("tiered:other") == 1 and worker1.l1.has("tiered:other")
+        )
+        worker2.purge()
+        assert wait_for(lambda: len(worker1.l1) == 0)
+
+    def test_custom_tiers(self, pokie_di, tiered):
+        l1 = LocalCache(pokie_di, max_entries=2)
+        l2 = LocalCache(pokie_di)
+        cache = tiered(l1=l1, l2=l2)
+        for i in range(3):
+            cache.set("key{}".format(i), i)
+        assert len(l1) == 2
+        assert len(l2) == 3
+        assert cache.get("key0") == 0
+        assert l1.has("key0") is True
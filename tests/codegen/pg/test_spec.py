@@ -1,4 +1,8 @@
-from pokie.codegen.pg import PgTableSpec
+import pytest
+
+import pokie
+from pokie.cache import MemoryCache
+from pokie.codegen.pg import PgTableSpec, PgTableSpecCache
 
 
 class TestPgSpec:
@@ -452,3 +456,78 @@ class TestPgSpec:
             assert field.fk_table == field_spec["fk_table"]
             assert field.fk_schema == field_spec["fk_schema"]
             assert field.fk_column == field_spec["fk_column"]
+
+    def test_tablespec_cache(self, pokie_db, pokie_di):
+        cache = PgTableSpecCache(pokie_db, MemoryCache(pokie_di))
+        generator = PgTableSpec(pokie_db, cache=cache)
+        assert generator.cached("tablespec_rel") is None
+
+        spec = generator.generate("tablespec_rel")
+        cached = generator.cached("tablespec_rel")
+        assert cached == spec
+
+        # fingerprint is memoized; a fresh cache object recomputes the same value
+        other = PgTableSpecCache(pokie_db, cache.backend)
+        assert other.fingerprint("public") == cache.fingerprint("public")
+        assert PgTableSpec(pokie_db, cache=other).cached("tablespec_rel") == spec
+
+        # schema changes invalidate the fingerprint
+        with pokie_db.cursor() as c:
+            c.exec("ALTER TABLE tablespec_rel ADD COLUMN field_extra int")
+        other.reset()
+        assert other.fingerprint("public") != cache.fingerprint("public")
+        spec = PgTableSpec(pokie_db, cache=other).generate("tablespec_rel")
+        assert "field_extra" in [f.name for f in spec.fields]
+
+        with pokie_db.cursor() as c:
+            c.exec("ALTER TABLE tablespec_rel DROP COLUMN field_extra")
+
+    def test_tablespec_cache_key(self, pokie_db, pokie_di, monkeypatch):
+        cache = PgTableSpecCache(pokie_db, MemoryCache(pokie_di))
+        key = cache.key("tablespec_rel", "public")
+        assert ":{}:".format(pokie.__version__) in key
+        assert (
+            PgTableSpecCache(pokie_db, cache.backend, version="v2").key(
+                "tablespec_rel", "public"
+            )
+            != key
+        )
+
+        # specs cached by other pokie versions are ignored
+        PgTableSpec(pokie_db, cache=cache).generate("tablespec_rel")
+        monkeypatch.setattr("pokie.codegen.pg.cache.__version__", "0.0.0")
+        assert cache.key("tablespec_rel", "public") != key
+        assert cache.get("tablespec_rel", "public") is None
+
+    def test_tablespec_generate_many(self, pokie_db):
+        generator = PgTableSpec(pokie_db)
+        specs = generator.generate_many()
+        assert "tablespec_serial" in specs.keys()
+        assert "tablespec_rel" in specs.keys()
+        assert "customers" in specs.keys()
+
+        # bulk introspection must match per-table introspection
+        for name, spec in specs.items():
+            assert spec == generator.generate(name), name
+
+        tables = ["tablespec_rel", "tablespec_natural_pk"]
+        specs = generator.generate_many(tables)
+        assert list(specs.keys()) == tables
+        assert specs["tablespec_natural_pk"].pk == "code"
+
+        with pytest.raises(ValueError):
+            generator.generate_many(["tablespec_rel", "tablespec_missing"])
+
+    def test_tablespec_generate_many_cache(self, pokie_db, pokie_di):
+        cache = PgTableSpecCache(pokie_db, MemoryCache(pokie_di))
+        generator = PgTableSpec(pokie_db, cache=cache)
+        specs = generator.generate_many(["tablespec_rel", "tablespec_serial"])
+        assert cache.get("tablespec_rel", "public") == specs["tablespec_rel"]
+        assert cache.get("tablespec_serial", "public") == specs["tablespec_serial"]
+
+        # cached specs are returned without introspection
+        cache.backend.set(
+            cache.key("tablespec_rel", "public"), generator.generate("customers")
+        )
+        specs = generator.generate_many(["tablespec_rel"])
+        assert specs["tablespec_rel"].table == "customers"
@@ -0,0 +1,78 @@
+import pytest
+from rick.base import Di, Container
+
+from pokie.cache import RedisCache, TieredCache, LocalCache, DummyCache
+from pokie.cache.serializer import CompressedSerializer, JsonSerializer
+from pokie.constants import DI_CONFIG, DI_REDIS, DI_CACHE
+from pokie.core.factories.cache import CacheFactory
+
+
+def build_di(pokie_di, cfg: dict) -> Di:
+    di = Di()
+    di.add(DI_CONFIG, Container(cfg))
+    di.add(DI_REDIS, pokie_di.get(DI_REDIS))
+    CacheFactory(di)
+    return di
+
+
+class TestCacheFactory:
+    def test_default(self, pokie_di):
+        di = build_di(pokie_di, {})
+        assert isinstance(di.get(DI_CACHE), RedisCache)
+
+    def test_tiered(self, pokie_di):
+        di = build_di(
+            pokie_di,
+            {
+                "cache_backend": "tiered",
+                "cache_local_max_entries": "100",
+                "cache_serializer": "json",
+                "cache_compression": "zlib",
+                "cache_compression_threshold": "10",
+                "cache_l1_ttl": "30",
+                "cache_l1_prefix_ttl": {"session:": "0"},
+                "cache_invalidation_channel": "pokie:test:factory",
+            },
+        )
+        cache = di.get(DI_CACHE)
+        assert isinstance(cache, TieredCache)
+        assert cache.l1.max_entries == 100
+        assert cache.ttl == 30
+        assert cache.l1_ttl("session:key") == 0
+        assert cache.channel == "pokie:test:factory"
+        # L1 values are not compressed
+        assert isinstance(cache.l1.serializer, JsonSerializer)
+        cache.set("factory:key", {"key": "x" * 100})
+        stored = cache.l2.client().get("factory:key")
+        assert stored[:1] == CompressedSerializer.HEADER_ZLIB
+        assert cache.get("factory:key") == {"key": "x" * 100}
+        cache.remove("factory:key")
+        cache.close()
+
+    def test_local(self, pokie_di):
+        di = build_di(
+            pokie_di,
+            {
+                "cache_backend": "local",
+                "cache_local_max_entries": "10",
+                "cache_local_max_bytes": "1000",
+                "cache_local_policy": "tinylfu",
+            },
+        )
+        cache = di.get(DI_CACHE)
+        assert isinstance(cache, LocalCache)
+        assert cache.max_entries == 10
+        assert cache.max_bytes == 1000
+        assert cache.policy == "tinylfu"
+
+    def test_null(self, pokie_di):
+        di = build_di(pokie_di, {"cache_backend": "null"})
+        cache = di.get(DI_CACHE)
+        assert isinstance(cache, DummyCache)
+        cache.set("key", "value")
+        assert cache.get("key") is None
+
+    def test_invalid(self, pokie_di):
+        di = build_di(pokie_di, {"cache_backend": "invalid"})
+        with pytest.raises(RuntimeError):
+            di.get(DI_CACHE)
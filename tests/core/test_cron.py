@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+
+from pokie.core.cron import CronExpression
+
+
+class TestCronExpression:
+    # a Sunday
+    now = datetime(2026, 10, 18, 12, 30, 15)
+
+    @pytest.mark.parametrize(
+        "expr,expected",
+        [
+            ("* * * * *", datetime(2026, 10, 18, 12, 31)),
+            ("*/15 * * * *", datetime(2026, 10, 18, 12, 45)),
+            ("5/20 * * * *", datetime(2026, 10, 18, 12, 45)),
+            ("0,30 8-10 * * *", datetime(2026, 10, 19, 8, 0)),
+            ("0 9 * * mon-fri", datetime(2026, 10, 19, 9, 0)),
+            ("0 9 * * 7", datetime(2026, 10, 25, 9, 0)),
+            ("30 12 18 10 *", datetime(2027, 10, 18, 12, 30)),
+            ("0 0 29 feb *", datetime(2028, 2, 29, 0, 0)),
+            # day of month or day of week
+            ("0 0 13 * fri", datetime(2026, 10, 23, 0, 0)),
+            ("@hourly", datetime(2026, 10, 18, 13, 0)),
+            ("@daily", datetime(2026, 10, 19, 0, 0)),
+            ("@monthly", datetime(2026, 11, 1, 0, 0)),
+            ("@yearly", datetime(2027, 1, 1, 0, 0)),
+        ],
+    )
+    def test_next(self, expr, expected):
+        assert CronExpression(expr).next(self.now) == expected
+
+    @pytest.mark.parametrize(
+        "expr",
+        [
+            "* * * *",
+            "60 * * * *",
+            "* 24 * * *",
+            "0 0 0 * *",
+            "*/0 * * * *",
+            "5-1 * * * *",
+            "x * * * *",
+        ],
+    )
+    def test_invalid(self, expr):
+        with pytest.raises(ValueError):
+            CronExpression(expr)
+
+    def test_never_matches(self):
+        with pytest.raises(ValueError):
+            CronExpression("0 0 30 2 *").next(self.now)
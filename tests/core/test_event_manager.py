@@ -0,0 +1,275 @@
+import atexit
+import threading
+import time
+import uuid
+
+import pytest
+from rick.base import Container, Di
+from rick.event import EventHandler
+
+from pokie.constants import DI_EVENTS, DI_TASK_QUEUE, EVENT_TASK_NAME
+from pokie.contrib.base.module import Module as BaseModule
+from pokie.core import FlaskApplication
+from pokie.core.event_manager import PokieEventManager, BatchEventHandler
+from pokie.queue import PgTaskQueue, TaskWorker
+
+# calls recorded by the handlers below: (handler, thread name, argument)
+calls = []
+
+
+class SyncHandler(EventHandler):
+    def itemSaved(self, **kwargs):
+        calls.append(("sync", threading.current_thread().name, kwargs["value"]))
+
+
+class AsyncHandler(EventHandler):
+    dispatch_mode = "async"
+
+    def itemSaved(self, **kwargs):
+        time.sleep(0.05)
+        calls.append(("async", threading.current_thread().name, kwargs["value"]))
+
+
+class FailingHandler(EventHandler):
+    dispatch_mode = "async"
+
+    def itemSaved(self, **kwargs):
+        raise ValueError("handler failed")
+
+
+class TaskHandler(EventHandler):
+    dispatch_mode = "task"
+
+    def itemSaved(self, **kwargs):
+        calls.append(("task", threading.current_thread().name, kwargs["value"]))
+
+
+class AuditHandler(BatchEventHandler):
+    dispatch_mode = "async"
+    batch_size = 3
+    batch_interval = 0.2
+
+    def itemSaved(self, events: list):
+        calls.append(
+            ("batch", threading.current_thread().name, [e["value"] for e in events])
+        )
+
+
+def on_item_saved(event_name, **kwargs):
+    calls.append(("function", threading.current_thread().name, kwargs["value"]))
+
+
+def handler_path(cls) -> str:
+    return "{}.{}".format(__name__, cls.__name__)
+
+
+@pytest.fixture
+def evt_mgr():
+    calls.clear()
+    mgr = PokieEventManager(workers=2)
+    yield mgr
+    mgr.shutdown()
+
+
+class TestPokieEventManager:
+    def test_sync(self, evt_mgr):
+        evt_mgr.add_handler("itemSaved", handler_path(SyncHandler))
+        evt_mgr.add_handler("itemSaved", handler_path(on_item_saved))
+        assert evt_mgr.dispatch(Di(), "itemSaved", value=1) is True
+        thread = threading.current_thread().name
+        assert calls == [("sync", thread, 1), ("function", thread, 1)]
+        assert evt_mgr.dispatch(Di(), "missing") is False
+
+    def test_handler_mode(self, evt_mgr):
+        evt_mgr.add_handler("itemSaved", handler_path(AsyncHandler), 10)
+        evt_mgr.add_handler("itemSaved", handler_path(SyncHandler), 20)
+        evt_mgr.dispatch(Di(), "itemSaved", value=1)
+        # the sync handler does not wait for the async one
+        assert [call[0] for call in calls] == ["sync"]
+
+        assert evt_mgr.flush(5) is True
+        assert [call[0] for call in calls] == ["sync", "async"]
+        assert calls[1][1].startswith("pokie-event")
+
+    def test_event_mode(self, evt_mgr):
+        evt_mgr.add_handler("itemSaved", handler_path(SyncHandler))
+        evt_mgr.set_dispatch_mode("itemSaved", "async")
+        assert evt_mgr.get_dispatch_mode("itemSaved") == "async"
+        assert evt_mgr.get_dispatch_mode("other") == "sync"
+
+        evt_mgr.dispatch(Di(), "itemSaved", value=1)
+        evt_mgr.flush(5)
+        assert calls[0][1].startswith("pokie-event")
+
+    def test_default_mode(self):
+        calls.clear()
+        mgr = PokieEventManager(default_mode="async")
+        mgr.add_handler("itemSaved", handler_path(SyncHandler))
+        mgr.dispatch(Di(), "itemSaved", value=1)
+        mgr.shutdown()
+        assert calls[0][1].startswith("pokie-event")
+
+    def test_invalid_mode(self, evt_mgr):
+        with pytest.raises(RuntimeError):
+            evt_mgr.set_dispatch_mode("itemSaved", "invalid")
+        with pytest.raises(RuntimeError):
+            PokieEventManager(default_mode="invalid")
+
+    def test_async_errors(self, evt_mgr):
+        evt_mgr.add_handler("itemSaved", handler_path(FailingHandler))
+        evt_mgr.add_handler("itemSaved", handler_path(SyncHandler))
+        # async failures do not reach the dispatcher
+        evt_mgr.dispatch(Di(), "itemSaved", value=1)
+        evt_mgr.flush(5)
+        assert evt_mgr.errors == 1
+        assert len(calls) == 1
+
+    def test_max_pending(self):
+        calls.clear()
+        mgr = PokieEventManager(workers=1, max_pending=1)
+        mgr.add_handler("itemSaved", handler_path(AsyncHandler))
+        mgr.dispatch(Di(), "itemSaved", value=1)
+        # the queue is full; runs in the dispatching thread
+        mgr.dispatch(Di(), "itemSaved", value=2)
+        assert ("async", threading.current_thread().name, 2) in calls
+        mgr.shutdown()
+        assert len(calls) == 2
+
+    def test_batch_size(self, evt_mgr):
+        evt_mgr.add_handler("itemSaved", handler_path(AuditHandler))
+        for i in range(7):
+            evt_mgr.dispatch(Di(), "itemSaved", value=i)
+        evt_mgr.flush(5)
+        batches = [call[2] for call in calls]
+        assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+    def test_batch_interval(self, evt_mgr):
+        evt_mgr.add_handler("itemSaved", handler_path(AuditHandler))
+        evt_mgr.dispatch(Di(), "itemSaved", value=1)
+        evt_mgr.dispatch(Di(), "itemSaved", value=2)
+        assert calls == []
+
+        # delivered by the flush thread after batch_interval
+        deadline = time.monotonic() + 5
+        while len(calls) == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert calls[0][2] == [1, 2]
+
+    def test_sync_batch_handler(self, evt_mgr):
+        evt_mgr.add_handler("itemSaved", handler_path(AuditHandler))
+        evt_mgr.set_dispatch_mode("itemSaved", "sync")
+        # the handler mode takes precedence over the event mode
+        evt_mgr.dispatch(Di(), "itemSaved", value=1)
+        assert calls == []
+        evt_mgr.flush(5)
+        assert calls[0][2] == [1]
+
+    def test_shutdown(self):
+        calls.clear()
+        mgr = PokieEventManager()
+        mgr.add_handler("itemSaved", handler_path(AuditHandler))
+        mgr.add_handler("itemSaved", handler_path(AsyncHandler))
+        mgr.dispatch(Di(), "itemSaved", value=1)
+        assert mgr.shutdown(5) is True
+        assert sorted(call[0] for call in calls) == ["async", "batch"]
+
+        # after shutdown, handlers run in the dispatching thread
+        calls.clear()
+        mgr.dispatch(Di(), "itemSaved", value=2)
+        thread = threading.current_thread().name
+        assert sorted(calls) == [("async", thread, 2), ("batch", thread, [2])]
+
+    def test_exit_hook(self, monkeypatch):
+        registered = []
+        monkeypatch.setattr(atexit, "register", registered.append)
+        monkeypatch.setattr(atexit, "unregister", registered.remove)
+        calls.clear()
+        mgr = PokieEventManager()
+        mgr.add_handler("itemSaved", handler_path(AuditHandler))
+        mgr.add_handler("itemSaved", handler_path(SyncHandler))
+        mgr.dispatch(Di(), "itemSaved", value=1)
+        # buffered batches are flushed on exit
+        assert registered == [mgr.shutdown]
+        registered[0]()
+        assert registered == []
+        assert sorted(call[0] for call in calls) == ["batch", "sync"]
+
+    def test_uses_task_dispatch(self, evt_mgr):
+        evt_mgr.add_handler("itemSaved", handler_path(SyncHandler))
+        assert evt_mgr.uses_task_dispatch() is False
+        evt_mgr.set_dispatch_mode("itemSaved", "task")
+        assert evt_mgr.uses_task_dispatch() is True
+
+        mgr = PokieEventManager()
+        mgr.add_handler("itemSaved", handler_path(TaskHandler))
+        assert mgr.uses_task_dispatch() is True
+
+    def test_circular_dispatch(self, evt_mgr):
+        evt_mgr.add_handler("loop", handler_path(LoopHandler))
+        di = Di()
+        di.add(DI_EVENTS, evt_mgr)
+        with pytest.raises(RuntimeError):
+            evt_mgr.dispatch(di, "loop")
+
+
+class LoopHandler(EventHandler):
+    def loop(self, **kwargs):
+        self.get_di().get(DI_EVENTS).dispatch(self.get_di(), "loop")
+
+
+class TestTaskDispatch:
+    def test_task_mode(self, pokie_di):
+        calls.clear()
+        queue_name = "default"
+        queue = PgTaskQueue(pokie_di)
+        di = Di()
+        di.add(DI_TASK_QUEUE, queue)
+        evt_mgr = PokieEventManager()
+        di.add(DI_EVENTS, evt_mgr)
+        evt_mgr.add_handler("itemSaved", handler_path(SyncHandler))
+        evt_mgr.set_dispatch_mode("itemSaved", "task")
+
+        value = uuid.uuid4().hex
+        evt_mgr.dispatch(di, "itemSaved", value=value)
+        assert calls == []
+
+        # run by the task worker
+        worker = TaskWorker(
+            di,
+            queue,
+            {EVENT_TASK_NAME: "pokie.contrib.base.task.EventTask"},
+            queue_name=queue_name,
+            silent=True,
+        )
+        while worker.run_once() > 0:
+            pass
+        worker.shutdown()
+        assert ("sync", calls[-1][1], value) in calls
+
+
+class TestApplicationEvents:
+    def test_event_manager(self, pokie_di):
+        assert isinstance(pokie_di.get(DI_EVENTS), PokieEventManager)
+
+    def test_shutdown(self):
+        calls.clear()
+        app = FlaskApplication(Container({"event_dispatch": "async"}))
+        app.build([], [])
+        evt_mgr = app.di.get(DI_EVENTS)
+        assert evt_mgr.default_mode == "async"
+
+        evt_mgr.add_handler("itemSaved", handler_path(AsyncHandler))
+        evt_mgr.dispatch(app.di, "itemSaved", value=1)
+        app.shutdown()
+        assert [call[0] for call in calls] == ["async"]
+
+    def test_task_mode_without_queue(self, monkeypatch):
+        events = {"itemSaved": {10: [handler_path(SyncHandler)]}}
+        monkeypatch.setattr(BaseModule, "events", events, False)
+        app = FlaskApplication(Container({}))
+        app.build([], [])
+
+        # detected when the application is built, instead of on dispatch
+        app = FlaskApplication(Container({"event_dispatch": "task"}))
+        with pytest.raises(RuntimeError, match="DI_TASK_QUEUE"):
+            app.build([], [])
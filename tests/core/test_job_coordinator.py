@@ -0,0 +1,280 @@
+import threading
+import time
+
+import pytest
+from rick.base import Di, Container
+from rick.mixin import Injectable, Runnable
+from rick_db.backend.pg import PgConnection
+
+from pokie.constants import (
+    DI_CONFIG,
+    DI_REDIS,
+    DI_JOB_COORDINATOR,
+    CFG_TEST_DB_HOST,
+    CFG_TEST_DB_PORT,
+    CFG_TEST_DB_USER,
+    CFG_TEST_DB_PASSWORD,
+    CFG_TEST_DB_SSL,
+)
+from pokie.core.factories.job_coordinator import JobCoordinatorFactory
+from pokie.core.job_coordinator import (
+    JobCoordinator,
+    PgJobCoordinator,
+    RedisJobCoordinator,
+    job_shard,
+)
+from pokie.core.job_runner import JobRunner
+
+
+class CounterJob(Injectable, Runnable):
+    def __init__(self, di: Di):
+        super().__init__(di)
+        self.counter = 0
+
+    def run(self, di: Di):
+        self.counter += 1
+
+
+class LocalJob(CounterJob):
+    job_distributed = False
+
+
+class FirstJob(CounterJob):
+    pass
+
+
+class SecondJob(CounterJob):
+    pass
+
+
+class ThirdJob(CounterJob):
+    pass
+
+
+class BlockingJob(CounterJob):
+    def __init__(self, di: Di):
+        super().__init__(di)
+        self.release = threading.Event()
+
+    def run(self, di: Di):
+        super().run(di)
+        self.release.wait(5)
+
+
+class RecordingCoordinator(JobCoordinator):
+    """
+    In-memory coordinator recording lease calls
+    """
+
+    def __init__(self, owned: bool = True):
+        super().__init__("node")
+        self.owned = owned
+        self.acquired = []
+        self.released = []
+
+    def acquire(self, name: str, ttl: float) -> bool:
+        self.acquired.append(name)
+        return self.owned
+
+    def release(self, name: str):
+        self.released.append(name)
+
+    def release_all(self):
+        self.released.append("*")
+
+
+def pg_connection(pokie_di) -> PgConnection:
+    cfg = pokie_di.get(DI_CONFIG)
+    return PgConnection(
+        dbname="postgres",
+        host=cfg.get(CFG_TEST_DB_HOST, "localhost"),
+        port=int(cfg.get(CFG_TEST_DB_PORT, 5432)),
+        user=cfg.get(CFG_TEST_DB_USER, "postgres"),
+        password=cfg.get(CFG_TEST_DB_PASSWORD, ""),
+        sslmode="require" if cfg.get(CFG_TEST_DB_SSL) else "disable",
+    )
+
+
+@pytest.fixture(params=["pgsql", "redis"])
+def coordinators(request, pokie_di):
+    if request.param == "pgsql":
+        # one session per node
+        nodes = [
+            PgJobCoordinator(pg_connection(pokie_di), "node{}".format(i))
+            for i in range(2)
+        ]
+    else:
+        redis = pokie_di.get(DI_REDIS)
+        prefix = "pokie:test:job:"
+        nodes = [
+            RedisJobCoordinator(redis, "node{}".format(i), prefix) for i in range(2)
+        ]
+    yield nodes
+    for node in nodes:
+        node.release_all()
+        if request.param == "pgsql":
+            node._db.close()
+
+
+class TestJobCoordinator:
+    def test_shard(self):
+        assert job_shard("module.Job", 1) == 0
+        shards = {job_shard("module.Job{}".format(i), 4) for i in range(100)}
+        assert shards == {0, 1, 2, 3}
+        assert job_shard("module.Job", 4) == job_shard("module.Job", 4)
+
+    def test_lease(self, coordinators):
+        first, second = coordinators
+        assert first.acquire("job", 10) is True
+        assert second.acquire("job", 10) is False
+        # renewed by the owner
+        assert first.acquire("job", 10) is True
+        assert second.acquire("other", 10) is True
+
+        # only the owner can release
+        second.release("job")
+        assert second.acquire("job", 10) is False
+        first.release("job")
+        assert second.acquire("job", 10) is True
+        assert first.acquire("job", 10) is False
+
+        second.release_all()
+        assert first.acquire("job", 10) is True
+        assert first.acquire("other", 10) is True
+
+    def test_redis_expiry(self, pokie_di):
+        redis = pokie_di.get(DI_REDIS)
+        first = RedisJobCoordinator(redis, prefix="pokie:test:job:")
+        second = RedisJobCoordinator(redis, prefix="pokie:test:job:")
+        try:
+            assert first.acquire("expiring", 0.2) is True
+            assert first.owner("expiring") == first.token
+            assert second.acquire("expiring", 0.2) is False
+            # the owner stopped without releasing the lease
+            time.sleep(0.3)
+            assert second.acquire("expiring", 0.2) is True
+        finally:
+            first.release_all()
+            second.release_all()
+
+    def test_runner(self, coordinators):
+        di = Di()
+        nodes = []
+        for coordinator in coordinators:
+            jobs = [CounterJob(di), LocalJob(di)]
+            nodes.append((JobRunner(jobs, silent=True, coordinator=coordinator), jobs))
+
+        for runner, _ in nodes:
+            runner.run_once(di)
+        for runner, _ in nodes:
+            runner.states[0].last_run = 0
+            runner.run_once(di)
+
+        (first, first_jobs), (second, second_jobs) = nodes
+        # distributed jobs run on a single node
+        assert first_jobs[0].counter == 2
+        assert second_jobs[0].counter == 0
+        assert second.states[0].skipped == 2
+        # local jobs run everywhere
+        assert first_jobs[1].counter == 2
+        assert second_jobs[1].counter == 2
+
+        # the owner stops; another node takes over
+        first.shutdown()
+        second.states[0].last_run = 0
+        second.run_once(di)
+        assert second_jobs[0].counter == 1
+
+    def test_lease_renewal(self):
+        di = Di()
+        job = BlockingJob(di)
+        coordinator = RecordingCoordinator()
+        runner = JobRunner([job], silent=True, coordinator=coordinator)
+        runner.LEASE_RENEW_INTERVAL = 0.05
+        threading.Timer(0.3, job.release.set).start()
+        runner.run_once(di)
+        # renewed while running
+        assert len(coordinator.acquired) > 2
+
+        runner.shutdown()
+        renewals = len(coordinator.acquired)
+        time.sleep(0.2)
+        assert len(coordinator.acquired) == renewals
+
+    def test_shutdown_running(self):
+        di = Di()
+        job = BlockingJob(di)
+        coordinator = RecordingCoordinator()
+        runner = JobRunner(
+            [job, FirstJob(di)], silent=True, workers=1, coordinator=coordinator
+        )
+        thread = threading.Thread(target=runner.run_loop, args=(di,), daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while job.counter == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        runner.stop()
+        thread.join(5)
+        running, idle = runner.states
+
+        # the lease of the running job is kept until the run finishes
+        runner.shutdown(wait_running=False)
+        assert running.path not in coordinator.released
+        assert idle.path in coordinator.released
+        job.release.set()
+        deadline = time.monotonic() + 5
+        while running.path not in coordinator.released and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert running.path in coordinator.released
+
+    def test_lease_retry(self):
+        di = Di()
+        coordinator = RecordingCoordinator(owned=False)
+        runner = JobRunner([CounterJob(di)], silent=True, coordinator=coordinator)
+        runner.LEASE_RETRY = 0.5
+        thread = threading.Thread(target=runner.run_loop, args=(di,), daemon=True)
+        thread.start()
+        time.sleep(0.8)
+        runner.stop()
+        thread.join(5)
+        # polled every LEASE_RETRY seconds, instead of MIN_INTERVAL
+        assert len(coordinator.acquired) == 2
+        assert runner.states[0].skipped == 2
+
+    def test_sharding(self):
+        di = Di()
+        jobs = [FirstJob(di), SecondJob(di), ThirdJob(di), LocalJob(di)]
+        names = set()
+        for index in range(2):
+            runner = JobRunner(jobs, silent=True, shards=2, shard_index=index)
+            shard = [state.name for state in runner.states]
+            assert "LocalJob" in shard
+            names.update(shard)
+            for state in runner.states:
+                if state.distributed:
+                    assert job_shard(state.path, 2) == index
+        assert names == {"FirstJob", "SecondJob", "ThirdJob", "LocalJob"}
+
+        with pytest.raises(ValueError):
+            JobRunner(jobs, shards=2, shard_index=2)
+
+    def test_factory(self, pokie_di):
+        di = Di()
+        di.add(DI_CONFIG, Container({}))
+        JobCoordinatorFactory(di)
+        assert di.has(DI_JOB_COORDINATOR) is False
+
+        di = Di()
+        di.add(
+            DI_CONFIG, Container({"job_coordinator": "redis", "job_node_id": "node"})
+        )
+        di.add(DI_REDIS, pokie_di.get(DI_REDIS))
+        JobCoordinatorFactory(di)
+        coordinator = di.get(DI_JOB_COORDINATOR)
+        assert isinstance(coordinator, RedisJobCoordinator)
+        assert coordinator.node_id == "node"
+
+        di = Di()
+        di.add(DI_CONFIG, Container({"job_coordinator": "invalid"}))
+        with pytest.raises(RuntimeError):
+            JobCoordinatorFactory(di)
@@ -0,0 +1,167 @@
+import io
+import json
+import os
+import time
+from argparse import Namespace
+
+from rick.resource.console import ConsoleWriter
+
+from pokie.contrib.base.cli.job import JobStatsCmd
+from pokie.core.job_metrics import (
+    Histogram,
+    prometheus_text,
+    read_stats,
+    write_stats,
+)
+
+
+def snapshot(name="CounterJob", runs=2, durations=(0.02, 3.0), error=None):
+    duration = Histogram()
+    for value in durations:
+        duration.observe(value)
+    lag = Histogram()
+    lag.observe(0.5)
+    return {
+        "name": name,
+        "path": "app.job.{}".format(name),
+        "runs": runs,
+        "failures": 1 if error else 0,
+        "consecutive_failures": 0,
+        "timeouts": 0,
+        "skipped": 0,
+        "cpu_time": 0.1,
+        "throughput": 1.5,
+        "last_duration": durations[-1],
+        "last_lag": 0.5,
+        "last_error": error,
+        "last_error_at": time.time() if error else 0.0,
+        "last_success_at": time.time(),
+        "duration": duration.to_dict(),
+        "lag": lag.to_dict(),
+    }
+
+
+class TestHistogram:
+    def test_observe(self):
+        h = Histogram((0.1, 1.0, 10.0))
+        for value in (0.05, 0.1, 0.5, 5, 50):
+            h.observe(value)
+        # bounds are inclusive
+        assert h.counts == [2, 1, 1, 1]
+        assert h.count == 5
+        assert h.sum == 55.65
+        assert h.max == 50
+        assert h.mean == 55.65 / 5
+
+    def test_quantile(self):
+        h = Histogram((0.1, 1.0, 10.0))
+        assert h.quantile(0.5) == 0.0
+        for _ in range(9):
+            h.observe(0.05)
+        h.observe(5)
+        # upper bound of the bucket, or the max observed value
+        assert h.quantile(0.5) == 0.1
+        assert h.quantile(0.9) == 0.1
+        assert h.quantile(0.95) == 5
+        h.observe(50)
+        # above the largest bound
+        assert h.quantile(1) == 50
+
+    def test_serialization(self):
+        h = Histogram()
+        h.observe(0.3)
+        h.observe(2)
+        copy = Histogram.from_dict(json.loads(json.dumps(h.to_dict())))
+        assert copy.counts == h.counts
+        assert copy.count == 2
+        assert copy.sum == h.sum
+        assert copy.max == 2
+
+
+class TestPrometheusText:
+    def test_format(self):
+        text = prometheus_text([snapshot(error="failed")])
+        lines = text.splitlines()
+        assert "# TYPE pokie_job_runs_total counter" in lines
+        assert 'pokie_job_runs_total{job_class="app.job.CounterJob"} 2' in lines
+        assert 'pokie_job_failures_total{job_class="app.job.CounterJob"} 1' in lines
+        assert "# TYPE pokie_job_duration_seconds histogram" in lines
+        # buckets are cumulative
+        assert (
+            'pokie_job_duration_seconds_bucket{job_class="app.job.CounterJob",le="0.025"} 1'
+            in lines
+        )
+        assert (
+            'pokie_job_duration_seconds_bucket{job_class="app.job.CounterJob",le="5.0"} 2'
+            in lines
+        )
+        assert (
+            'pokie_job_duration_seconds_bucket{job_class="app.job.CounterJob",le="+Inf"} 2'
+            in lines
+        )
+        assert (
+            'pokie_job_duration_seconds_count{job_class="app.job.CounterJob"} 2'
+            in lines
+        )
+        assert 'pokie_job_lag_seconds_sum{job_class="app.job.CounterJob"} 0.5' in lines
+        assert text.endswith("\n")
+
+    def test_escape(self):
+        item = snapshot()
+        item["path"] = 'app."quoted"'
+        assert 'job_class="app.\\"quoted\\""' in prometheus_text([item])
+
+
+class TestStatsFile:
+    def test_write_read(self, tmp_path):
+        stats_file = str(tmp_path / "stats.json")
+        metrics_file = str(tmp_path / "jobs.prom")
+        write_stats([snapshot()], stats_file, metrics_file)
+
+        data = read_stats(stats_file)
+        assert data["jobs"][0]["name"] == "CounterJob"
+        assert time.time() - data["generated_at"] < 5
+        with open(metrics_file) as f:
+            assert "pokie_job_duration_seconds_bucket" in f.read()
+        # no temporary files left behind
+        assert sorted(os.listdir(str(tmp_path))) == ["jobs.prom", "stats.json"]
+
+
+class TestJobStatsCmd:
+    def run_cmd(self, pokie_di, **kwargs):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        writer = ConsoleWriter(stdout=stdout, stderr=stderr)
+        cmd = JobStatsCmd(pokie_di, writer=writer)
+        args = Namespace(
+            **{"file": None, "sort": "time", "prometheus": False, **kwargs}
+        )
+        return cmd.run(args), stdout.getvalue(), stderr.getvalue()
+
+    def test_table(self, pokie_di, tmp_path):
+        stats_file = str(tmp_path / "stats.json")
+        write_stats(
+            [
+                snapshot("FastJob", durations=(0.01, 0.01)),
+                snapshot("SlowJob", durations=(2.0, 20.0), error="boom"),
+            ],
+            stats_file,
+        )
+        result, output, _ = self.run_cmd(pokie_di, file=stats_file)
+        assert result is True
+        assert "Runs/min" in output
+        assert "boom" in output
+        # slowest job first
+        assert output.index("SlowJob") < output.index("FastJob")
+
+    def test_prometheus(self, pokie_di, tmp_path):
+        stats_file = str(tmp_path / "stats.json")
+        write_stats([snapshot()], stats_file)
+        result, output, _ = self.run_cmd(pokie_di, file=stats_file, prometheus=True)
+        assert result is True
+        assert "pokie_job_runs_total" in output
+
+    def test_missing_file(self, pokie_di, tmp_path):
+        result, _, error = self.run_cmd(pokie_di, file=str(tmp_path / "missing.json"))
+        assert result is False
+        assert "not found" in error
@@ -1,10 +1,24 @@
+import json
+import os
+import threading
 import time
 
-from rick.base import Di
+import pytest
+import redis
+
+from rick.base import Container, Di
 from rick.mixin import Injectable, Runnable
 from rick.resource.console import ConsoleWriter
 
-from pokie.core.job_runner import JobRunner, JobState
+from pokie.constants import DI_CACHE, DI_REDIS
+from pokie.core import FlaskApplication
+from pokie.core.factories.cache import CacheFactory
+from pokie.core.job_runner import (
+    JobRunner,
+    JobState,
+    JobCancelledError,
+    current_token,
+)
 
 
 class CounterJob(Injectable, Runnable):
@@ -180,6 +194,7 @@ class TestJobRunner:
 
     def test_tty_error_output(self):
         import io
+
         di = self._make_di()
         job = FailingJob(di)
         tty = ConsoleWriter(stdout=io.StringIO(), stderr=io.StringIO())
@@ -190,3 +205,493 @@ class TestJobRunner:
         output = tty.stderr.getvalue()
         assert "FailingJob" in output
         assert "failed" in output
+
+
+class SleepJob(Injectable, Runnable):
+    def __init__(self, di: Di):
+        super().__init__(di)
+        self.counter = 0
+
+    def run(self, di: Di):
+        self.counter += 1
+        time.sleep(0.5)
+
+
+class BlockingJob(Injectable, Runnable):
+    def __init__(self, di: Di):
+        super().__init__(di)
+        self.counter = 0
+        self.release = threading.Event()
+
+    def run(self, di: Di):
+        self.counter += 1
+        self.release.wait(5)
+
+
+class FileJob(Injectable, Runnable):
+    def __init__(self, di: Di, path):
+        super().__init__(di)
+        self.path = path
+
+    def run(self, di: Di):
+        with open(self.path, "a") as f:
+            f.write("{}\n".format(os.getpid()))
+
+
+class ClientJob(FileJob):
+    def run(self, di: Di):
+        client = di.get(DI_REDIS)
+        clients = {
+            "redis": id(client),
+            "db": client.connection_pool.connection_kwargs["db"],
+            "cache": id(di.get(DI_CACHE)),
+            "cache_redis": id(di.get(DI_CACHE)._redis),
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(clients) + "\n")
+
+
+class SubprocessClientJob(ClientJob):
+    job_timeout = 5
+    job_timeout_mode = "process"
+
+
+class TestJobRunnerPool:
+    def test_concurrent(self):
+        di = Di()
+        jobs = [SleepJob(di) for _ in range(4)]
+        runner = JobRunner(jobs, silent=True, workers=4)
+
+        start = time.monotonic()
+        runner.run_once(di)
+        elapsed = time.monotonic() - start
+
+        # jobs ran in parallel
+        assert elapsed < 1.5
+        assert all(job.counter == 1 for job in jobs)
+        assert all(state.future is None for state in runner.states)
+
+    def test_no_overlap(self):
+        di = Di()
+        job = BlockingJob(di)
+        runner = JobRunner([job], silent=True, workers=2)
+        try:
+            pending = runner._dispatch(di)
+            assert len(pending) == 1
+            # still running, so it is not submitted again
+            assert runner._dispatch(di) == pending
+            job.release.set()
+            pending[0].result(5)
+            # finished, so it is collected and submitted again
+            assert runner._dispatch(di) != pending
+            assert runner.states[0].last_run > 0
+        finally:
+            job.release.set()
+            runner.shutdown()
+
+    def test_failure(self):
+        di = Di()
+        job = FailingJob(di)
+        runner = JobRunner([job], silent=True, workers=2)
+        runner.run_once(di)
+        state = runner.states[0]
+        assert state.consecutive_failures == 1
+        assert state.backoff_until > time.monotonic()
+
+    def test_process_executor(self, tmp_path):
+        di = Di()
+        path = str(tmp_path / "pids")
+        failing = FailingJob(di)
+        runner = JobRunner(
+            [FileJob(di, path), failing], silent=True, workers=2, executor="process"
+        )
+        runner.run_once(di)
+
+        with open(path) as f:
+            pids = f.read().split()
+        assert len(pids) == 1
+        assert int(pids[0]) != os.getpid()
+        # state is kept in the parent process
+        assert runner.states[0].consecutive_failures == 0
+        assert runner.states[1].consecutive_failures == 1
+        assert failing.counter == 0
+
+    def test_forked_clients(self, tmp_path):
+        def redis_factory(_di: Di):
+            # custom client settings
+            _di.add(DI_REDIS, lambda _di: redis.Redis(db=3))
+
+        app = FlaskApplication(Container({"cache_backend": "redis"}))
+        app.build([], [redis_factory, CacheFactory])
+        di = app.di
+        path = str(tmp_path / "clients")
+        hook_path = str(tmp_path / "hooks")
+
+        def post_fork(_app):
+            with open(hook_path, "a") as f:
+                f.write("{}\n".format(os.getpid()))
+
+        app.register_post_fork_hook(post_fork)
+
+        # process executor and process timeout mode
+        for runner in [
+            JobRunner(
+                [ClientJob(di, path)], silent=True, workers=1, executor="process"
+            ),
+            JobRunner([SubprocessClientJob(di, path)], silent=True),
+        ]:
+            runner.run_once(di)
+            runner.shutdown()
+
+        client, cache = di.get(DI_REDIS), di.get(DI_CACHE)
+        with open(path) as f:
+            results = [json.loads(line) for line in f]
+        assert len(results) == 2
+        for result in results:
+            # forked processes use their own clients, built by the application factories
+            assert result["redis"] != id(client)
+            assert result["db"] == 3
+            assert result["cache"] != id(cache)
+            assert result["cache_redis"] == result["redis"]
+        assert di.get(DI_REDIS) is client
+        # hooks run in the forked processes
+        with open(hook_path) as f:
+            pids = f.read().split()
+        assert len(pids) == 2
+        assert str(os.getpid()) not in pids
+
+    def test_invalid_executor(self):
+        with pytest.raises(ValueError):
+            JobRunner([], executor="invalid")
+
+
+class CronJob(Injectable, Runnable):
+    job_cron = "0 0 1 1 *"
+
+    def __init__(self, di: Di):
+        super().__init__(di)
+        self.counter = 0
+
+    def run(self, di: Di):
+        self.counter += 1
+
+
+class JitterJob(CounterJob):
+    job_interval = 10
+    job_jitter = 5
+
+
+class InvalidScheduleJob(CronJob):
+    job_interval = 60
+
+
+class TestJobRunnerSchedule:
+    def _run_loop(self, runner, duration):
+        thread = threading.Thread(target=runner.run_loop, args=(Di(),), daemon=True)
+        thread.start()
+        time.sleep(duration)
+        runner.stop()
+        thread.join(5)
+        assert not thread.is_alive()
+
+    def test_cron(self):
+        di = Di()
+        job = CronJob(di)
+        runner = JobRunner([job], silent=True)
+        state = runner.states[0]
+        assert state.cron is not None
+        # waits for the next scheduled time
+        assert state.next_run > time.monotonic() + 60
+        runner.run_once(di)
+        assert job.counter == 0
+
+        state.next_run = 0
+        runner.run_once(di)
+        assert job.counter == 1
+        assert state.next_run > time.monotonic() + 60
+
+        with pytest.raises(ValueError):
+            JobRunner([InvalidScheduleJob(di)])
+
+    def test_jitter(self):
+        di = Di()
+        runner = JobRunner([JitterJob(di) for _ in range(20)], silent=True)
+        now = time.monotonic()
+        delays = [state.next_run - now for state in runner.states]
+        assert all(0 <= delay <= 5 for delay in delays)
+        # runs are spread
+        assert len(set(delays)) > 1
+
+        state = runner.states[0]
+        state.next_run = 0
+        runner.run_once(di)
+        assert state.last_run + 10 <= state.next_run <= state.last_run + 15
+
+    def test_sleeps_until_due(self, monkeypatch):
+        from pokie.core import job_runner
+
+        timeouts = []
+        wait = job_runner._Waker.wait
+
+        def recording_wait(self, timeout):
+            timeouts.append(timeout)
+            return wait(self, timeout)
+
+        monkeypatch.setattr(job_runner._Waker, "wait", recording_wait)
+        job = IntervalJob(Di())
+        runner = JobRunner([job], silent=True)
+        self._run_loop(runner, 0.5)
+
+        assert job.counter == 1
+        # a single wait for the next due time, instead of polling
+        assert timeouts[0] > 0.5
+
+    def test_min_interval(self):
+        job = CounterJob(Di())
+        runner = JobRunner([job], silent=True)
+        self._run_loop(runner, 0.5)
+        assert 2 <= job.counter <= 7
+
+    def test_pool_wakeup(self):
+        job = SleepJob(Di())
+        job.counter = 0
+        runner = JobRunner([job], silent=True, workers=2)
+        try:
+            # rescheduled as soon as each run finishes
+            self._run_loop(runner, 1.8)
+        finally:
+            runner.shutdown()
+        assert 3 <= job.counter <= 4
+
+
+class HangingJob(Injectable, Runnable):
+    job_timeout = 0.5
+
+    def __init__(self, di: Di):
+        super().__init__(di)
+        self.counter = 0
+
+    def run(self, di: Di):
+        self.counter += 1
+        # ignores cancellation
+        time.sleep(1.5)
+
+
+class CooperativeJob(Injectable, Runnable):
+    job_timeout = 0.5
+
+    def __init__(self, di: Di):
+        super().__init__(di)
+        self.cancelled = False
+
+    def run(self, di: Di):
+        token = current_token()
+        while not token.wait(0.05):
+            pass
+        self.cancelled = token.cancelled
+
+
+class BusyJob(Injectable, Runnable):
+    job_timeout = 5
+
+    def run(self, di: Di):
+        sum(range(2000000))
+
+
+class SubprocessFailingJob(FailingJob):
+    job_timeout = 5
+    job_timeout_mode = "process"
+
+
+class TestJobRunnerTimeout:
+    def test_token(self):
+        token = current_token()
+        assert token.cancelled is False
+        assert token.wait(0.01) is False
+        token.cancel()
+        assert token.wait(1) is True
+        with pytest.raises(JobCancelledError):
+            token.raise_if_cancelled()
+
+    def test_cooperative_cancel(self):
+        di = Di()
+        job = CooperativeJob(di)
+        runner = JobRunner([job], silent=True)
+        state = runner.states[0]
+        runner.run_once(di)
+        assert state.timeouts == 1
+        assert state.consecutive_failures == 1
+        # the job sees the cancelled token and returns
+        time.sleep(0.3)
+        assert job.cancelled is True
+
+    def test_abandoned_thread(self):
+        di = Di()
+        job = HangingJob(di)
+        runner = JobRunner([job], silent=True)
+        state = runner.states[0]
+        runner.run_once(di)
+        assert state.timeouts == 1
+        assert state.leaked_threads == 1
+
+        # no new thread while the timed out run is still running
+        state.backoff_until = 0
+        runner.run_once(di)
+        assert job.counter == 1
+        assert state.consecutive_failures == 2
+        assert state.timeouts == 1
+
+        time.sleep(1.2)
+        state.backoff_until = 0
+        runner.run_once(di)
+        assert job.counter == 2
+        assert state.timeouts == 2
+
+    def test_process_timeout(self):
+        di = Di()
+        job = HangingJob(di)
+        runner = JobRunner([job], silent=True, timeout_mode="process")
+        runner.TERMINATE_GRACE = 0.2
+        state = runner.states[0]
+
+        start = time.monotonic()
+        runner.run_once(di)
+        # killed, instead of running for 1.5s
+        assert time.monotonic() - start < 1.2
+        assert state.timeouts == 1
+        assert state.leaked_threads == 0
+        assert state.consecutive_failures == 1
+        # ran in a subprocess
+        assert job.counter == 0
+
+    def test_process_cooperative_cancel(self):
+        di = Di()
+        runner = JobRunner([CooperativeJob(di)], silent=True, timeout_mode="process")
+        state = runner.states[0]
+        start = time.monotonic()
+        runner.run_once(di)
+        # exits on SIGTERM, without waiting for the grace period
+        assert time.monotonic() - start < 2
+        assert state.timeouts == 1
+
+    def test_process_accounting(self):
+        di = Di()
+        runner = JobRunner(
+            [BusyJob(di), SubprocessFailingJob(di)],
+            silent=True,
+            timeout_mode="process",
+        )
+        runner.run_once(di)
+        busy, failing = runner.states
+        assert busy.consecutive_failures == 0
+        assert busy.cpu_time > 0
+        assert busy.max_rss > 0
+        assert failing.consecutive_failures == 1
+        assert failing.timeouts == 0
+
+        with pytest.raises(ValueError):
+            JobRunner([BusyJob(di)], timeout_mode="invalid")
+
+
+class ShortJob(Injectable, Runnable):
+    job_interval = 1
+
+    def run(self, di: Di):
+        time.sleep(0.05)
+
+
+class TestJobRunnerMetrics:
+    def test_run_metrics(self):
+        di = Di()
+        runner = JobRunner([ShortJob(di), FailingJob(di)], silent=True)
+        runner.run_once(di)
+
+        metrics = runner.states[0].metrics
+        assert metrics.runs == 1
+        assert metrics.duration.count == 1
+        assert 0.05 <= metrics.last_duration < 1
+        assert metrics.last_success_at > 0
+        assert metrics.last_error is None
+
+        failed = runner.states[1].metrics
+        assert failed.runs == 1
+        assert failed.last_error == "job failed"
+        assert failed.last_error_at > 0
+
+    def test_pool_metrics(self):
+        di = Di()
+        runner = JobRunner([ShortJob(di)], silent=True, workers=2)
+        runner.run_once(di)
+        metrics = runner.states[0].metrics
+        assert metrics.runs == 1
+        assert metrics.last_duration >= 0.05
+        assert metrics.lag.count == 1
+
+    def test_process_metrics(self):
+        di = Di()
+        runner = JobRunner([ShortJob(di)], silent=True, workers=1, executor="process")
+        runner.run_once(di)
+        assert runner.states[0].metrics.runs == 1
+        assert runner.states[0].metrics.last_duration >= 0.05
+
+    def test_schedule_lag(self):
+        di = Di()
+        runner = JobRunner([ShortJob(di)], silent=True)
+        state = runner.states[0]
+        runner.run_once(di)
+        assert state.metrics.lag.count == 1
+
+        # run 0.5 seconds late
+        runner._started -= 10
+        state.last_run = time.monotonic() - state.interval - 0.5
+        runner.run_once(di)
+        assert state.metrics.lag.count == 2
+        assert 0.5 <= state.metrics.last_lag < 1
+
+    def test_stats(self):
+        di = Di()
+        runner = JobRunner([ShortJob(di)], silent=True)
+        runner.run_once(di)
+        stats = runner.stats()
+        assert len(stats) == 1
+        assert stats[0]["name"] == "ShortJob"
+        assert stats[0]["path"].endswith("test_job_runner.ShortJob")
+        assert stats[0]["runs"] == 1
+        assert stats[0]["throughput"] > 0
+        assert stats[0]["duration"]["count"] == 1
+
+    def test_dump_stats(self, tmp_path):
+        di = Di()
+        stats_file = str(tmp_path / "stats.json")
+        metrics_file = str(tmp_path / "jobs.prom")
+        runner = JobRunner(
+            [ShortJob(di)],
+            silent=True,
+            stats_file=stats_file,
+            metrics_file=metrics_file,
+        )
+        runner.run_once(di)
+
+        from pokie.core.job_metrics import read_stats
+
+        snapshot = read_stats(stats_file)
+        assert snapshot["generated_at"] > 0
+        assert snapshot["jobs"][0]["runs"] == 1
+        with open(metrics_file) as f:
+            assert "pokie_job_runs_total" in f.read()
+
+    def test_dump_stats_loop(self, tmp_path):
+        di = Di()
+        stats_file = str(tmp_path / "stats.json")
+        runner = JobRunner(
+            [ShortJob(di)], silent=True, stats_file=stats_file, stats_interval=1
+        )
+        thread = threading.Thread(target=runner.run_loop, args=(di,))
+        thread.start()
+        try:
+            time.sleep(1.5)
+            # written while running
+            assert os.path.exists(stats_file)
+        finally:
+            runner.stop()
+            thread.join(5)
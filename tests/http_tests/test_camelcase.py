@@ -0,0 +1,82 @@
+import dataclasses
+import datetime
+import decimal
+import json
+import uuid
+
+import humps
+import pytest
+from rick.serializer.json import CamelCaseJsonEncoder
+
+from pokie.constants import DI_DB
+from pokie.http.camelcase import CamelCaseTranslator
+from pokie_test.repository import CustomerRepository
+
+
+@dataclasses.dataclass
+class SampleData:
+    some_name: str
+    created_at: datetime.datetime
+    some_items: list
+
+
+class SampleObject:
+    def __init__(self):
+        self.first_name = "john"
+        self.last_update = datetime.date(2024, 1, 1)
+        self.nested_dict = {"inner_key": decimal.Decimal("1.5")}
+
+
+class TestCamelCaseTranslator:
+    def test_translate(self, pokie_di):
+        repo = CustomerRepository(pokie_di.get(DI_DB))
+        records = repo.fetch_all()
+        payloads = [
+            {"success": True, "data": records},
+            {"success": True, "data": {"total_count": len(records), "rows": records}},
+            {"data": records[0]},
+            {
+                "some_key": [{"inner_key": 1, "other_key_2": [{"deep_key": None}]}],
+                "ID": "upper",
+                "already_camelCase": 1,
+                "_private": 2,
+                3: "int key",
+                "uuid_value": uuid.UUID(int=1),
+                "tuple_value": ({"not_translated": 1}, records[0]),
+            },
+            {
+                "data_class": SampleData(
+                    "x", datetime.datetime(2024, 1, 1), [{"a_b": 1}]
+                ),
+                "some_object": SampleObject(),
+            },
+            [records[0], {"list_key": [records[1]]}],
+        ]
+
+        translator = CamelCaseTranslator()
+        for payload in payloads:
+            expected = json.dumps(humps.camelize(payload), cls=CamelCaseJsonEncoder)
+            result = json.dumps(translator.translate(payload), cls=CamelCaseJsonEncoder)
+            assert result == expected
+
+    def test_key_table(self):
+        translator = CamelCaseTranslator()
+        translator.max_keys = 2
+        assert translator.key("first_key") == "firstKey"
+        assert translator.key("second_key") == "secondKey"
+        assert translator.key("third_key") == "thirdKey"
+        assert translator._keys == {"first_key": "firstKey", "second_key": "secondKey"}
+
+    def test_key_types(self):
+        translator = CamelCaseTranslator()
+        payloads = [{1: "a"}, {True: "b"}, {1.0: "c"}, {False: "d"}, {0: "e"}]
+        for payload in payloads:
+            assert translator.translate(payload) == humps.camelize(payload)
+        assert translator._keys == {}
+
+    def test_unsupported_type(self):
+        translator = CamelCaseTranslator()
+        with pytest.raises(AttributeError):
+            json.dumps(
+                translator.translate({"value": {1, 2}}), cls=CamelCaseJsonEncoder
+            )
@@ -0,0 +1,158 @@
+import gzip
+import json
+
+import brotli
+import pytest
+import zstandard
+
+from pokie.cache import LocalCache
+from pokie.constants import DI_CACHE, HTTP_OK
+from pokie.http.compression import (
+    ResponseCompression,
+    GzipCompressor,
+    BrotliCompressor,
+    ZstdCompressor,
+    parse_accept_encoding,
+    compress_stream,
+)
+
+decompressors = {
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+
+
+@pytest.fixture
+def compression(pokie_app, monkeypatch):
+    def enable(encodings, threshold=100):
+        compression = ResponseCompression(encodings, threshold)
+        monkeypatch.setattr(pokie_app, "response_compression", compression, False)
+        return compression
+
+    return enable
+
+
+class TestResponseCompression:
+    def test_negotiate(self):
+        assert parse_accept_encoding("gzip, br;q=0.5, *;q=0") == {
+            "gzip": 1.0,
+            "br": 0.5,
+            "*": 0.0,
+        }
+        assert parse_accept_encoding("") == {}
+        compression = ResponseCompression(["zstd", "br", "gzip"])
+        assert compression.negotiate("") is None
+        assert compression.negotiate("identity") is None
+        assert compression.negotiate("gzip, deflate, br") == "br"
+        assert compression.negotiate("gzip, br;q=0.5") == "gzip"
+        assert compression.negotiate("gzip, zstd, br") == "zstd"
+        assert compression.negotiate("*") == "zstd"
+        assert compression.negotiate("*, zstd;q=0") == "br"
+        assert compression.negotiate("GZIP;q=invalid") is None
+
+        with pytest.raises(ValueError):
+            ResponseCompression(["deflate"])
+        assert ResponseCompression([" gzip", ""]).encodings == ["gzip"]
+
+    @pytest.mark.parametrize("cls", [GzipCompressor, BrotliCompressor, ZstdCompressor])
+    def test_compressor(self, cls):
+        data = json.dumps([{"id": i, "name": "row"} for i in range(1000)]).encode()
+        compressor = cls()
+        decompress = decompressors[cls.encoding]
+        compressed = compressor.compress(data)
+        assert len(compressed) < len(data)
+        assert decompress(compressed) == data
+
+        chunks = [data[i : i + 4096].decode() for i in range(0, len(data), 4096)]
+        compressed = list(compress_stream(iter(chunks), compressor))
+        assert decompress(b"".join(compressed)) == data
+        # chunks are flushed as they are compressed
+        assert len(compressed) > 2
+
+    def test_response(self, pokie_app, compression):
+        with pokie_app.test_client() as client:
+            plain = client.get("/catalog/category")
+            compression(["br", "gzip"])
+            response = client.get(
+                "/catalog/category", headers={"Accept-Encoding": "gzip"}
+            )
+            assert response.status_code == HTTP_OK
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert response.headers["Vary"] == "Accept-Encoding"
+            assert gzip.decompress(response.get_data()) == plain.get_data()
+            assert int(response.headers["Content-Length"]) == len(response.get_data())
+
+            response = client.get(
+                "/catalog/category", headers={"Accept-Encoding": "gzip, br"}
+            )
+            assert response.headers["Content-Encoding"] == "br"
+            assert brotli.decompress(response.get_data()) == plain.get_data()
+
+            # no Accept-Encoding
+            response = client.get("/catalog/category")
+            assert "Content-Encoding" not in response.headers
+            assert response.headers["Vary"] == "Accept-Encoding"
+            assert response.get_data() == plain.get_data()
+
+            # below threshold
+            compression(["gzip"], threshold=len(plain.get_data()) + 1)
+            response = client.get(
+                "/catalog/category", headers={"Accept-Encoding": "gzip"}
+            )
+            assert "Content-Encoding" not in response.headers
+
+    def test_stream(self, pokie_app, compression):
+        with pokie_app.test_client() as client:
+            # read the body before the next request, as it is streamed within the request context
+            plain = client.get("/catalog/product/export?sort=id").get_data()
+            compression(["zstd"])
+            response = client.get(
+                "/catalog/product/export?sort=id",
+                headers={"Accept-Encoding": "zstd"},
+            )
+            assert response.status_code == HTTP_OK
+            assert response.is_streamed is True
+            assert response.headers["Content-Encoding"] == "zstd"
+            assert "Content-Length" not in response.headers
+            data = decompressors["zstd"](response.get_data())
+            assert data == plain
+
+    def test_cached(self, pokie_app, pokie_di, compression, monkeypatch):
+        cache = LocalCache(pokie_di)
+        monkeypatch.setitem(pokie_di._registry, DI_CACHE, cache)
+        compression(["gzip"])
+        calls = []
+        compress = GzipCompressor.compress
+
+        def counting(self, data):
+            calls.append(len(data))
+            return compress(self, data)
+
+        monkeypatch.setattr(GzipCompressor, "compress", counting)
+        headers = {"Accept-Encoding": "gzip"}
+        with pokie_app.test_client() as client:
+            plain = client.get("/cached/category")
+            assert "Content-Encoding" not in plain.headers
+            etag = plain.headers["ETag"]
+
+            response = client.get("/cached/category", headers=headers)
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert response.headers["ETag"] == '"{}-gzip"'.format(etag.strip('"'))
+            assert gzip.decompress(response.get_data()) == plain.get_data()
+            assert len(calls) == 1
+
+            # served from the stored compressed body
+            again = client.get("/cached/category", headers=headers)
+            assert again.get_data() == response.get_data()
+            assert len(calls) == 1
+
+            response = client.get(
+                "/cached/category",
+                headers={
+                    "Accept-Encoding": "gzip",
+                    "If-None-Match": response.headers["ETag"],
+                },
+            )
+            assert response.status_code == 304
+        cache.purge()
@@ -201,3 +201,55 @@ class TestDbGrid:
 
     def test_normalize_with_camelcase(self, dbgridRequest):
         assert dbgridRequest._normalize("contactName") == "contact_name"
+
+    def test_validate_cursor(self, dbgrid_request):
+        # no cursor, offset mode
+        assert dbgrid_request.is_valid({}) is True
+        assert dbgrid_request.has_cursor() is False
+
+        # empty cursor requests the first page in cursor mode
+        assert dbgrid_request.is_valid({"cursor": ""}) is True
+        assert dbgrid_request.has_cursor() is True
+        data = dbgrid_request.keyset_parameters()
+        assert data["cursor"] is None
+        assert data["limit"] == DEFAULT_LIST_SIZE
+
+        assert dbgrid_request.is_valid({"cursor": "abc", "limit": "10"}) is True
+        data = dbgrid_request.keyset_parameters(list_limit=50)
+        assert data["cursor"] == "abc"
+        assert data["limit"] == 10
+
+        # cursor and offset are mutually exclusive
+        assert dbgrid_request.is_valid({"cursor": "abc", "offset": "10"}) is False
+        assert "cursor" in dbgrid_request.errors.keys()
+        assert dbgrid_request.is_valid({"cursor": "abc", "offset": "0"}) is True
+
+    def test_keyset_parameters_list_limit(self, dbgrid_request):
+        assert dbgrid_request.is_valid({"cursor": ""}) is True
+        data = dbgrid_request.keyset_parameters(list_limit=50)
+        assert data["limit"] == 50
+        assert "offset" not in data.keys()
+
+    def test_validate_count(self, dbgrid_request):
+        assert dbgrid_request.is_valid({"count": "abc"}) is False
+        assert "count" in dbgrid_request.errors.keys()
+
+        # count mode is omitted when exact
+        assert dbgrid_request.is_valid({}) is True
+        assert "count_mode" not in dbgrid_request.dbgrid_parameters().keys()
+        assert dbgrid_request.is_valid({"count": "exact"}) is True
+        assert (
+            "count_mode"
+            not in dbgrid_request.dbgrid_parameters(count_mode="none").keys()
+        )
+
+        # default count mode
+        assert dbgrid_request.is_valid({}) is True
+        data = dbgrid_request.dbgrid_parameters(count_mode="estimate")
+        assert data["count_mode"] == "estimate"
+
+        # request count mode overrides default
+        for mode in ["estimate", "None", "NONE"]:
+            assert dbgrid_request.is_valid({"count": mode}) is True
+            data = dbgrid_request.dbgrid_parameters()
+            assert data["count_mode"] == mode.lower()
@@ -0,0 +1,116 @@
+from pokie.constants import HTTP_OK, HTTP_NOT_MODIFIED
+from pokie.http import PokieView
+from pokie.http.compression import ResponseCompression
+from pokie.http.response_cache import version_etag
+from pokie.rest import RestView
+from pokie_test.dto import CategoryRecord
+
+
+class EtagView(PokieView):
+    etag = True
+
+
+class TestEtag:
+    def test_body_etag(self, pokie_app):
+        with pokie_app.test_request_context("/etag"):
+            response = EtagView().success({"value": 1})
+            assert response.status_code == HTTP_OK
+            etag, weak = response.get_etag()
+            assert weak is False
+            assert etag is not None
+            # same data, same ETag
+            assert EtagView().success({"value": 1}).get_etag()[0] == etag
+            assert EtagView().success({"value": 2}).get_etag()[0] != etag
+            # disabled by default
+            assert PokieView().success({"value": 1}).get_etag() == (None, None)
+
+        headers = {"If-None-Match": '"{}"'.format(etag)}
+        with pokie_app.test_request_context("/etag", headers=headers):
+            response = EtagView().success({"value": 1})
+            assert response.status_code == HTTP_NOT_MODIFIED
+            assert EtagView().success({"value": 2}).status_code == HTTP_OK
+
+        # only GET and HEAD requests, and 200 responses
+        with pokie_app.test_request_context("/etag", method="POST", headers=headers):
+            assert EtagView().success({"value": 1}).status_code == HTTP_OK
+        with pokie_app.test_request_context("/etag", headers=headers):
+            response = EtagView().success({"value": 1}, code=201)
+            assert response.status_code == 201
+            assert response.get_etag() == (None, None)
+
+    def test_version_etag(self, pokie_app):
+        etag = version_etag("2026-01-01", ["/etag?id=1"])
+        with pokie_app.test_request_context("/etag?id=1"):
+            response = PokieView().success({"value": 1}, version="2026-01-01")
+            assert response.status_code == HTTP_OK
+            assert response.get_etag() == (etag, False)
+
+        headers = {"If-None-Match": 'W/"other", "{}"'.format(etag)}
+        with pokie_app.test_request_context("/etag?id=1", headers=headers):
+
+            class Data:
+                def __getattr__(self, item):
+                    raise AssertionError("data must not be serialized")
+
+            response = PokieView().success(Data(), version="2026-01-01")
+            assert response.status_code == HTTP_NOT_MODIFIED
+            assert response.get_etag() == (etag, False)
+
+            # new version
+            response = PokieView().success({"value": 2}, version="2026-01-02")
+            assert response.status_code == HTTP_OK
+
+        # the ETag depends on the request
+        with pokie_app.test_request_context("/etag?id=2", headers=headers):
+            response = PokieView().success({"value": 2}, version="2026-01-01")
+            assert response.status_code == HTTP_OK
+
+    def test_version_etag_encoding(self, pokie_app, monkeypatch):
+        compression = ResponseCompression(["gzip"], 10)
+        monkeypatch.setattr(pokie_app, "response_compression", compression, False)
+        etag = version_etag("2026-01-01", ["/etag?"])
+        data = {"value": "x" * 100}
+
+        with pokie_app.test_request_context("/etag"):
+            response = PokieView().success(data, version="2026-01-01")
+            assert "Content-Encoding" not in response.headers
+            assert response.get_etag() == (etag, False)
+
+        headers = {"Accept-Encoding": "gzip"}
+        with pokie_app.test_request_context("/etag", headers=headers):
+            response = PokieView().success(data, version="2026-01-01")
+            assert response.headers["Content-Encoding"] == "gzip"
+            # each encoding has its own ETag
+            assert response.get_etag() == (etag + "-gzip", False)
+            assert "Accept-Encoding" in response.vary
+
+        headers["If-None-Match"] = '"{}-gzip"'.format(etag)
+        with pokie_app.test_request_context("/etag", headers=headers):
+            response = PokieView().success(data, version="2026-01-01")
+            assert response.status_code == HTTP_NOT_MODIFIED
+            assert response.get_etag() == (etag + "-gzip", False)
+            assert "Accept-Encoding" in response.vary
+
+        # the gzip ETag does not match the identity representation
+        with pokie_app.test_request_context(
+            "/etag", headers={"If-None-Match": headers["If-None-Match"]}
+        ):
+            response = PokieView().success(data, version="2026-01-01")
+            assert response.status_code == HTTP_OK
+
+    def test_rest_view(self, pokie_app):
+        class CategoryView(RestView):
+            record_class = CategoryRecord
+            version_field = "name"
+
+        with pokie_app.test_request_context("/category/1"):
+            response = CategoryView().get(1)
+            assert response.status_code == HTTP_OK
+            name = response.get_json()["data"]["name"]
+            etag = version_etag(name, ["/category/1?"])
+            assert response.get_etag() == (etag, False)
+
+        headers = {"If-None-Match": '"{}"'.format(etag)}
+        with pokie_app.test_request_context("/category/1", headers=headers):
+            response = CategoryView().get(1)
+            assert response.status_code == HTTP_NOT_MODIFIED
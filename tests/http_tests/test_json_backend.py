@@ -0,0 +1,165 @@
+import dataclasses
+import datetime
+import decimal
+import enum
+import uuid
+
+import pytest
+from rick.serializer.json import ExtendedJsonEncoder, CamelCaseJsonEncoder
+
+from pokie.constants import (
+    DI_DB,
+    JSON_BACKEND_STDLIB,
+    JSON_BACKEND_ORJSON,
+    JSON_BACKEND_AUTO,
+)
+from pokie.http import JsonResponse, CamelCaseJsonResponse
+from pokie.http.json_backend import (
+    get_json_backend,
+    JsonBackend,
+    StdlibJsonBackend,
+    OrjsonBackend,
+)
+from pokie_test.repository import CustomerRepository
+
+requires_orjson = pytest.mark.skipif(
+    not OrjsonBackend.available(), reason="orjson is not installed"
+)
+
+
+@dataclasses.dataclass
+class SampleData:
+    some_name: str
+    created_at: datetime.datetime
+    amount: decimal.Decimal
+
+
+class SampleEnum(enum.Enum):
+    ONE = 1
+
+
+class SampleObject:
+    def __init__(self):
+        self.first_name = "john"
+        self.tags = ["a", "b"]
+
+
+@pytest.fixture
+def payloads(pokie_di):
+    repo = CustomerRepository(pokie_di.get(DI_DB))
+    records = repo.fetch_all()
+    return [
+        {},
+        [],
+        {"success": True, "data": {}},
+        {"field_a": "123", "field_b": 456, "field_c": 1.5, "field_d": None},
+        {"nested": {"list": [1, 2, [3, 4, {}], []], "bool": False, "tuple": (1, "a")}},
+        {"unicode": "café ünïcødé €", "emoji": "snake 🐍", "newline": "a,\nb"},
+        {1: "int key", "str_key": 2},
+        {"big": 2**70},
+        {
+            "uuid": uuid.UUID("a8098c1a-f86e-11da-bd1a-00112444be1e"),
+            "decimal": decimal.Decimal("12.340"),
+            "date": datetime.date(2024, 1, 2),
+            "datetime": datetime.datetime(2024, 1, 2, 3, 4, 5, 6789),
+            "datetime_tz": datetime.datetime(
+                2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc
+            ),
+            "bytes": b"bytes",
+            "memoryview": memoryview(b"view"),
+        },
+        {
+            "dataclass": SampleData(
+                "x", datetime.datetime(2020, 5, 5), decimal.Decimal(1)
+            )
+        },
+        {"object": SampleObject()},
+        {"records": records},
+        records,
+    ]
+
+
+class TestJsonBackend:
+    def test_get_backend(self):
+        assert isinstance(get_json_backend(JSON_BACKEND_STDLIB), StdlibJsonBackend)
+        assert get_json_backend(JSON_BACKEND_STDLIB) is get_json_backend(
+            JSON_BACKEND_STDLIB
+        )
+        if OrjsonBackend.available():
+            assert isinstance(get_json_backend(JSON_BACKEND_AUTO), OrjsonBackend)
+        else:
+            assert isinstance(get_json_backend(JSON_BACKEND_AUTO), StdlibJsonBackend)
+
+        with pytest.raises(ValueError):
+            get_json_backend("invalid")
+
+        # orjson is opt-in
+        assert isinstance(get_json_backend(), StdlibJsonBackend)
+        assert isinstance(get_json_backend(None), StdlibJsonBackend)
+
+        with pytest.raises(TypeError):
+            JsonBackend()
+
+    def test_app_backend(self, pokie_app):
+        assert pokie_app.json_backend is get_json_backend(JSON_BACKEND_STDLIB)
+
+    @requires_orjson
+    @pytest.mark.parametrize("encoder", [ExtendedJsonEncoder, CamelCaseJsonEncoder])
+    @pytest.mark.parametrize("pretty", [False, True])
+    def test_identical_output(self, payloads, encoder, pretty):
+        stdlib = get_json_backend(JSON_BACKEND_STDLIB)
+        fast = get_json_backend(JSON_BACKEND_ORJSON)
+        for payload in payloads:
+            if encoder is CamelCaseJsonEncoder and "memoryview" in str(payload):
+                # CamelCaseJsonEncoder does not support bytes
+                continue
+            expected = stdlib.dumps_str(payload, encoder, pretty)
+            assert fast.dumps_str(payload, encoder, pretty) == expected
+
+    @requires_orjson
+    def test_output_differences(self):
+        # documented differences between orjson and json.dumps()
+        stdlib = get_json_backend(JSON_BACKEND_STDLIB)
+        fast = get_json_backend(JSON_BACKEND_ORJSON)
+        payload = [1e16, 1e-7, 1e-5, float("nan"), float("inf")]
+        assert stdlib.dumps_str(payload, ExtendedJsonEncoder) == (
+            "[1e+16,1e-07,1e-05,NaN,Infinity]"
+        )
+        assert fast.dumps_str(payload, ExtendedJsonEncoder) != stdlib.dumps_str(
+            payload, ExtendedJsonEncoder
+        )
+
+        with pytest.raises(RuntimeError):
+            stdlib.dumps({"enum": SampleEnum.ONE}, ExtendedJsonEncoder)
+        assert fast.dumps_str({"enum": SampleEnum.ONE}, ExtendedJsonEncoder) == (
+            '{"enum":1}'
+        )
+
+    @requires_orjson
+    def test_unsupported_type(self):
+        for name in [JSON_BACKEND_STDLIB, JSON_BACKEND_ORJSON]:
+            with pytest.raises(RuntimeError):
+                get_json_backend(name).dumps({"time": object()}, ExtendedJsonEncoder)
+
+    @requires_orjson
+    def test_response(self, pokie_app, payloads):
+        class StdlibResponse(JsonResponse):
+            json_backend = JSON_BACKEND_STDLIB
+
+        class OrjsonResponse(JsonResponse):
+            json_backend = JSON_BACKEND_ORJSON
+
+        class StdlibCamelCaseResponse(CamelCaseJsonResponse):
+            json_backend = JSON_BACKEND_STDLIB
+
+        class OrjsonCamelCaseResponse(CamelCaseJsonResponse):
+            json_backend = JSON_BACKEND_ORJSON
+
+        with pokie_app.app_context():
+            data = payloads[-1]
+            for left, right in [
+                (StdlibResponse, OrjsonResponse),
+                (StdlibCamelCaseResponse, OrjsonCamelCaseResponse),
+            ]:
+                expected = left(data).assemble(pokie_app).get_data()
+                assert right(data).assemble(pokie_app).get_data() == expected
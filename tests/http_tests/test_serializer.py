@@ -0,0 +1,122 @@
+import datetime
+import decimal
+import json
+import uuid
+
+from rick.serializer.json import ExtendedJsonEncoder, CamelCaseJsonEncoder
+from rick_db import fieldmapper
+
+from pokie.constants import DI_DB
+from pokie.http.camelcase import camel_case_translator, CamelCaseList
+from pokie.http.serializer import RecordSerializer, get_record_serializer
+from pokie_test.repository import CustomerRepository
+
+
+@fieldmapper(tablename="sample", pk="id_sample", json_exclude=["secret_value"])
+class SampleRecord:
+    id = "id_sample"
+    created_at = "created_at"
+    birth_date = "birth_date"
+    amount = "amount"
+    reference = "reference"
+    extra_data = "extra_data"
+    tag_list = "tag_list"
+    raw_bytes = "raw_bytes"
+    secret_value = "secret_value"
+    missing_field = "missing_field"
+
+
+@fieldmapper(tablename="sample", pk="id_sample")
+class NameRecord:
+    id = "id_sample"
+    first_name = "first_name"
+
+
+class CustomRecord(NameRecord):
+    def asdict(self, exclude=None):
+        return {"custom_name": self.first_name}
+
+
+def sample_records():
+    result = []
+    for i in range(3):
+        result.append(
+            SampleRecord().fromrecord(
+                {
+                    "id_sample": i,
+                    "created_at": datetime.datetime(2024, 1, 1, 10, 0, i, 1234),
+                    "birth_date": datetime.date(2000, 1, i + 1),
+                    "amount": decimal.Decimal("10.50") + i,
+                    "reference": uuid.UUID(int=i),
+                    "extra_data": {"inner_key": [{"deep_key": i}], "is_ok": True},
+                    "tag_list": ["a", "b"],
+                    "raw_bytes": b"bytes",
+                    "secret_value": "hidden",
+                }
+            )
+        )
+    return result
+
+
+class TestRecordSerializer:
+    def test_snake_case(self, pokie_di):
+        customers = CustomerRepository(pokie_di.get(DI_DB)).fetch_all()
+        for records in [sample_records(), customers]:
+            serializer = RecordSerializer(records[0].__class__)
+            assert serializer.compiled is True
+            rows = serializer.rows(records)
+            assert isinstance(rows, list)
+            assert "secret_value" not in json.dumps(rows, cls=ExtendedJsonEncoder)
+            assert json.dumps(rows, cls=ExtendedJsonEncoder) == json.dumps(
+                records, cls=ExtendedJsonEncoder
+            )
+
+    def test_camel_case(self, pokie_di):
+        samples = sample_records()
+        for r in samples:
+            # CamelCaseJsonEncoder does not support bytes
+            r.raw_bytes = "bytes"
+        customers = CustomerRepository(pokie_di.get(DI_DB)).fetch_all()
+        for records in [samples, customers]:
+            serializer = RecordSerializer(records[0].__class__, camel_case=True)
+            rows = serializer.rows(records)
+            assert isinstance(rows, CamelCaseList)
+            # already translated rows are not modified by the translator
+            assert camel_case_translator.translate(rows) is rows
+
+            expected = json.dumps(
+                camel_case_translator.translate(records), cls=CamelCaseJsonEncoder
+            )
+            assert json.dumps(rows, cls=CamelCaseJsonEncoder) == expected
+
+    def test_field_converters(self):
+        serializer = RecordSerializer(
+            SampleRecord, field_converters={"amount": lambda v: float(v)}
+        )
+        row = serializer.row(sample_records()[0])
+        assert isinstance(row, dict)
+        assert row["amount"] == 10.5
+        assert row["created_at"] == "2024-01-01T10:00:00.001234"
+        assert "missing_field" not in row
+
+    def test_fallback(self):
+        # custom asdict()
+        serializer = RecordSerializer(CustomRecord)
+        assert serializer.compiled is False
+        record = CustomRecord(id=1, first_name="john")
+        assert serializer.row(record) is record
+        camel = RecordSerializer(CustomRecord, camel_case=True)
+        assert camel.row(record) == {"customName": "john"}
+
+        # other classes and modified field maps
+        serializer = RecordSerializer(SampleRecord)
+        assert serializer.row({"key": "value"}) == {"key": "value"}
+        record = sample_records()[0]
+        record.add("other_field", 1)
+        assert serializer.row(record) is record
+
+    def test_get_serializer(self):
+        serializer = get_record_serializer(SampleRecord)
+        assert serializer is get_record_serializer(SampleRecord)
+        assert serializer is not get_record_serializer(SampleRecord, True)
+        assert get_record_serializer(SampleRecord, True).camel_case is True
@@ -1,7 +1,13 @@
 from typing import Any, Optional
 
 from flask.typing import ResponseReturnValue
-from pokie.http import PokieView
+from rick.form import RequestRecord, field
+
+import pytest
+
+from pokie.constants import HTTP_OK, HTTP_BADREQ, HTTP_NOAUTH, HTTP_INTERNAL_ERROR
+from pokie.http import PokieView, PokieAuthView
+from pokie.test import PokieClient
 
 
 class MyInitView(PokieView):
@@ -22,6 +28,50 @@ class MyInitView(PokieView):
         pass
 
 
+class ReusedRequest(RequestRecord):
+    fields = {
+        "name": field(validators="required|maxlen:10"),
+    }
+
+
+class ReusedView(PokieView):
+    init_every_request = False
+    request_class = ReusedRequest
+    init_methods = ["count_init"]
+    init_count = 0
+
+    def count_init(self, **kwargs):
+        ReusedView.init_count += 1
+
+    def get(self):
+        return self.success({"request": self.request is None})
+
+    def post(self):
+        return self.success({"name": self.request.get("name")})
+
+    def show(self):
+        return self.success({"request": self.request is None})
+
+
+class ReusedAuthView(PokieAuthView):
+    init_every_request = False
+
+    def get(self):
+        return self.success()
+
+
+class BrokenHookView(PokieView):
+    dispatch_hooks = ["_hook_missing"]
+
+    def get(self):
+        pass
+
+
+class GetOnlyView(PokieView):
+    def get(self):
+        return self.success()
+
+
 class TestViewAdvanced:
     def test_view_init(self, pokie_app):
         with pokie_app.app_context():
@@ -35,3 +85,103 @@ class TestViewAdvanced:
                 view = MyInitView()
                 view.dispatch_request()
                 assert getattr(view, "test", None) == [1, 2]
+
+    def test_view_dispatch_chain(self, pokie_app, monkeypatch):
+        with pokie_app.test_request_context():
+            MyInitView().dispatch_request()
+
+            # views initialized on every request reuse the chain compiled for the same hook lists
+            def fail(*args):
+                raise AssertionError("hook chain compiled again")
+
+            monkeypatch.setattr(MyInitView, "_compile_hook_chain", fail)
+            for _ in range(2):
+                view = MyInitView()
+                view.dispatch_request()
+                assert view.test == [1, 2]
+
+    def test_view_reuse(self, pokie_app):
+        ReusedView.init_count = 0
+        pokie_app.add_url_rule(
+            "/views/reused",
+            methods=["GET", "POST"],
+            view_func=ReusedView.as_view("view_reused"),
+        )
+        pokie_app.add_url_rule(
+            "/views/reused-method",
+            methods=["GET"],
+            view_func=ReusedView.view_method("show", "view_reused_method"),
+        )
+        pokie_app.add_url_rule(
+            "/views/reused-auth",
+            methods=["GET"],
+            view_func=ReusedAuthView.as_view("view_reused_auth"),
+        )
+
+        with pokie_app.test_client() as client:
+            client = PokieClient(client)
+            result = client.post("/views/reused", data={"name": "first"})
+            assert result.code == HTTP_OK
+            assert result.data["name"] == "first"
+
+            result = client.post("/views/reused", data={"name": "second"})
+            assert result.code == HTTP_OK
+            assert result.data["name"] == "second"
+
+            result = client.post("/views/reused", data={})
+            assert result.code == HTTP_BADREQ
+
+            # per-request state is not carried over between requests
+            result = client.get("/views/reused")
+            assert result.code == HTTP_OK
+            assert result.data["request"] is True
+
+            result = client.get("/views/reused-method")
+            assert result.code == HTTP_OK
+            assert result.data["request"] is True
+
+            # initialized once per registered route
+            assert ReusedView.init_count == 2
+
+            for _ in range(2):
+                result = client.get("/views/reused-auth")
+                assert result.code == HTTP_NOAUTH
+
+    def test_dispatch_compile(self, pokie_app):
+        compiled = MyInitView.compile_dispatch()
+        assert compiled is MyInitView.compile_dispatch()
+        assert compiled["handlers"]["get"] is MyInitView.__dict__["get"]
+        # subclasses are compiled separately
+        assert ReusedView.compile_dispatch() is not compiled
+
+        # hook chains are resolved once per hook list
+        chain = MyInitView.compile_hooks(["myhook"], ["_hook_request"])
+        assert chain == (MyInitView.myhook, PokieView._hook_request)
+        assert chain is MyInitView.compile_hooks(["myhook"], ["_hook_request"])
+        assert MyInitView.compile_hooks([], ["_hook_request"]) == (
+            PokieView._hook_request,
+        )
+        assert chain is MyInitView.compile_hooks(["myhook"], ["_hook_request"])
+
+        # HEAD uses the GET handler
+        assert GetOnlyView.compile_dispatch()["handlers"]["head"] is GetOnlyView.get
+
+    def test_dispatch_invalid_hooks(self, pokie_app):
+        # misconfigured views fail on registration
+        with pytest.raises(RuntimeError):
+            BrokenHookView.as_view("view_broken")
+        with pytest.raises(RuntimeError):
+            GetOnlyView.view_method("missing_method")
+
+        # hooks added in runtime are validated on dispatch
+        pokie_app.add_url_rule(
+            "/views/runtime-hook",
+            methods=["GET"],
+            view_func=GetOnlyView.as_view(
+                "view_runtime_hook", dispatch_hooks=["_hook_missing"]
+            ),
+        )
+        with pokie_app.test_client() as client:
+            client = PokieClient(client)
+            result = client.get("/views/runtime-hook")
+            assert result.code == HTTP_INTERNAL_ERROR
@@ -0,0 +1,298 @@
+import time
+import uuid
+
+import pytest
+from rick.base import Di, Container
+
+from pokie.constants import (
+    DI_CONFIG,
+    DI_DB,
+    DI_REDIS,
+    DI_TASK_QUEUE,
+    DI_APP,
+)
+from pokie.core.factories.task_queue import TaskQueueFactory
+from pokie.queue import (
+    Task,
+    TaskHandler,
+    TaskWorker,
+    PgTaskQueue,
+    RedisTaskQueue,
+)
+
+
+class RecordHandler(TaskHandler):
+    processed = []
+
+    def run(self, payload: dict):
+        RecordHandler.processed.append(payload["value"])
+
+
+class BrokenHandler(TaskHandler):
+    def run(self, payload: dict):
+        raise ValueError("broken")
+
+
+class NoBackoffWorker(TaskWorker):
+    MAX_BACKOFF = 0
+
+
+@pytest.fixture(params=["pgsql", "redis"])
+def task_queue(request, pokie_di):
+    name = "test-{}".format(uuid.uuid4().hex)
+    if request.param == "pgsql":
+        queue = PgTaskQueue(pokie_di)
+        yield queue, name
+        with queue.conn() as conn:
+            with conn.cursor() as c:
+                c.exec("DELETE FROM task_queue WHERE queue = %s", [name])
+    else:
+        prefix = "pokie:test:{}:".format(uuid.uuid4().hex)
+        queue = RedisTaskQueue(pokie_di, prefix=prefix)
+        yield queue, name
+        redis = pokie_di.get(DI_REDIS)
+        for key in redis.scan_iter(prefix + "*"):
+            redis.delete(key)
+
+
+def worker(di, queue, name, handlers=None, cls=TaskWorker, **kwargs):
+    if handlers is None:
+        handlers = {"record": RecordHandler, "broken": BrokenHandler}
+    return cls(di, queue, handlers, queue_name=name, silent=True, **kwargs)
+
+
+class TestTaskQueue:
+    def test_enqueue_claim_ack(self, task_queue):
+        queue, name = task_queue
+        task_id = queue.enqueue("record", {"value": 1}, queue=name)
+        assert task_id
+        assert queue.pending(name) == 1
+
+        tasks = queue.claim(name, 10, 30)
+        assert len(tasks) == 1
+        task = tasks[0]
+        assert isinstance(task, Task)
+        assert task.id == task_id
+        assert task.name == "record"
+        assert task.payload == {"value": 1}
+        assert task.queue == name
+        assert task.attempts == 1
+        assert task.max_attempts == queue.max_attempts
+        assert task.receipt is not None
+
+        # claimed tasks are not delivered again
+        assert queue.claim(name, 10, 30) == []
+        assert queue.pending(name) == 1
+
+        queue.ack(task)
+        assert queue.pending(name) == 0
+        assert queue.claim(name, 10, 30) == []
+
+    def test_batch_claim(self, task_queue):
+        queue, name = task_queue
+        for i in range(5):
+            queue.enqueue("record", {"value": i}, queue=name)
+
+        first = queue.claim(name, 3, 30)
+        second = queue.claim(name, 3, 30)
+        assert len(first) == 3
+        assert len(second) == 2
+        # in order, and without duplicates
+        values = [task.payload["value"] for task in first + second]
+        assert values == [0, 1, 2, 3, 4]
+
+    def test_queues_are_isolated(self, task_queue):
+        queue, name = task_queue
+        queue.enqueue("record", {"value": 1}, queue=name)
+        assert queue.claim(name + "-other", 10, 30) == []
+        assert queue.pending(name + "-other") == 0
+
+    def test_delay(self, task_queue):
+        queue, name = task_queue
+        queue.enqueue("record", {"value": 1}, queue=name, delay=0.5)
+        assert queue.pending(name) == 1
+        assert queue.claim(name, 10, 30) == []
+        time.sleep(0.7)
+        assert len(queue.claim(name, 10, 30)) == 1
+
+    def test_visibility_timeout(self, task_queue):
+        queue, name = task_queue
+        queue.enqueue("record", {"value": 1}, queue=name)
+        first = queue.claim(name, 10, 0.3)
+        assert len(first) == 1
+        assert queue.claim(name, 10, 0.3) == []
+
+        # not acknowledged in time; delivered again
+        time.sleep(0.5)
+        tasks = queue.claim(name, 10, 0.3)
+        assert len(tasks) == 1
+        assert tasks[0].id == first[0].id
+        assert tasks[0].attempts == 2
+
+        # the expired claim cannot acknowledge the task
+        queue.ack(first[0])
+        assert queue.pending(name) == 1
+        queue.ack(tasks[0])
+        assert queue.pending(name) == 0
+
+    def test_visibility_timeout_max_attempts(self, task_queue):
+        queue, name = task_queue
+        queue.enqueue("record", {"value": 1}, queue=name, max_attempts=2)
+        assert len(queue.claim(name, 10, 0.3)) == 1
+        time.sleep(0.5)
+        tasks = queue.claim(name, 10, 0.3)
+        assert tasks[0].attempts == 2
+
+        # the last delivery expired; the task is failed instead of delivered again
+        time.sleep(0.5)
+        assert queue.claim(name, 10, 0.3) == []
+        assert queue.pending(name) == 0
+
+    def test_retry(self, task_queue):
+        queue, name = task_queue
+        queue.enqueue("record", {"value": 1}, queue=name)
+        task = queue.claim(name, 10, 30)[0]
+        queue.retry(task, error="failed")
+        assert queue.pending(name) == 1
+
+        task = queue.claim(name, 10, 30)[0]
+        assert task.attempts == 2
+        queue.retry(task, delay=60)
+        assert queue.pending(name) == 1
+        assert queue.claim(name, 10, 30) == []
+
+    def test_fail(self, task_queue):
+        queue, name = task_queue
+        queue.enqueue("record", {"value": 1}, queue=name, max_attempts=1)
+        task = queue.claim(name, 10, 30)[0]
+        assert task.max_attempts == 1
+        queue.fail(task, "failed")
+        assert queue.pending(name) == 0
+        assert queue.claim(name, 10, 30) == []
+
+
+class TestTaskWorker:
+    def test_process(self, pokie_di, task_queue):
+        queue, name = task_queue
+        RecordHandler.processed = []
+        for i in range(5):
+            queue.enqueue("record", {"value": i}, queue=name)
+
+        w = worker(pokie_di, queue, name, concurrency=2, batch_size=10)
+        # claims are limited by the free worker threads
+        assert w.run_once() == 2
+        assert w.run_once() == 2
+        assert w.run_once() == 1
+        assert w.run_once() == 0
+        w.shutdown()
+
+        assert sorted(RecordHandler.processed) == [0, 1, 2, 3, 4]
+        assert w.completed == 5
+        assert queue.pending(name) == 0
+
+    def test_batch_size(self, pokie_di, task_queue):
+        queue, name = task_queue
+        for i in range(3):
+            queue.enqueue("record", {"value": i}, queue=name)
+
+        w = worker(pokie_di, queue, name, concurrency=4, batch_size=2)
+        assert w.run_once() == 2
+        w.shutdown()
+
+    def test_retry_and_fail(self, pokie_di, task_queue):
+        queue, name = task_queue
+        queue.enqueue("broken", queue=name, max_attempts=2)
+
+        w = worker(pokie_di, queue, name, cls=NoBackoffWorker)
+        assert w.run_once() == 1
+        assert w.retried == 1
+        assert queue.pending(name) == 1
+
+        assert w.run_once() == 1
+        assert w.failed == 1
+        assert queue.pending(name) == 0
+        assert w.run_once() == 0
+        w.shutdown()
+
+    def test_unknown_task(self, pokie_di, task_queue):
+        queue, name = task_queue
+        queue.enqueue("missing", queue=name)
+
+        w = worker(pokie_di, queue, name)
+        assert w.run_once() == 1
+        assert w.failed == 1
+        assert w.retried == 0
+        assert queue.pending(name) == 0
+        w.shutdown()
+
+    def test_backoff(self, pokie_di, task_queue):
+        queue, name = task_queue
+        w = worker(pokie_di, queue, name)
+        assert w.backoff(1) == 2
+        assert w.backoff(3) == 8
+        assert w.backoff(20) == TaskWorker.MAX_BACKOFF
+
+    def test_handlers_by_path(self, pokie_di, task_queue):
+        queue, name = task_queue
+        RecordHandler.processed = []
+        queue.enqueue("record", {"value": 1}, queue=name)
+        handlers = {"record": "tests.queue.test_task_queue.RecordHandler"}
+
+        w = worker(pokie_di, queue, name, handlers=handlers)
+        assert w.run_once() == 1
+        assert RecordHandler.processed == [1]
+        w.shutdown()
+
+    def test_run_stop(self, pokie_di, task_queue):
+        queue, name = task_queue
+        RecordHandler.processed = []
+        for i in range(3):
+            queue.enqueue("record", {"value": i}, queue=name)
+
+        class StopWorker(TaskWorker):
+            def process(self, task):
+                result = super().process(task)
+                if self.completed == 3:
+                    self.stop()
+                return result
+
+        w = worker(pokie_di, queue, name, cls=StopWorker, poll_interval=0.1)
+        w.run()
+        assert sorted(RecordHandler.processed) == [0, 1, 2]
+        assert queue.pending(name) == 0
+
+    def test_invalid_arguments(self, pokie_di, task_queue):
+        queue, name = task_queue
+        with pytest.raises(ValueError):
+            worker(pokie_di, queue, name, concurrency=0)
+        with pytest.raises(ValueError):
+            worker(pokie_di, queue, name, batch_size=0)
+
+
+class TestTaskQueueFactory:
+    def build(self, pokie_di, backend) -> Di:
+        di = Di()
+        di.add(
+            DI_CONFIG,
+            Container({"task_queue_backend": backend, "task_max_attempts": 3}),
+        )
+        di.add(DI_DB, pokie_di.get(DI_DB))
+        di.add(DI_REDIS, pokie_di.get(DI_REDIS))
+        TaskQueueFactory(di)
+        return di
+
+    def test_backends(self, pokie_di):
+        queue = self.build(pokie_di, "pgsql").get(DI_TASK_QUEUE)
+        assert isinstance(queue, PgTaskQueue)
+        assert queue.max_attempts == 3
+        queue = self.build(pokie_di, "redis").get(DI_TASK_QUEUE)
+        assert isinstance(queue, RedisTaskQueue)
+
+    def test_invalid_backend(self, pokie_di):
+        with pytest.raises(RuntimeError):
+            self.build(pokie_di, "invalid")
+
+    def test_worker_command(self, pokie_di):
+        app = pokie_di.get(DI_APP)
+        assert "job:worker" in app.modules["pokie.contrib.base"].cmd
+        assert isinstance(app.get_tasks(), dict)
@@ -0,0 +1,235 @@
+import pytest
+
+from rick.resource import CacheInterface
+from werkzeug.wrappers import Response
+
+from pokie.cache import LocalCache
+from pokie.cache.serializer import get_cache_serializer
+from pokie.constants import DI_CACHE, HTTP_OK, HTTP_NOT_FOUND
+from pokie.http import PokieView
+from pokie.http.compression import ResponseCompression
+from pokie.http.response_cache import (
+    record_cache_tag,
+    tag_versions,
+    invalidate_tags,
+)
+from pokie.rest import RestService
+from pokie.test import PokieClient
+from pokie_test.dto import CategoryRecord, CustomerRecord
+
+
+@pytest.fixture
+def response_cache(pokie_di, monkeypatch):
+    cache = LocalCache(pokie_di)
+    # restored after the test
+    monkeypatch.setitem(pokie_di._registry, DI_CACHE, cache)
+    yield cache
+    cache.purge()
+
+
+class HeaderView(PokieView):
+    response_cache_ttl = 60
+    calls = 0
+
+    def get(self):
+        HeaderView.calls += 1
+        response = self.success({"value": 1})
+        response.headers["X-Total-Pages"] = "3"
+        response.set_cookie("session", "secret")
+        return response
+
+
+class BinaryView(PokieView):
+    response_cache_ttl = 60
+    calls = 0
+    body = "name;city\nJosé;Málaga\n".encode("latin-1") + bytes([0, 255])
+
+    def get(self):
+        BinaryView.calls += 1
+        return Response(self.body, mimetype="text/csv")
+
+
+class BasicCache(CacheInterface):
+    """
+    CacheInterface implementation without get_many()/set_many()
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key, None)
+
+    def set(self, key, value=None, ttl=None):
+        self.data[key] = value
+
+    def has(self, key):
+        return key in self.data
+
+    def remove(self, key):
+        self.data.pop(key, None)
+
+    def purge(self):
+        self.data.clear()
+
+
+class FailingCache(BasicCache):
+    """
+    Cache backend that is down
+    """
+
+    def get(self, key):
+        raise ConnectionError("cache is down")
+
+    def set(self, key, value=None, ttl=None):
+        raise ConnectionError("cache is down")
+
+
+class TestResponseCache:
+    base_url = "/cached/category"
+
+    def test_tag_versions(self, pokie_di):
+        cache = LocalCache(pokie_di)
+        assert tag_versions(cache, []) == []
+        first = tag_versions(cache, ["a", "b"])
+        assert len(first) == 2
+        assert tag_versions(cache, ["a", "b"]) == first
+        invalidate_tags(cache, ["b"])
+        second = tag_versions(cache, ["a", "b"])
+        assert second[0] == first[0]
+        assert second[1] != first[1]
+
+    def test_basic_cache(self):
+        cache = BasicCache()
+        first = tag_versions(cache, ["a"])
+        assert tag_versions(cache, ["a"]) == first
+        invalidate_tags(cache, ["a"])
+        assert tag_versions(cache, ["a"]) != first
+
+    @pytest.mark.parametrize("serializer", ["pickle", "json", "raw"])
+    def test_binary_body(self, pokie_app, pokie_di, serializer, monkeypatch):
+        cache = LocalCache(pokie_di, serializer=get_cache_serializer(serializer))
+        monkeypatch.setitem(pokie_di._registry, DI_CACHE, cache)
+        BinaryView.calls = 0
+        for _ in range(2):
+            with pokie_app.test_request_context("/binary"):
+                response = BinaryView().dispatch_request()
+                assert response.status_code == HTTP_OK
+                assert response.get_data() == BinaryView.body
+                assert response.mimetype == "text/csv"
+        assert BinaryView.calls == 1
+
+    def test_cache_error(self, pokie_app, pokie_di, monkeypatch):
+        monkeypatch.setitem(pokie_di._registry, DI_CACHE, FailingCache())
+        HeaderView.calls = 0
+        for _ in range(2):
+            with pokie_app.test_request_context("/header"):
+                response = HeaderView().dispatch_request()
+                assert response.status_code == HTTP_OK
+                assert response.get_json()["data"] == {"value": 1}
+        # served without the cache
+        assert HeaderView.calls == 2
+
+    @pytest.mark.parametrize("serializer", ["pickle", "json", "raw"])
+    def test_serializers(self, pokie_app, pokie_di, serializer, monkeypatch):
+        cache = LocalCache(pokie_di, serializer=get_cache_serializer(serializer))
+        monkeypatch.setitem(pokie_di._registry, DI_CACHE, cache)
+        monkeypatch.setattr(
+            pokie_app, "response_compression", ResponseCompression(["gzip"], 10), False
+        )
+        HeaderView.calls = 0
+        headers = {"Accept-Encoding": "gzip"}
+        for _ in range(2):
+            with pokie_app.test_request_context("/header", headers=headers):
+                response = HeaderView().dispatch_request()
+                assert response.status_code == HTTP_OK
+                assert response.headers["Content-Encoding"] == "gzip"
+                assert response.headers["X-Total-Pages"] == "3"
+        # second request served from the cache, with the handler headers except cookies
+        assert HeaderView.calls == 1
+        assert "Set-Cookie" not in response.headers
+        assert response.mimetype == "application/json"
+
+    def test_cached(self, pokie_app, pokie_db, response_cache):
+        with pokie_app.test_client() as client:
+            response = client.get(self.base_url + "?sort=id")
+            assert response.status_code == HTTP_OK
+            etag = response.headers["ETag"]
+            assert response.headers["Cache-Control"] == "private, no-cache"
+            total = response.get_json()["data"]["total"]
+
+            # changes that bypass the service are not seen until the entry expires
+            with pokie_db.cursor() as c:
+                c.exec(
+                    "INSERT INTO categories(category_id, category_name) VALUES(998, 'cached')"
+                )
+            try:
+                response = client.get(self.base_url + "?sort=id")
+                assert response.headers["ETag"] == etag
+                assert response.get_json()["data"]["total"] == total
+                # different query string
+                response = client.get(self.base_url + "?sort=id&limit=100")
+                assert response.get_json()["data"]["total"] == total + 1
+            finally:
+                with pokie_db.cursor() as c:
+                    c.exec("DELETE FROM categories WHERE category_id=998")
+
+            # conditional request
+            response = client.get(
+                self.base_url + "?sort=id", headers={"If-None-Match": etag}
+            )
+            assert response.status_code == 304
+            assert response.get_data() == b""
+
+            # errors are not cached
+            response = client.get(self.base_url + "/9999")
+            assert response.status_code == HTTP_NOT_FOUND
+            assert "ETag" not in response.headers
+
+    def test_invalidation(self, pokie_app, pokie_db, response_cache):
+        with pokie_app.test_client() as client:
+            response = client.get(self.base_url)
+            total = response.get_json()["data"]["total"]
+            etag = response.headers["ETag"]
+
+            with pokie_db.cursor() as c:
+                c.exec(
+                    "INSERT INTO categories(category_id, category_name) VALUES(996, 'a'), (997, 'b')"
+                )
+            try:
+                response = client.get(self.base_url)
+                assert response.headers["ETag"] == etag
+
+                # writes through another view of the same record class
+                result = PokieClient(client).delete("/catalog/category/997")
+                assert result.code == HTTP_OK
+                response = client.get(self.base_url)
+                assert response.get_json()["data"]["total"] == total + 1
+                assert response.headers["ETag"] != etag
+            finally:
+                with pokie_db.cursor() as c:
+                    c.exec("DELETE FROM categories WHERE category_id IN (996, 997)")
+
+    def test_service_invalidation(self, pokie_di, response_cache):
+        tag = record_cache_tag(CategoryRecord)
+        version = tag_versions(response_cache, [tag])
+        svc = RestService(pokie_di)
+        svc.set_record_class(CategoryRecord)
+        svc.delete(999)
+        assert tag_versions(response_cache, [tag]) != version
+
+    def test_service_invalidation_without_routes(self, pokie_di, response_cache):
+        # no route uses the record class in this process, as in job runners and task workers
+        tag = record_cache_tag(CustomerRecord)
+        version = tag_versions(response_cache, [tag])
+        svc = RestService(pokie_di)
+        svc.set_record_class(CustomerRecord)
+        svc.delete("NONEXISTENT_KEY_XYZ")
+        assert tag_versions(response_cache, [tag]) != version
+
+    def test_service_invalidation_error(self, pokie_di, monkeypatch):
+        monkeypatch.setitem(pokie_di._registry, DI_CACHE, FailingCache())
+        svc = RestService(pokie_di)
+        svc.set_record_class(CategoryRecord)
+        # the write succeeds
+        svc.delete(999)
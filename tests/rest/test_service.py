@@ -1,4 +1,4 @@
-from pokie.constants import HTTP_OK, HTTP_BADREQ
+from pokie.constants import HTTP_OK, HTTP_BADREQ, LIST_COUNT_NONE, LIST_COUNT_ESTIMATE
 from pokie.rest import RestService
 from pokie.test import PokieClient
 from pokie_test.dto import CustomerRecord
@@ -55,3 +55,38 @@ class TestRestService:
         assert total is not None
         assert total > 0
         assert len(rows) > 50
+
+    def test_service_list_count_mode(self, pokie_app):
+        svc = RestService(pokie_app.di)
+        svc.set_record_class(CustomerRecord)
+
+        total, rows = svc.list()
+
+        # no total count
+        count, items = svc.list(count_mode=LIST_COUNT_NONE)
+        assert count is None
+        assert len(items) == len(rows)
+
+        # estimated count on a full page is the planner estimate
+        count, items = svc.list(limit=10, count_mode=LIST_COUNT_ESTIMATE)
+        assert len(items) == 10
+        assert count >= 10
+
+        # estimated count on a partial page is exact
+        count, items = svc.list(
+            limit=10, offset=total - 5, count_mode=LIST_COUNT_ESTIMATE
+        )
+        assert len(items) == 5
+        assert count == total
+
+    def test_service_seek(self, pokie_app):
+        svc = RestService(pokie_app.di)
+        svc.set_record_class(CustomerRecord)
+
+        total, rows = svc.list(sort_fields={CustomerRecord.id: "asc"})
+        page, cursor = svc.seek(limit=10)
+        assert [r.id for r in page] == [r.id for r in rows[:10]]
+        assert cursor is not None
+
+        page, cursor = svc.seek(limit=10, cursor=cursor)
+        assert [r.id for r in page] == [r.id for r in rows[10:20]]
@@ -1,5 +1,6 @@
 from pokie.constants import HTTP_OK, HTTP_BADREQ, HTTP_NOT_FOUND
 from pokie.test import PokieClient
+from pokie_test.views.northwind_customer import CustomerView
 
 
 class TestRestViewEdge:
@@ -49,3 +50,104 @@ class TestRestViewEdge:
             assert result.success is True
             assert "total" in result.data
             assert "items" in result.data
+
+    def test_list_with_cursor(self, pokie_app):
+        with pokie_app.test_client() as client:
+            client = PokieClient(client)
+            result = client.get("{}?sort=id".format(self.base_url))
+            assert result.code == HTTP_OK
+            expected = [item["id"] for item in result.data["items"]]
+
+            # walk all pages using cursor pagination
+            ids = []
+            cursor = ""
+            while cursor is not None:
+                result = client.get(
+                    "{}?limit=10&cursor={}".format(self.base_url, cursor)
+                )
+                assert result.code == HTTP_OK
+                assert result.success is True
+                assert "total" not in result.data
+                assert len(result.data["items"]) <= 10
+                ids.extend([item["id"] for item in result.data["items"]])
+                cursor = result.data["nextCursor"]
+
+            assert ids == expected
+
+    def test_list_with_cursor_desc(self, pokie_app):
+        with pokie_app.test_client() as client:
+            client = PokieClient(client)
+            result = client.get(
+                "{}?limit=5&offset=5&sort=city:desc".format(self.base_url)
+            )
+            assert result.code == HTTP_OK
+            offset_page = result.data["items"]
+
+            result = client.get(
+                "{}?limit=5&cursor=&sort=city:desc".format(self.base_url)
+            )
+            assert result.code == HTTP_OK
+            cursor = result.data["nextCursor"]
+            assert cursor is not None
+
+            result = client.get(
+                "{}?limit=5&cursor={}&sort=city:desc".format(self.base_url, cursor)
+            )
+            assert result.code == HTTP_OK
+            cities = [item["city"] for item in result.data["items"]]
+            assert cities == [item["city"] for item in offset_page]
+
+    def test_list_with_invalid_cursor(self, pokie_app):
+        with pokie_app.test_client() as client:
+            client = PokieClient(client)
+            result = client.get("{}?cursor=not-a-cursor".format(self.base_url))
+            assert result.code == HTTP_BADREQ
+            assert result.success is False
+
+            # mixed sort directions are not supported in cursor mode
+            result = client.get(
+                "{}?cursor=&sort=city:asc,country:desc".format(self.base_url)
+            )
+            assert result.code == HTTP_BADREQ
+            assert result.success is False
+
+    def test_list_with_count_mode(self, pokie_app):
+        with pokie_app.test_client() as client:
+            client = PokieClient(client)
+            result = client.get("{}?limit=5&count=none".format(self.base_url))
+            assert result.code == HTTP_OK
+            assert result.data["total"] is None
+            assert len(result.data["items"]) == 5
+
+            result = client.get("{}?limit=5&count=estimate".format(self.base_url))
+            assert result.code == HTTP_OK
+            assert result.data["total"] >= 5
+
+            result = client.get("{}?count=invalid".format(self.base_url))
+            assert result.code == HTTP_BADREQ
+
+    def test_list_count_mode_custom_service(self, pokie_app):
+        class LegacyService:
+            # list() without count_mode
+            def list(
+                self,
+                search_fields,
+                search_text,
+                match_fields,
+                limit,
+                offset,
+                sort_fields,
+            ):
+                return 1, []
+
+        class LegacyView(CustomerView):
+            svc = property(lambda self: LegacyService())
+
+        with pokie_app.test_request_context("{}?count=none".format(self.base_url)):
+            response = LegacyView().list()
+            assert response.status_code == HTTP_BADREQ
+
+        with pokie_app.test_request_context(self.base_url):
+            response = LegacyView().list()
+            assert response.status_code == HTTP_OK
+            assert response.get_json()["data"]["total"] == 1
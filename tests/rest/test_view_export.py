@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+from pokie.constants import HTTP_OK, HTTP_BADREQ, HTTP_NOT_FOUND
+from pokie.http import JsonStreamResponse
+from pokie.test import PokieClient
+
+
+class TestRestViewExport:
+    base_url = "/customers"
+
+    def test_export_ndjson(self, pokie_app):
+        with pokie_app.test_client() as client:
+            result = PokieClient(client).get("{}?sort=id".format(self.base_url))
+            assert result.code == HTTP_OK
+            expected = [item["id"] for item in result.data["items"]]
+
+            response = client.get("{}/export?sort=id".format(self.base_url))
+            assert response.status_code == HTTP_OK
+            assert response.is_streamed is True
+            assert response.mimetype == "application/x-ndjson"
+
+            lines = response.get_data(as_text=True).splitlines()
+            rows = [json.loads(line) for line in lines]
+            assert [row["id"] for row in rows] == expected
+            assert "company_name" in rows[0].keys()
+
+    def test_export_json(self, pokie_app):
+        with pokie_app.test_client() as client:
+            response = client.get(
+                "{}/export?format=json&match=country:France".format(self.base_url)
+            )
+            assert response.status_code == HTTP_OK
+            assert response.mimetype == "application/json"
+            rows = json.loads(response.get_data(as_text=True))
+            assert len(rows) > 0
+            for row in rows:
+                assert row["country"] == "France"
+
+            # empty result
+            response = client.get(
+                "{}/export?format=json&match=country:Atlantis".format(self.base_url)
+            )
+            assert response.status_code == HTTP_OK
+            assert json.loads(response.get_data(as_text=True)) == []
+
+    def test_export_invalid_parameters(self, pokie_app):
+        with pokie_app.test_client() as client:
+            client = PokieClient(client)
+            result = client.get("{}/export?format=xml".format(self.base_url))
+            assert result.code == HTTP_BADREQ
+
+            result = client.get(
+                "{}/export?sort=nonexistent_field".format(self.base_url)
+            )
+            assert result.code == HTTP_BADREQ
+
+    def test_export_camelcase(self, pokie_app):
+        with pokie_app.test_client() as client:
+            response = client.get("/catalog/product/export")
+            assert response.status_code == HTTP_OK
+            lines = response.get_data(as_text=True).splitlines()
+            assert len(lines) > 0
+            row = json.loads(lines[0])
+            assert "productName" in row.keys()
+
+    def test_export_disabled(self, pokie_app):
+        with pokie_app.test_client() as client:
+            client = PokieClient(client)
+            # export is not enabled on this view; "export" is handled as a record id
+            result = client.get("/catalog/category/export")
+            assert result.code == HTTP_NOT_FOUND
+
+    def test_stream_response_chunks(self, pokie_app):
+        response = JsonStreamResponse([{"id": i} for i in range(100)])
+        response.chunk_size = 64
+        chunks = list(response.generate())
+        assert len(chunks) > 1
+        rows = "".join(chunks).splitlines()
+        assert [json.loads(row)["id"] for row in rows] == list(range(100))
+
+        response = JsonStreamResponse([{"id": i} for i in range(100)], as_array=True)
+        response.chunk_size = 64
+        rows = json.loads("".join(response.generate()))
+        assert [row["id"] for row in rows] == list(range(100))
+
+    def test_stream_response_error(self, pokie_app):
+        def rows():
+            yield {"id": 1}
+            yield {"id": 2}
+            raise RuntimeError("connection lost")
+
+        response = JsonStreamResponse(rows())
+        lines = "".join(response.generate()).splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {"id": 1},
+            {"id": 2},
+            JsonStreamResponse.error_record,
+        ]
+
+        # arrays end with the error record, and are not terminated
+        response = JsonStreamResponse(rows(), as_array=True)
+        output = "".join(response.generate())
+        with pytest.raises(ValueError):
+            json.loads(output)
+        assert json.loads(output + "]")[-1] == JsonStreamResponse.error_record